@@ -7,6 +7,7 @@
 ########################################################################
 
 from django import forms
+from django.utils import six
 
 from modeltranslation.models import FieldTranslation
 
@@ -25,7 +26,7 @@ class ModelFormTrimForm(forms.ModelForm):
 		cleaned_data = super(ModelFormTrimForm, self).clean()
 
 		for field in self.cleaned_data:
-			if isinstance(self.cleaned_data[field], basestring):
+			if isinstance(self.cleaned_data[field], six.string_types):
 				self.cleaned_data[field] = self.cleaned_data[field].strip()
 
 		#Hay que devolver siempre el array "cleaned_data"
@@ -35,7 +36,7 @@ class ModelFormTrimForm(forms.ModelForm):
 class FieldTranslationForm(ModelFormTrimForm):
 	class Meta:
 		model = FieldTranslation
-		exclude = ("module", "model", "object_id", "field", "lang", "source_text", "source_md5", "context", "creation_datetime", "last_update_datetime", "creator_user")
+		exclude = ("module", "model", "content_type", "object_id", "field", "lang", "source_text", "source_md5", "source_checksum", "is_from_memory", "context", "creation_datetime", "last_update_datetime", "creator_user")
 
 	class Media:
 		css = {
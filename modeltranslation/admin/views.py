@@ -1,24 +1,27 @@
 # -*- coding: utf-8 -*-
 
-import hashlib
-
-from django.shortcuts import render_to_response, render, get_object_or_404
-from django.template import RequestContext
-from django.http import HttpResponseRedirect, Http404
+from django.shortcuts import render, get_object_or_404
+from django.http import HttpResponse, HttpResponseRedirect, Http404, StreamingHttpResponse
 from django.core.urlresolvers import reverse
 from django.db import transaction
 from django.conf import settings
-import re
 
 from modeltranslation.admin.forms import FieldTranslationForm, ImportTranslationsForm
+from modeltranslation.pofile import generate_po, import_po
+from modeltranslation import jobs, metrics
 from modeltranslation.models import FieldTranslation
 
 
+########################################################################
+## Number of translations in each page of the translation list
+TRANSLATIONS_PAGE_SIZE = getattr(settings, "MODELTRANSLATION_PAGE_SIZE", 100)
+
+
 ########################################################################
 ########################################################################
 # Admin index
 def admin(request):
-	return render_to_response('modeltranslation/admin/admin.html',{}, RequestContext(request))
+	return render(request, 'modeltranslation/admin/admin.html',{})
 
 
 ########################################################################
@@ -59,19 +62,40 @@ def view_all(request, language, filter=None):
 		search_query = request.GET.get("search")
 		trans_filter["source_text__icontains"] = search_query
 
-	translations = FieldTranslation.objects.filter(**trans_filter)
-	
-	# Update translations
-	active_translations = []
-	for translation in translations:
-		source_model = translation.get_source_model()
-		if not translation.field in source_model._meta.translatable_fields:
-			translation.delete()
-		else:
-			active_translations.append(translation)
-	
-	replacements = {"translations":active_translations, "filter":filter, "lang":language, "language":LANGUAGES[language], "search_query":search_query}
-	return render_to_response('modeltranslation/admin/list.html',replacements, RequestContext(request))
+	# Translations of fields that are not translatable anymore are excluded in SQL
+	# (they are deleted when updating translations)
+	translations = FieldTranslation.active_translations().filter(**trans_filter)
+
+	# Keyset pagination: pages are delimited by translation ids
+	after, before = _get_page_bound(request, "after"), _get_page_bound(request, "before")
+	if before is not None:
+		page = list(translations.filter(id__lt=before).order_by("-id")[:TRANSLATIONS_PAGE_SIZE + 1])
+		has_more = len(page) > TRANSLATIONS_PAGE_SIZE
+		page = list(reversed(page[:TRANSLATIONS_PAGE_SIZE]))
+		has_previous, has_next = has_more, True
+	else:
+		if after is not None:
+			translations = translations.filter(id__gt=after)
+		page = list(translations.order_by("id")[:TRANSLATIONS_PAGE_SIZE + 1])
+		has_more = len(page) > TRANSLATIONS_PAGE_SIZE
+		page = page[:TRANSLATIONS_PAGE_SIZE]
+		has_previous, has_next = after is not None, has_more
+
+	replacements = {
+		"translations":page, "filter":filter, "lang":language, "language":LANGUAGES[language], "search_query":search_query,
+		"has_previous": has_previous and len(page) > 0, "has_next": has_next and len(page) > 0,
+		"previous_before": page[0].id if len(page) > 0 else None, "next_after": page[-1].id if len(page) > 0 else None,
+	}
+	return render(request, 'modeltranslation/admin/list.html',replacements)
+
+
+########################################################################
+## Gets an id that delimits a page of translations from the query string
+def _get_page_bound(request, name):
+	try:
+		return int(request.GET[name])
+	except (KeyError, ValueError):
+		return None
 
 
 ########################################################################
@@ -104,7 +128,7 @@ def edit(request, translation):
 	LANGUAGES = dict(lang for lang in settings.LANGUAGES)
 	language = LANGUAGES[translation.lang]
 	
-	return render_to_response('modeltranslation/admin/edit_translation.html',{"translation":translation, "form":form, "lang":translation.lang, "language":language}, RequestContext(request))
+	return render(request, 'modeltranslation/admin/edit_translation.html',{"translation":translation, "form":form, "lang":translation.lang, "language":language})
 
 
 ########################################################################
@@ -116,61 +140,14 @@ def import_translations(request, language):
 	Import translations froma PO file. Please take note that this PO file MUST be generated with this application
 	because translation comments in the file are used as translation ids.
 	"""
-	def _import_po_file(uploadedfile, lang):
-		lines = []
-		for line in uploadedfile:
-			lines.append(line)
-		num_lines = len(lines)
-		
-		prog_ctxt = re.compile(r"msgctxt\s+\"(?P<id>\d+)--(?P<module>(\.\w)+)--(?P<model>\w+)--(?P<object_id>\d+)--(?P<field>\w+)\"")
-		prog_msgid = re.compile(r"msgid\s+\"(?P<source_text>.+)\"$")
-		prog_msgstr = re.compile(r"msgstr\s+(?P<trans>.+)")
-		
-		i = 0
-		while i < num_lines:
-			line = lines[i]
-			result = prog_ctxt.match(line)
-			if result:
-				id = result.group("id")
-				is_fuzzy = (lines[i-1] == "#, fuzzy\n")
-
-				source_text = lines[i+1]
-				translation_line = lines[i+2]
-
-				# Traducción
-				g = prog_msgstr.match(translation_line)
-				if g is None:
-					i += 1
-					continue
-				translation = g.group("trans").replace("msgstr","")[1:-1].replace("\\\"","\"").replace('\\\'','\'')
-					
-				# Get translation from a translation id
-				try:
-					field_trans = FieldTranslation.objects.get(id=id)
-				except FieldTranslation.DoesNotExist:
-					source_text = source_text.replace("msgid","")[1:-1].replace("\\\"","\"").replace('\\\'','\'')
-					source_md5 = hashlib.md5(source_text.encode("utf-8")).hexdigest()
-					field_trans = FieldTranslation(
-						module=result.group("module"), model=result.group("model"), object_id=result.group("object_id"),
-						field=result.group("field"), lang=lang, source_text=source_text, source_md5=source_md5
-					)
-					
-				# Sets translation and is_fuzzy attribute
-				field_trans.translation = translation
-				field_trans.is_fuzzy = is_fuzzy
-				field_trans.save()
-				i += 4
-			i += 1
-	
-	# Delete orphan translations
-	FieldTranslation.delete_orphan_translations()
-	
 	if request.method != "POST":
 		return HttpResponseRedirect(reverse("modeltranslation:admin_url"))
 	
 	form = ImportTranslationsForm(request.POST, request.FILES)
 	if form.is_valid():
-		_import_po_file(request.FILES['file'], language)
+		import_po(request.FILES['file'], language)
+		# Orphan translations are deleted by a maintenance job
+		jobs.enqueue_job(jobs.DELETE_ORPHAN_TRANSLATIONS)
 		return HttpResponseRedirect(reverse("modeltranslation:view_all_url",args=(language,"all")))
 
 	return HttpResponseRedirect(reverse("modeltranslation:admin_url"))
@@ -183,18 +160,8 @@ def export_translations(request, language):
 	"""
 	Export translations view.
 	"""
-	FieldTranslation.delete_orphan_translations()
-	translations = FieldTranslation.objects.filter(lang=language)
-	for trans in translations:
-		trans.source_text = trans.source_text.replace("'","\'").replace("\"","\\\"")
-		trans.translation = trans.translation.replace("'","\'").replace("\"","\\\"")
-	replacements = {"translations":translations, "lang":language}
-	if len(settings.ADMINS)>0:
-		replacements["last_translator"] = settings.ADMINS[0][0]
-		replacements["last_translator_email"] = settings.ADMINS[0][1]
-	if settings.WEBSITE_NAME:
-		replacements["website_name"] = settings.WEBSITE_NAME
-	response = render(request=request, template_name='modeltranslation/admin/export_translations.po', dictionary=replacements, context_instance=RequestContext(request), content_type="text/x-gettext-translation")
+	# The PO file is generated while it is being sent. Exporting doesn't modify the translations
+	response = StreamingHttpResponse(generate_po(language), content_type="text/x-gettext-translation")
 	response['Content-Disposition'] = 'attachment; filename="{0}.po"'.format(language)
 	return response
 
@@ -204,9 +171,25 @@ def export_translations(request, language):
 ## Update translations
 def update_translations(request):
 	"""
-	Update translations: delete orphan translations and creates empty translations for new objects in database.
+	Update translations: enqueues the jobs that delete orphan and stale translations and create empty translations for
+	new objects in database.
 	"""
-	FieldTranslation.delete_orphan_translations()
-	num_translations = FieldTranslation.update_translations()
-	return render_to_response('modeltranslation/admin/update_translations_ok.html',{"num_translations":num_translations}, RequestContext(request))
-	
+	# Maintenance jobs are too long for a request, they are only enqueued (see jobs.py)
+	enqueued_jobs = [
+		job_name for job_name, options in ((jobs.DELETE_ORPHAN_TRANSLATIONS, {"stale": True}), (jobs.UPDATE_TRANSLATIONS, {}))
+		if jobs.enqueue_job(job_name, options)
+	]
+	return render(request, 'modeltranslation/admin/update_translations_ok.html',{"enqueued_jobs":enqueued_jobs})
+
+
+########################################################################
+########################################################################
+## Metrics in Prometheus text format
+def metrics_view(request):
+	"""
+	Metrics of this process (see metrics.py). Only available when metrics are enabled and the sink can render them.
+	"""
+	sink = metrics.get_sink() if metrics.ENABLED else None
+	if sink is None or not hasattr(sink, "render_prometheus"):
+		raise Http404(u"Metrics are not enabled")
+	return HttpResponse(sink.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+from asgiref.sync import sync_to_async
+from django.db.models.query import QuerySet
+from django.utils import translation
+
+from modeltranslation import metrics
+from modeltranslation.backends import get_backend
+from modeltranslation.models import FieldTranslation
+from modeltranslation.transcache import TransCache, SharedTransCache, get_cached_translations, set_cached_translations,\
+	translation_cache_is_enabled
+from modeltranslation.translation import site_is_monolingual, get_fallback_languages, _get_fallback_translation,\
+	_fallback_translations_are_loaded, _get_languages_list, _set_loaded_translations, _get_prefetch_languages,\
+	_group_prefetch_instances, _get_prefetch_cached_translations, _set_prefetch_cached_translations,\
+	_set_prefetched_translations
+
+
+########################################################################
+########################################################################
+#	Async API of the translations (Python 3.5+ with asgiref).
+#	Counterparts of the translation functions that can be awaited from async views and consumers:
+#		await aload_translations(instance, lang)
+#		await aget_trans_attr(instance, "name", lang)
+#		await aprefetch_translations(queryset, lang)
+#		await aupdate(instance, "name", lang)
+#	aload_translations and aget_trans_attr are also methods of the translatable models (see add_translation).
+#
+#	This is a sync_to_async wrapper of the synchronous functions, not a path without thread hops. The supported Django
+#	versions have no async ORM, so each read of the storage backend (and of the shared cache) that the local cache
+#	can't answer runs in one sync_to_async call, in another thread. The event loop runs other tasks while it waits,
+#	but each lookup costs the same as calling sync_to_async on the synchronous function.
+#	Translations are stored in the same dynamic attributes and translation cache as the synchronous functions, so both
+#	APIs can be mixed. The request memo of TranslationMemoMiddleware is thread-local and is not used here.
+########################################################################
+########################################################################
+
+
+########################################################################
+## Calls a function of the translation cache
+async def _acall_cache(function, *args):
+	"""
+	The local cache is in memory and is called directly; shared cache backends make network calls, so they are called
+	in a thread when the shared cache is enabled.
+	"""
+	if SharedTransCache.factory().is_enabled:
+		return await sync_to_async(function)(*args)
+	return function(*args)
+
+
+########################################################################
+## Translations of several objects from the storage backend
+async def aget_many_translations(keys, lang=None, fields=None):
+	"""
+	Async counterpart of get_many_translations of the storage backend.
+	@return: dict {key: {(field, lang): (translation, is_fuzzy)}}. All the keys are present in the dict.
+	"""
+	return await sync_to_async(get_backend().get_many_translations)(keys, lang=lang, fields=fields)
+
+
+########################################################################
+## Translations of an instance as a dict
+async def _aget_translations_dict(instance, lang=None):
+	"""
+	Async counterpart of _get_translations_dict.
+	"""
+	key = TransCache.instance_key(instance)
+	if not translation_cache_is_enabled():
+		return (await aget_many_translations([key], lang=lang))[key]
+
+	translations = await _acall_cache(get_cached_translations, key)
+	if translations is None:
+		translations = (await aget_many_translations([key]))[key]
+		await _acall_cache(set_cached_translations, key, translations)
+	return translations
+
+
+########################################################################
+## Loads the translations of an instance
+async def aload_translations(instance, lang=None):
+	"""
+	Loads all translations as dynamic attributes <attr>_<lang_code> and <attr>_<lang_code>_is_fuzzy.
+	@param lang: language code or list of language codes (loaded with only one query). If None, all languages are loaded.
+	"""
+	languages = _get_languages_list(lang)
+	# Unsaved objects (for example, the instance of a creation form) have no translations
+	if languages == [] or instance.id is None:
+		return True
+
+	with metrics.timer("modeltranslation_load_translations_seconds"):
+		translations = await _aget_translations_dict(instance, lang=languages)
+		_set_loaded_translations(instance, translations, languages)
+	return True
+
+
+########################################################################
+## Gets the translated field of an instance
+async def aget_trans_attr(instance, attr, lang=None):
+	"""
+	Async counterpart of get_trans_attr: returns the non-fuzzy translation of attr in lang or in one of its fallback
+	languages, or its original value.
+	"""
+	if site_is_monolingual():
+		return getattr(instance, attr)
+
+	if lang is None:
+		lang = translation.get_language()
+
+	languages = get_fallback_languages(lang)
+	if not _fallback_translations_are_loaded(instance, languages, attr):
+		await aload_translations(instance, lang=languages)
+
+	translation_text = _get_fallback_translation(instance, attr, languages)
+	if translation_text is not None:
+		return translation_text
+	return getattr(instance, attr)
+
+
+########################################################################
+## Loads the translations of a collection of instances with only one query
+async def aprefetch_translations(instances, lang=None, fields=None):
+	"""
+	Async counterpart of prefetch_translations. Querysets are evaluated in a sync_to_async call.
+	@param instances: queryset or iterable of model objects.
+	@return: list with the objects whose translations have been loaded.
+	"""
+	if isinstance(instances, QuerySet):
+		instances = await sync_to_async(list)(instances)
+	else:
+		instances = list(instances)
+
+	languages = _get_prefetch_languages(lang)
+	objects_by_key = _group_prefetch_instances(instances)
+	if len(objects_by_key) == 0:
+		return instances
+
+	translations_by_key = await _acall_cache(_get_prefetch_cached_translations, objects_by_key)
+	missing_keys = [key for key, translations in translations_by_key.items() if translations is None]
+	if len(missing_keys) > 0:
+		translations_by_key.update(await aget_many_translations(missing_keys, lang=languages, fields=fields))
+		await _acall_cache(_set_prefetch_cached_translations, translations_by_key, missing_keys, lang, fields)
+
+	_set_prefetched_translations(objects_by_key, translations_by_key, languages, fields)
+	return instances
+
+
+########################################################################
+## Updates a translation
+async def aupdate(obj, field, lang, context=""):
+	"""
+	Async counterpart of FieldTranslation.update: creates the translation of a field of an object or updates it from its
+	source text and from the dynamic attributes of the object.
+	@return: the FieldTranslation or False if the source text is None.
+	"""
+	return await sync_to_async(FieldTranslation.update)(obj, field, lang, context=context)
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+
+from django.apps import AppConfig
+
+
+########################################################################
+## Configuration of modeltranslation application
+class ModeltranslationConfig(AppConfig):
+	name = "modeltranslation"
+	verbose_name = u"Model translation"
+
+	def ready(self):
+		"""
+		Builds the registry of translatable models and connects the translation actions to each one of them, so calling
+		addtranslations in the models modules is not needed.
+		"""
+		from modeltranslation import registry
+		from modeltranslation.translation import add_translation
+		registry.build()
+		for model in registry.get_translatable_models():
+			add_translation(model)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from modeltranslation.models import FieldTranslation, ObjectTranslation, _chunks
+
+
+########################################################################
+########################################################################
+#	Storage backends of translations.
+#	Translations are always written in FieldTranslation (one row for each field and language), that is used by the
+#	administration, import and export. Backends define how translations are read:
+#	- RowTranslationBackend (default) reads FieldTranslation rows.
+#	- ObjectTranslationBackend keeps a denormalized copy of the translations of each object in each language in
+#	  ObjectTranslation, and reads it with one lookup by (module, model, object_id, lang).
+#	Use MODELTRANSLATION_STORAGE_BACKEND setting to choose one of them.
+#
+#	Keys of the objects are tuples (module, model, object_id), the same ones used by the translation cache.
+#	Translations of each object are returned as a dict {(field, lang): (translation, is_fuzzy)}.
+########################################################################
+########################################################################
+
+
+########################################################################
+## Default storage backend
+DEFAULT_STORAGE_BACKEND = "modeltranslation.backends.RowTranslationBackend"
+
+
+########################################################################
+## Storage backend that reads FieldTranslation rows
+class RowTranslationBackend(object):
+
+	####################################################################################################################
+	## Translations of an object
+	def get_translations(self, key, lang=None):
+		"""
+		Returns the translations of an object as a dict {(field, lang): (translation, is_fuzzy)}.
+		@param key: tuple (module, model, object_id).
+		@param lang: language of the translations or list of languages. If None, all languages are returned.
+		"""
+		return self.get_many_translations([key], lang=lang).get(key, {})
+
+
+	####################################################################################################################
+	## Translations of several objects
+	def get_many_translations(self, keys, lang=None, fields=None):
+		"""
+		Returns the translations of several objects with one query.
+		@return: dict {key: {(field, lang): (translation, is_fuzzy)}}. All the keys are present in the dict.
+		"""
+		translations_by_key = dict((key, {}) for key in keys)
+		if len(translations_by_key) == 0:
+			return translations_by_key
+
+		# One condition for each model
+		ids_by_model = {}
+		for module, model, object_id in translations_by_key.keys():
+			ids_by_model.setdefault((module, model), []).append(object_id)
+		models_by_content_type_id = {}
+		condition = None
+		for (module, model), object_ids in ids_by_model.items():
+			content_type_id = FieldTranslation.get_content_type_id(module, model)
+			models_by_content_type_id[content_type_id] = (module, model)
+			model_condition = Q(content_type_id=content_type_id, object_id__in=object_ids)
+			condition = model_condition if condition is None else (condition | model_condition)
+
+		fieldtranslations = FieldTranslation.objects.filter(condition)
+		if lang:
+			fieldtranslations = fieldtranslations.filter(**_lang_filter(lang))
+		if fields:
+			fieldtranslations = fieldtranslations.filter(field__in=list(fields))
+
+		fieldtranslations = fieldtranslations.values_list("content_type_id", "object_id", "field", "lang", "translation", "is_fuzzy")
+		for content_type_id, object_id, field, field_lang, translation_text, is_fuzzy in fieldtranslations:
+			module, model = models_by_content_type_id[content_type_id]
+			translations_by_key[(module, model, object_id)][(field, field_lang)] = (translation_text, is_fuzzy)
+		return translations_by_key
+
+
+	####################################################################################################################
+	## Notifies that all the translations of an object have been written
+	def object_translations_saved(self, key, translations):
+		"""
+		Called when all the translations of an object are known after writing them.
+		@param translations: dict {(field, lang): (translation, is_fuzzy)} with all the translations of the object.
+		"""
+		pass
+
+
+	####################################################################################################################
+	## Notifies that some translations of several objects have been written
+	def translations_changed(self, keys):
+		"""
+		Called when translations of several objects have been created, updated or deleted in FieldTranslation.
+		"""
+		pass
+
+
+########################################################################
+## Storage backend that reads ObjectTranslation rows
+class ObjectTranslationBackend(RowTranslationBackend):
+
+	####################################################################################################################
+	## Translations of several objects
+	def get_many_translations(self, keys, lang=None, fields=None):
+		translations_by_key = dict((key, {}) for key in keys)
+		if len(translations_by_key) == 0:
+			return translations_by_key
+
+		object_translations = ObjectTranslation.objects.filter(_keys_condition(translations_by_key.keys()))
+		if lang:
+			object_translations = object_translations.filter(**_lang_filter(lang))
+
+		for object_translation in object_translations.only("module", "model", "object_id", "lang", "translations"):
+			key = (object_translation.module, object_translation.model, object_translation.object_id)
+			for (field, field_lang), values in object_translation.get_translations_dict().items():
+				if not fields or field in fields:
+					translations_by_key[key][(field, field_lang)] = values
+		return translations_by_key
+
+
+	####################################################################################################################
+	## Writes the ObjectTranslation rows of an object
+	def object_translations_saved(self, key, translations):
+		self._write_translations({key: translations})
+
+
+	####################################################################################################################
+	## Rewrites the ObjectTranslation rows of several objects from FieldTranslation
+	def translations_changed(self, keys):
+		keys = list(set(keys))
+		row_backend = RowTranslationBackend()
+		for chunk in _chunks(keys, 500):
+			self._write_translations(row_backend.get_many_translations(chunk))
+
+
+	####################################################################################################################
+	## Writes the ObjectTranslation rows of several objects
+	def _write_translations(self, translations_by_key):
+		"""
+		Replaces the ObjectTranslation rows of the objects with one row for each language.
+		@param translations_by_key: dict {key: {(field, lang): (translation, is_fuzzy)}}.
+		"""
+		if len(translations_by_key) == 0:
+			return
+		now_datetime = timezone.now()
+		object_translations = []
+		for (module, model, object_id), translations in translations_by_key.items():
+			translations_by_lang = {}
+			for (field, lang), values in translations.items():
+				translations_by_lang.setdefault(lang, {})[field] = values
+			for lang, lang_translations in translations_by_lang.items():
+				object_translation = ObjectTranslation(module=module, model=model, object_id=object_id, lang=lang, last_update_datetime=now_datetime)
+				object_translation.set_translations_dict(lang_translations)
+				object_translations.append(object_translation)
+
+		with transaction.atomic():
+			ObjectTranslation.objects.filter(_keys_condition(translations_by_key.keys())).delete()
+			ObjectTranslation.objects.bulk_create(object_translations)
+
+
+########################################################################
+## Condition that matches the rows of several objects
+def _keys_condition(keys):
+	ids_by_model = {}
+	for module, model, object_id in keys:
+		ids_by_model.setdefault((module, model), []).append(object_id)
+	condition = Q(pk__in=[])
+	for (module, model), object_ids in ids_by_model.items():
+		condition |= Q(module=module, model=model, object_id__in=object_ids)
+	return condition
+
+
+########################################################################
+## Filter of the rows of a language or of a list of languages (only one query for all of them)
+def _lang_filter(lang):
+	if isinstance(lang, (list, tuple, set, frozenset)):
+		return {"lang__in": list(lang)}
+	return {"lang": lang}
+
+
+########################################################################
+## Storage backend in use
+_backend = None
+
+
+def get_backend():
+	"""
+	Returns the storage backend defined in MODELTRANSLATION_STORAGE_BACKEND setting.
+	"""
+	global _backend
+	if _backend is None:
+		_backend = import_string(getattr(settings, "MODELTRANSLATION_STORAGE_BACKEND", DEFAULT_STORAGE_BACKEND))()
+	return _backend
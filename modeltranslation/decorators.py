@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from modeltranslation.models import FieldTranslation
-import hashlib
+from modeltranslation.models import FieldTranslation, checksum
 
 ###########################################
 ## Configuraciones del sistema
@@ -13,8 +12,7 @@ def _make_translations(obj):
 	if hasattr(cls,"TRANSLATABLE_FIELDS"):
 		for field in cls.TRANSLATABLE_FIELDS:
 			value = getattr(obj,field)
-			md5_value = hashlib.md5(value.encode("utf-8")).hexdigest()
-			setattr( obj, "md5"+field, md5_value )
+			setattr( obj, "md5"+field, checksum(value) )
 			for lang in settings.LANGUAGES:
 				trans = FieldTranslation.update(obj, field, lang[0])
 
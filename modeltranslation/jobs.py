@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import socket
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from modeltranslation import metrics
+from modeltranslation.models import FieldTranslation, TranslationJob, DELETE_ORPHANS_CHUNK_SIZE, UPDATE_TRANSLATIONS_CHUNK_SIZE
+from modeltranslation.parallel import update_translations_parallel
+
+
+########################################################################
+########################################################################
+#	Maintenance jobs of the translations.
+#	Updating translations and deleting orphan translations can take a long time in big databases, so they are run by
+#	management commands (or by a task queue) instead of inside an HTTP request:
+#		python manage.py update_translations
+#		python manage.py delete_orphan_translations
+#	The administration only enqueues them (see enqueue_job), and run_translation_jobs command runs the enqueued jobs.
+#	The other entry points that delete orphan translations (the --delete-orphans option of export_translations and
+#	import_translations commands) run delete_orphan_translations job too, never FieldTranslation method directly.
+#
+#	Each job has a TranslationJob row that works as a lock, so two runs of the same job can't overlap, and that stores
+#	a checkpoint after each chunk, so an interrupted run is resumed where it stopped.
+########################################################################
+########################################################################
+
+
+########################################################################
+## Names of the jobs
+UPDATE_TRANSLATIONS = "update_translations"
+DELETE_ORPHAN_TRANSLATIONS = "delete_orphan_translations"
+
+########################################################################
+## Number of seconds after which the lock of a job that has not stored a checkpoint is considered abandoned
+LOCK_TIMEOUT = getattr(settings, "MODELTRANSLATION_JOB_LOCK_TIMEOUT", 6 * 3600)
+
+########################################################################
+## Dotted path of a function (name, options) that starts an enqueued job, for example, sending it to a task queue.
+## If None, enqueued jobs wait until run_translation_jobs command is run.
+JOB_LAUNCHER = getattr(settings, "MODELTRANSLATION_JOB_LAUNCHER", None)
+
+
+########################################################################
+## Exception raised when a job is already running
+class JobLockedError(Exception):
+	pass
+
+
+########################################################################
+## Converts a pair (module, model) to a string and back (keys of the checkpoints in JSON)
+def _model_key_str(model_key):
+	return u"{0}.{1}".format(*model_key)
+
+
+def _model_key_from_str(model_key_str):
+	module_name, _, model_name = model_key_str.rpartition(".")
+	return (module_name, model_name)
+
+
+########################################################################
+## Pairs (module, model) of a list of model labels
+def get_model_keys(model_labels):
+	"""
+	Converts a list of model labels "app_label.ModelName" to pairs (module, model).
+	@raise LookupError: if one of the models does not exist.
+	"""
+	if not model_labels:
+		return None
+	model_keys = []
+	for model_label in model_labels:
+		model = apps.get_model(model_label)
+		model_keys.append((model.__module__, model.__name__))
+	return model_keys
+
+
+########################################################################
+## A run of a job
+class _JobRun(object):
+	"""
+	Context manager that holds the lock of a job while it runs and stores its checkpoints.
+	The checkpoint is {"options": options of the run, "last_ids": {"module.Model": id}, "counts": {"module.Model": {...}}}.
+	It is only used to resume a run with the same options.
+	"""
+
+	def __init__(self, name, options, restart=False, force=False):
+		self.name = name
+		self.options = options
+		self.restart = restart
+		self.force = force
+		self.owner = u"{0}:{1}".format(socket.gethostname(), os.getpid())
+		self.checkpoint = {"options": options, "last_ids": {}, "counts": {}}
+
+	def __enter__(self):
+		TranslationJob.objects.get_or_create(name=self.name)
+		now = timezone.now()
+		jobs = TranslationJob.objects.filter(name=self.name)
+		if not self.force:
+			stale_lock_datetime = now - timedelta(seconds=LOCK_TIMEOUT)
+			jobs = jobs.exclude(status=TranslationJob.RUNNING, lock_datetime__gte=stale_lock_datetime)
+		if jobs.update(status=TranslationJob.RUNNING, lock_owner=self.owner, lock_datetime=now, last_start_datetime=now) == 0:
+			raise JobLockedError(u"Job {0} is already running".format(self.name))
+
+		# Resume the last interrupted run
+		checkpoint = json.loads(TranslationJob.objects.get(name=self.name).checkpoint)
+		if not self.restart and checkpoint.get("options") == self.options:
+			self.checkpoint["last_ids"] = checkpoint.get("last_ids", {})
+			self.checkpoint["counts"] = checkpoint.get("counts", {})
+		return self
+
+	def start_ids(self):
+		"""Dict {(module, model): id} with the last id processed in each model by the interrupted run"""
+		return dict((_model_key_from_str(model_key_str), last_id) for model_key_str, last_id in self.checkpoint["last_ids"].items())
+
+	def counts(self):
+		"""Dict {(module, model): counts} with the counts of the run, including the ones of the interrupted run"""
+		return dict((_model_key_from_str(model_key_str), counts) for model_key_str, counts in self.checkpoint["counts"].items())
+
+	def advance(self, model_key, last_id, counts):
+		"""Stores the checkpoint after a chunk and refreshes the lock"""
+		model_key_str = _model_key_str(model_key)
+		self.checkpoint["last_ids"][model_key_str] = last_id
+		model_counts = self.checkpoint["counts"].setdefault(model_key_str, {})
+		for count_name, count in counts.items():
+			model_counts[count_name] = model_counts.get(count_name, 0) + count
+		jobs = TranslationJob.objects.filter(name=self.name, lock_owner=self.owner)
+		if jobs.update(checkpoint=json.dumps(self.checkpoint), lock_datetime=timezone.now()) == 0:
+			raise JobLockedError(u"Job {0} has been taken by another process".format(self.name))
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		values = {"status": TranslationJob.IDLE, "lock_owner": "", "lock_datetime": None}
+		# Complete runs don't leave a checkpoint
+		if exc_type is None:
+			values.update(checkpoint="{}", last_end_datetime=timezone.now(), last_result=json.dumps(self.checkpoint["counts"]))
+		TranslationJob.objects.filter(name=self.name, lock_owner=self.owner).update(**values)
+		return False
+
+
+########################################################################
+## Counts the translations of a run in the metrics
+def _count_translations(name, counts_by_model):
+	totals = {}
+	for counts in counts_by_model.values():
+		for count_name, count in counts.items():
+			totals[count_name] = totals.get(count_name, 0) + count
+	for count_name, count in totals.items():
+		metrics.increment("modeltranslation_job_translations_total", count, job=name, result=count_name)
+
+
+########################################################################
+## Updates the translations
+@metrics.timed("modeltranslation_job_seconds", job=UPDATE_TRANSLATIONS)
+def update_translations(chunk_size=UPDATE_TRANSLATIONS_CHUNK_SIZE, models=None, languages=None, workers=1, restart=False, force=False, progress=None):
+	"""
+	Creates the missing translations and updates the ones whose source text has changed, holding the lock of the job.
+	@param models: list of model labels "app_label.ModelName". If None, all translatable models are updated.
+	@param languages: list of language codes. If None, all languages but the default one are updated.
+	@param workers: number of processes. If greater than 1, models are split in ranges of primary keys that are updated
+	in parallel (see parallel.py).
+	@param restart: if True, the checkpoint of the last interrupted run is ignored.
+	@param force: if True, the lock is taken even if another run holds it.
+	@param progress: function called with a message after each chunk.
+	@return: dict {(module, model): {"created": number, "updated": number, "reused": number}} of the whole run.
+	@raise JobLockedError: if the job is already running.
+	"""
+	options = {"chunk_size": chunk_size, "models": models, "languages": languages}
+	with _JobRun(UPDATE_TRANSLATIONS, options, restart=restart, force=force) as run:
+		def callback(model_key, last_pk, counts):
+			run.advance(model_key, last_pk, counts)
+			if progress:
+				progress(u"{0}: objects up to pk {1}, {2} created, {3} updated, {4} reused".format(
+					_model_key_str(model_key), last_pk, counts["created"], counts["updated"], counts["reused"]
+				))
+
+		if workers > 1:
+			update_translations_parallel(
+				workers, chunk_size=chunk_size, model_keys=get_model_keys(models), languages=languages, start_pks=run.start_ids(), callback=callback
+			)
+		else:
+			FieldTranslation.update_translations_by_model(
+				chunk_size=chunk_size, model_keys=get_model_keys(models), languages=languages, start_pks=run.start_ids(), callback=callback
+			)
+		counts = run.counts()
+	_count_translations(UPDATE_TRANSLATIONS, counts)
+	return counts
+
+
+########################################################################
+## Deletes the orphan translations
+@metrics.timed("modeltranslation_job_seconds", job=DELETE_ORPHAN_TRANSLATIONS)
+def delete_orphan_translations(chunk_size=DELETE_ORPHANS_CHUNK_SIZE, models=None, languages=None, stale=False, restart=False, force=False, progress=None):
+	"""
+	Deletes the translations whose object does not exist, holding the lock of the job.
+	@param stale: if True, translations of fields that are not translatable anymore are deleted too.
+	See update_translations for the other parameters.
+	@return: dict {(module, model): {"deleted": number}} of the whole run.
+	@raise JobLockedError: if the job is already running.
+	"""
+	options = {"chunk_size": chunk_size, "models": models, "languages": languages, "stale": stale}
+	with _JobRun(DELETE_ORPHAN_TRANSLATIONS, options, restart=restart, force=force) as run:
+		def callback(model_key, last_id, num_deleted):
+			run.advance(model_key, last_id, {"deleted": num_deleted})
+			if progress:
+				progress(u"{0}: translations up to id {1}, {2} deleted".format(_model_key_str(model_key), last_id, num_deleted))
+
+		FieldTranslation.delete_orphan_translations(
+			chunk_size=chunk_size, model_keys=get_model_keys(models), languages=languages, start_ids=run.start_ids(), callback=callback
+		)
+		if stale:
+			num_deleted = FieldTranslation.delete_stale_translations()
+			if progress:
+				progress(u"{0} stale translations deleted".format(num_deleted))
+		counts = run.counts()
+	_count_translations(DELETE_ORPHAN_TRANSLATIONS, counts)
+	return counts
+
+
+########################################################################
+## Functions of each job
+JOBS = {
+	UPDATE_TRANSLATIONS: update_translations,
+	DELETE_ORPHAN_TRANSLATIONS: delete_orphan_translations,
+}
+
+
+########################################################################
+## Enqueues a job
+def enqueue_job(name, options=None):
+	"""
+	Marks a job as pending with the options of its run, unless it is already running, and starts it with
+	MODELTRANSLATION_JOB_LAUNCHER if it is defined.
+	@return: True if the job has been enqueued.
+	"""
+	if options is None:
+		options = {}
+	TranslationJob.objects.get_or_create(name=name)
+	num_enqueued = TranslationJob.objects.filter(name=name).exclude(status=TranslationJob.RUNNING)\
+		.update(status=TranslationJob.PENDING, options=json.dumps(options))
+	if num_enqueued > 0 and JOB_LAUNCHER:
+		import_string(JOB_LAUNCHER)(name, options)
+	return num_enqueued > 0
+
+
+########################################################################
+## Runs the enqueued jobs
+def run_pending_jobs(progress=None):
+	"""
+	Runs the pending jobs in the order they were created. Jobs that are locked by another run are skipped.
+	@return: list of the names of the jobs that have been run.
+	"""
+	run_jobs = []
+	for job in TranslationJob.objects.filter(status=TranslationJob.PENDING).order_by("id"):
+		options = json.loads(job.options)
+		try:
+			JOBS[job.name](progress=progress, **options)
+		except JobLockedError:
+			continue
+		run_jobs.append(job.name)
+	return run_jobs
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import BaseCommand, CommandError
+
+from modeltranslation import jobs
+from modeltranslation.models import DELETE_ORPHANS_CHUNK_SIZE
+
+
+########################################################################
+## Deletes the translations whose object does not exist
+class Command(BaseCommand):
+	help = "Deletes the translations whose object does not exist. An interrupted run is resumed where it stopped."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--chunk-size", type=int, default=DELETE_ORPHANS_CHUNK_SIZE, help="Size of the ranges of translation ids deleted in each sentence.")
+		parser.add_argument("--model", action="append", dest="models", default=None, help="Only delete translations of this model (app_label.ModelName). Can be repeated.")
+		parser.add_argument("--lang", action="append", dest="languages", default=None, help="Only delete translations of this language. Can be repeated.")
+		parser.add_argument("--stale", action="store_true", default=False, help="Delete the translations of fields that are not translatable anymore too.")
+		parser.add_argument("--restart", action="store_true", default=False, help="Ignore the checkpoint of the last interrupted run.")
+		parser.add_argument("--force", action="store_true", default=False, help="Run even if another run holds the lock.")
+
+	def handle(self, *args, **options):
+		progress = self.stdout.write if int(options.get("verbosity", 1)) > 0 else None
+		try:
+			counts = jobs.delete_orphan_translations(
+				chunk_size=options["chunk_size"], models=options["models"], languages=options["languages"], stale=options["stale"],
+				restart=options["restart"], force=options["force"], progress=progress
+			)
+		except (jobs.JobLockedError, LookupError) as e:
+			raise CommandError(e)
+		self.stdout.write(u"{0} orphan translations deleted".format(sum(model_counts.get("deleted", 0) for model_counts in counts.values())))
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import BaseCommand, CommandError
+
+from modeltranslation import jobs
+from modeltranslation.pofile import write_po, EXPORT_CHUNK_SIZE
+
+
+########################################################################
+## Exports the translations of a language to a PO file
+class Command(BaseCommand):
+	help = "Exports the translations of a language to a PO file (or to the standard output)."
+
+	def add_arguments(self, parser):
+		parser.add_argument("language", help="Language code of the translations.")
+		parser.add_argument("--output", "-o", default=None, help="Path of the PO file. By default, the standard output.")
+		parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Number of translations written at once.")
+		parser.add_argument("--delete-orphans", action="store_true", default=False, help="Run the delete_orphan_translations job before exporting.")
+
+	def handle(self, *args, **options):
+		# Exporting doesn't write anything unless it is asked to, and then with the lock of the job (see jobs.py)
+		if options["delete_orphans"]:
+			try:
+				jobs.delete_orphan_translations()
+			except jobs.JobLockedError as e:
+				raise CommandError(e)
+		output = options["output"]
+		if output is None:
+			write_po(options["language"], self.stdout, chunk_size=options["chunk_size"])
+		else:
+			write_po(options["language"], output, chunk_size=options["chunk_size"])
+			self.stderr.write(u"Translations to {0} exported to {1}".format(options["language"], output))
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from modeltranslation import jobs
+from modeltranslation.pofile import import_po, IMPORT_CHUNK_SIZE
+
+
+########################################################################
+## Imports the translations of a language from a PO file
+class Command(BaseCommand):
+	help = "Imports the translations of a language from a PO file generated by modeltranslation."
+
+	def add_arguments(self, parser):
+		parser.add_argument("language", help="Language code of the translations.")
+		parser.add_argument("path", help="Path of the PO file.")
+		parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Number of entries applied at once.")
+		parser.add_argument("--delete-orphans", action="store_true", default=False, help="Run the delete_orphan_translations job before importing.")
+
+	def handle(self, *args, **options):
+		# The deletion of orphans is a job with its own lock and checkpoints (see jobs.py), so it is not part of the
+		# transaction of the import
+		if options["delete_orphans"]:
+			try:
+				jobs.delete_orphan_translations()
+			except jobs.JobLockedError as e:
+				raise CommandError(e)
+		with transaction.atomic():
+			with io.open(options["path"], "rb") as po_file:
+				num_entries = import_po(po_file, options["language"], chunk_size=options["chunk_size"])
+		self.stdout.write(u"Created: {created}, updated: {updated}, unchanged: {unchanged}, skipped: {skipped}".format(**num_entries))
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import BaseCommand
+
+from modeltranslation import jobs
+
+
+########################################################################
+## Runs the maintenance jobs enqueued by the administration
+class Command(BaseCommand):
+	help = "Runs the translation maintenance jobs enqueued from the administration (run it periodically, for example from cron)."
+
+	def handle(self, *args, **options):
+		progress = self.stdout.write if int(options.get("verbosity", 1)) > 0 else None
+		run_jobs = jobs.run_pending_jobs(progress=progress)
+		self.stdout.write(u"{0} jobs run".format(len(run_jobs)))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+
+from django.core.management.base import BaseCommand
+
+from modeltranslation.backends import RowTranslationBackend, ObjectTranslationBackend
+from modeltranslation.models import FieldTranslation, ObjectTranslation, _chunks
+
+
+########################################################################
+## Backfills and verifies the denormalized translations of ObjectTranslationBackend
+class Command(BaseCommand):
+	help = "Writes the translations of each object in ObjectTranslation from FieldTranslation, or verifies that both tables are consistent."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--verify", action="store_true", default=False, help="Only compare both tables and report the inconsistent objects.")
+		parser.add_argument("--fix", action="store_true", default=False, help="With --verify, rewrites the inconsistent objects and deletes the ones that only are in ObjectTranslation.")
+		parser.add_argument("--chunk-size", type=int, default=500, help="Number of objects processed at once.")
+
+	def handle(self, *args, **options):
+		row_backend = RowTranslationBackend()
+		object_backend = ObjectTranslationBackend()
+
+		num_objects = 0
+		num_inconsistent_objects = 0
+		for keys in _chunks(self._object_keys(), options["chunk_size"]):
+			num_objects += len(keys)
+			row_translations = row_backend.get_many_translations(keys)
+
+			# Backfill
+			if not options["verify"]:
+				object_backend._write_translations(row_translations)
+				continue
+
+			# Verification
+			object_translations = object_backend.get_many_translations(keys)
+			inconsistent_translations = dict(
+				(key, translations) for key, translations in row_translations.items() if object_translations.get(key) != translations
+			)
+			num_inconsistent_objects += self._report(object_backend, inconsistent_translations, options["fix"])
+
+		if not options["verify"]:
+			self.stdout.write(u"{0} objects written".format(num_objects))
+			return
+
+		# Objects that only have denormalized translations (they are deleted when fixing)
+		for keys in _chunks(self._denormalized_object_keys(), options["chunk_size"]):
+			row_translations = row_backend.get_many_translations(keys)
+			orphan_translations = dict((key, {}) for key, translations in row_translations.items() if not translations)
+			num_objects += len(orphan_translations)
+			num_inconsistent_objects += self._report(object_backend, orphan_translations, options["fix"])
+
+		self.stdout.write(u"{0} objects verified, {1} inconsistent".format(num_objects, num_inconsistent_objects))
+
+	def _report(self, object_backend, inconsistent_translations, fix):
+		"""Reports the inconsistent objects, rewrites them if fix is True and returns their number"""
+		for key in inconsistent_translations.keys():
+			self.stderr.write(u"Inconsistent translations: {0}.{1} {2}".format(*key))
+		if fix:
+			object_backend._write_translations(inconsistent_translations)
+		return len(inconsistent_translations)
+
+	def _object_keys(self):
+		"""Keys (module, model, object_id) of all the objects with translations, in the order of the index of FieldTranslation"""
+		rows = FieldTranslation.objects.order_by("content_type", "object_id").values_list("content_type_id", "object_id", "module", "model").iterator()
+		for (content_type_id, object_id, module, model), _ in itertools.groupby(rows):
+			yield (module, model, object_id)
+
+	def _denormalized_object_keys(self):
+		"""Keys (module, model, object_id) of all the objects with ObjectTranslation rows"""
+		keys = ObjectTranslation.objects.order_by("module", "model", "object_id").values_list("module", "model", "object_id").iterator()
+		for key, _ in itertools.groupby(keys):
+			yield key
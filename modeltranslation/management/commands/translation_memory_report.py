@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import BaseCommand
+
+from modeltranslation.models import FieldTranslation, WORDS_PER_HOUR
+
+
+########################################################################
+## Reports the translations reused from the translation memory
+class Command(BaseCommand):
+	help = "Shows how many translations were pre-filled from the translation memory and the translator hours they saved."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--words-per-hour", type=int, default=WORDS_PER_HOUR, help="Number of words a translator translates in an hour.")
+
+	def handle(self, *args, **options):
+		report = FieldTranslation.translation_memory_report(words_per_hour=options["words_per_hour"])
+		total = {"translations": 0, "words": 0, "hours": 0.0}
+		for lang in sorted(report.keys()):
+			lang_report = report[lang]
+			self.stdout.write(u"{0}: {1} translations, {2} words, {3:.1f} hours".format(lang, lang_report["translations"], lang_report["words"], lang_report["hours"]))
+			for key in total.keys():
+				total[key] += lang_report[key]
+		self.stdout.write(u"Total: {0} translations, {1} words, {2:.1f} hours".format(total["translations"], total["words"], total["hours"]))
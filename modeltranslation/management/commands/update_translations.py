@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import BaseCommand, CommandError
+
+from modeltranslation import jobs
+from modeltranslation.models import UPDATE_TRANSLATIONS_CHUNK_SIZE
+
+
+########################################################################
+## Creates the missing translations and updates the changed ones
+class Command(BaseCommand):
+	help = "Creates the missing translations of the translatable models and updates the ones whose source text has changed. An interrupted run is resumed where it stopped."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--chunk-size", type=int, default=UPDATE_TRANSLATIONS_CHUNK_SIZE, help="Number of objects processed at once.")
+		parser.add_argument("--model", action="append", dest="models", default=None, help="Only update this model (app_label.ModelName). Can be repeated.")
+		parser.add_argument("--lang", action="append", dest="languages", default=None, help="Only update this language. Can be repeated.")
+		parser.add_argument("--workers", type=int, default=1, help="Number of processes that update translations in parallel.")
+		parser.add_argument("--restart", action="store_true", default=False, help="Ignore the checkpoint of the last interrupted run.")
+		parser.add_argument("--force", action="store_true", default=False, help="Run even if another run holds the lock.")
+
+	def handle(self, *args, **options):
+		progress = self.stdout.write if int(options.get("verbosity", 1)) > 0 else None
+		try:
+			counts = jobs.update_translations(
+				chunk_size=options["chunk_size"], models=options["models"], languages=options["languages"], workers=options["workers"],
+				restart=options["restart"], force=options["force"], progress=progress
+			)
+		except (jobs.JobLockedError, LookupError) as e:
+			raise CommandError(e)
+		self.stdout.write(u"{0} translations created, {1} updated, {2} reused from the translation memory".format(
+			sum(model_counts.get("created", 0) for model_counts in counts.values()),
+			sum(model_counts.get("updated", 0) for model_counts in counts.values()),
+			sum(model_counts.get("reused", 0) for model_counts in counts.values()),
+		))
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import threading
+import timeit
+
+from django.conf import settings
+from django.dispatch import Signal
+from django.utils.module_loading import import_string
+
+
+########################################################################
+########################################################################
+#	Metrics of the translation code.
+#	Counters and timing histograms of the hot paths (translated attributes, loading and saving translations, cache
+#	hits and misses) and of the import, export and maintenance jobs. Each value is:
+#	- sent with counter_incremented and timing_observed signals, and
+#	- written to the metrics sink defined in MODELTRANSLATION_METRICS_SINK setting. The default sink keeps the values
+#	  in memory and renders them in Prometheus text format (see metrics view in admin/views.py).
+#
+#	Metrics are enabled with MODELTRANSLATION_METRICS = True. The setting is read when the modules are loaded: when it
+#	is False, timed returns the undecorated functions and the other functions return at once, so disabled metrics
+#	don't add any work to the instrumented code.
+########################################################################
+########################################################################
+
+
+########################################################################
+## Are metrics enabled?
+ENABLED = getattr(settings, "MODELTRANSLATION_METRICS", False)
+
+########################################################################
+## Default metrics sink
+DEFAULT_METRICS_SINK = "modeltranslation.metrics.MemoryMetricsSink"
+
+########################################################################
+## Upper bounds in seconds of the buckets of the timing histograms
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30, 300)
+BUCKETS = tuple(sorted(getattr(settings, "MODELTRANSLATION_METRICS_BUCKETS", DEFAULT_BUCKETS)))
+
+
+########################################################################
+## Signals sent with each value. Arguments: name, value (or seconds) and labels (dict)
+counter_incremented = Signal()
+timing_observed = Signal()
+
+
+########################################################################
+## Metrics sink that keeps the values in memory
+class MemoryMetricsSink(object):
+	"""
+	Keeps the counters and the histograms of this process in memory.
+	Sinks receive each value with increment and observe methods. Other sinks (statsd, logging...) only need these two
+	methods; render_prometheus is needed to serve the metrics view.
+	"""
+
+	def __init__(self, buckets=BUCKETS):
+		self.buckets = buckets
+		self.lock = threading.Lock()
+		self.reset()
+
+	def reset(self):
+		with self.lock:
+			# {name: {labels: value}}
+			self.counters = {}
+			# {name: {labels: [count of each bucket, count, sum]}}
+			self.histograms = {}
+
+	def increment(self, name, value, labels):
+		labels = _labels_key(labels)
+		with self.lock:
+			values = self.counters.setdefault(name, {})
+			values[labels] = values.get(labels, 0) + value
+
+	def observe(self, name, seconds, labels):
+		labels = _labels_key(labels)
+		with self.lock:
+			values = self.histograms.setdefault(name, {})
+			histogram = values.get(labels)
+			if histogram is None:
+				histogram = values[labels] = [[0] * len(self.buckets), 0, 0.0]
+			for i, upper_bound in enumerate(self.buckets):
+				if seconds <= upper_bound:
+					histogram[0][i] += 1
+			histogram[1] += 1
+			histogram[2] += seconds
+
+	def render_prometheus(self):
+		"""
+		Returns the metrics in Prometheus text exposition format (version 0.0.4).
+		"""
+		lines = []
+		with self.lock:
+			for name in sorted(self.counters.keys()):
+				lines.append(u"# TYPE {0} counter".format(name))
+				for labels, value in sorted(self.counters[name].items()):
+					lines.append(u"{0}{1} {2}".format(name, _format_labels(labels), value))
+			for name in sorted(self.histograms.keys()):
+				lines.append(u"# TYPE {0} histogram".format(name))
+				for labels, (bucket_counts, count, total) in sorted(self.histograms[name].items()):
+					for upper_bound, bucket_count in zip(self.buckets, bucket_counts):
+						lines.append(u"{0}_bucket{1} {2}".format(name, _format_labels(labels + (("le", repr(float(upper_bound))),)), bucket_count))
+					lines.append(u"{0}_bucket{1} {2}".format(name, _format_labels(labels + (("le", u"+Inf"),)), count))
+					lines.append(u"{0}_sum{1} {2!r}".format(name, _format_labels(labels), total))
+					lines.append(u"{0}_count{1} {2}".format(name, _format_labels(labels), count))
+		return u"\n".join(lines) + u"\n"
+
+
+########################################################################
+## Labels as a hashable and ordered tuple
+def _labels_key(labels):
+	return tuple(sorted(labels.items()))
+
+
+########################################################################
+## Labels in Prometheus format: {name="value",...}
+def _format_labels(labels):
+	if not labels:
+		return u""
+	escape = lambda value: type(u"")(value).replace(u"\\", u"\\\\").replace(u"\"", u"\\\"").replace(u"\n", u"\\n")
+	return u"{" + u",".join(u"{0}=\"{1}\"".format(name, escape(value)) for name, value in labels) + u"}"
+
+
+########################################################################
+## Metrics sink in use
+_sink = None
+
+
+def get_sink():
+	"""
+	Returns the metrics sink defined in MODELTRANSLATION_METRICS_SINK setting.
+	"""
+	global _sink
+	if _sink is None:
+		_sink = import_string(getattr(settings, "MODELTRANSLATION_METRICS_SINK", DEFAULT_METRICS_SINK))()
+	return _sink
+
+
+########################################################################
+## Increments a counter
+def increment(name, value=1, **labels):
+	if not ENABLED:
+		return
+	get_sink().increment(name, value, labels)
+	counter_incremented.send(sender=None, name=name, value=value, labels=labels)
+
+
+########################################################################
+## Stores a timing
+def observe(name, seconds, **labels):
+	if not ENABLED:
+		return
+	get_sink().observe(name, seconds, labels)
+	timing_observed.send(sender=None, name=name, seconds=seconds, labels=labels)
+
+
+########################################################################
+## Context manager that times a block
+class _Timer(object):
+
+	def __init__(self, name, labels):
+		self.name = name
+		self.labels = labels
+
+	def __enter__(self):
+		self.start = timeit.default_timer()
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		observe(self.name, timeit.default_timer() - self.start, **self.labels)
+		return False
+
+
+class _NullTimer(object):
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name, **labels):
+	"""
+	Returns a context manager that stores the time spent in its block in the histogram name.
+	For example:
+		with metrics.timer("modeltranslation_job_seconds", job="export_po"):
+			...
+	"""
+	if not ENABLED:
+		return _NULL_TIMER
+	return _Timer(name, labels)
+
+
+########################################################################
+## Decorator that times a function
+def timed(name, **labels):
+	"""
+	Stores the time spent in each call of the decorated function in the histogram name.
+	If metrics are disabled, the function is returned undecorated.
+	"""
+	def decorator(function):
+		if not ENABLED:
+			return function
+
+		@functools.wraps(function)
+		def timed_function(*args, **kwargs):
+			start = timeit.default_timer()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				observe(name, timeit.default_timer() - start, **labels)
+		return timed_function
+	return decorator
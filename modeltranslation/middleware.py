@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+from django.core.exceptions import MiddlewareNotUsed
+
+from modeltranslation import profiler
+from modeltranslation.transcache import RequestTransCache
+
+
+########################################################################
+## Memoizes the translations read by the templates during each request
+class TranslationMemoMiddleware(object):
+	"""
+	Creates a RequestTransCache store when a request starts and drops it when the response has been built, so the
+	_ template filter reads the translations of each object once per request and language.
+	Works both in MIDDLEWARE and in MIDDLEWARE_CLASSES settings.
+	"""
+
+	def __init__(self, get_response=None):
+		self.get_response = get_response
+
+	def __call__(self, request):
+		RequestTransCache.start()
+		try:
+			return self.get_response(request)
+		finally:
+			RequestTransCache.end()
+
+	def process_request(self, request):
+		RequestTransCache.start()
+
+	def process_response(self, request, response):
+		RequestTransCache.end()
+		return response
+
+
+########################################################################
+## Profiles the translation lookups of each request
+class TranslationProfilerMiddleware(object):
+	"""
+	Records the translation lookups of each request (see profiler.py), logs a warning for each model whose translations
+	are read one object at a time and stores the profile in request.modeltranslation_profile.
+	Only used when MODELTRANSLATION_PROFILER is True (by default, in DEBUG mode).
+	"""
+
+	def __init__(self, get_response=None):
+		if not profiler.ENABLED:
+			raise MiddlewareNotUsed(u"Translation profiler is disabled")
+		self.get_response = get_response
+
+	def __call__(self, request):
+		self.process_request(request)
+		try:
+			response = self.get_response(request)
+		finally:
+			self._end(request)
+		return response
+
+	def process_request(self, request):
+		request.modeltranslation_profile = profiler.start(name=request.path)
+
+	def process_response(self, request, response):
+		self._end(request)
+		return response
+
+	def _end(self, request):
+		profile = profiler.end()
+		if profile is not None:
+			profile.log_warnings()
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modeltranslation', '0008_auto_20160119_1425'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObjectTranslation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('module', models.CharField(help_text='Module name that contains the model whose fields are translated', max_length=128, verbose_name='Module name')),
+                ('model', models.CharField(help_text='Model name whose fields are translated', max_length=128, verbose_name='Model name')),
+                ('object_id', models.PositiveIntegerField(default=1, help_text='Object id whose fields are translated', verbose_name='Object id')),
+                ('lang', models.CharField(choices=settings.LANGUAGES, help_text='Language ISO code of these translations', max_length=16, verbose_name='Language Id')),
+                ('translations', models.TextField(default='{}', help_text='Translation and is_fuzzy flag of each field in JSON', verbose_name='Translations')),
+                ('last_update_datetime', models.DateTimeField(verbose_name='Last update date and time of these translations')),
+            ],
+            options={
+                'verbose_name': 'model object translation',
+                'verbose_name_plural': 'model object translations',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='objecttranslation',
+            unique_together=set([('module', 'model', 'object_id', 'lang')]),
+        ),
+    ]
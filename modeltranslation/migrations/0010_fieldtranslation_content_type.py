@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0001_initial'),
+        ('modeltranslation', '0009_objecttranslation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fieldtranslation',
+            name='content_type',
+            field=models.ForeignKey(default=None, help_text='Content type of the model whose field is translated', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.ContentType', verbose_name='Content type'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.apps import apps as global_apps
+from django.db import migrations
+from django.db.models import Max, Min
+
+# Number of rows updated by each UPDATE statement
+BATCH_SIZE = 50000
+
+
+def get_app_labels():
+    """
+    Returns a dict {(module name, model name): app label} of the models of the project.
+    Historical models don't keep the module of their model (it is always "__fake__"), so the models of the project are
+    used to get the application of the module and model names stored in each translation.
+    """
+    return dict(((model.__module__, model.__name__), model._meta.app_label) for model in global_apps.get_models())
+
+
+def fill_content_types(apps, schema_editor):
+    """
+    Sets the content type of the existing translations from their module and model names.
+    Rows are updated in ranges of ids to keep each statement short on large tables.
+    Content types are not created. Translations whose model can't be found (for example, a renamed or deleted model)
+    keep a NULL content type instead of getting a wrong one: they are never read, and delete_orphan_translations
+    deletes them.
+    """
+    FieldTranslation = apps.get_model('modeltranslation', 'FieldTranslation')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    db_alias = schema_editor.connection.alias
+
+    translations = FieldTranslation.objects.using(db_alias)
+    models = translations.filter(content_type__isnull=True).order_by().values_list('module', 'model').distinct()
+
+    app_labels = get_app_labels()
+    content_types = {}
+    for module_name, model_name in list(models):
+        app_label = app_labels.get((module_name, model_name))
+        try:
+            content_types[(module_name, model_name)] = ContentType.objects.using(db_alias).get(app_label=app_label, model=model_name.lower())
+        except ContentType.DoesNotExist:
+            continue
+
+    for (module_name, model_name), content_type in content_types.items():
+        model_translations = translations.filter(module=module_name, model=model_name, content_type__isnull=True)
+        bounds = model_translations.aggregate(min_id=Min('id'), max_id=Max('id'))
+        if bounds['min_id'] is None:
+            continue
+        for first_id in range(bounds['min_id'], bounds['max_id'] + 1, BATCH_SIZE):
+            model_translations.filter(id__gte=first_id, id__lt=first_id + BATCH_SIZE).update(content_type=content_type)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0001_initial'),
+        ('modeltranslation', '0010_fieldtranslation_content_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_content_types, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modeltranslation', '0012_auto_content_type_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fieldtranslation',
+            name='source_checksum',
+            field=models.BigIntegerField(default=None, help_text='Checksum of source text', null=True, verbose_name='Source text checksum'),
+        ),
+        migrations.AlterField(
+            model_name='fieldtranslation',
+            name='source_md5',
+            field=models.CharField(blank=True, default='', help_text='MD5 checksum of source text (legacy)', max_length=128, verbose_name='MD5 source text'),
+        ),
+    ]
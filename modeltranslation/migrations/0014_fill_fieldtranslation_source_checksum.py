@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import struct
+
+from django.db import migrations
+
+# Number of rows read in each query
+BATCH_SIZE = 10000
+
+
+def checksum(value):
+    """
+    Frozen copy of modeltranslation.models.checksum with its default algorithm (SHA-1), so this migration doesn't
+    change when that function does. With another MODELTRANSLATION_CHECKSUM_ALGORITHM, the next update of translations
+    rewrites these checksums.
+    """
+    if not isinstance(value, bytes):
+        value = value.encode('utf-8')
+    return struct.unpack('>q', hashlib.sha1(value).digest()[:8])[0]
+
+
+def fill_source_checksums(apps, schema_editor):
+    """
+    Replaces the MD5 of the source text of the existing translations by its checksum.
+    All the translations with the same MD5 have the same source text, so there is one UPDATE for each distinct text.
+    Translations that are not converted here are still compared by their MD5 (see FieldTranslation._has_source_checksum)
+    and converted the next time their object is updated.
+    """
+    FieldTranslation = apps.get_model('modeltranslation', 'FieldTranslation')
+    translations = FieldTranslation.objects.using(schema_editor.connection.alias).filter(source_checksum__isnull=True).exclude(source_md5='')
+
+    last_id = 0
+    while True:
+        rows = list(translations.filter(id__gt=last_id).order_by('id').values_list('id', 'source_md5', 'source_text')[:BATCH_SIZE])
+        if len(rows) == 0:
+            break
+        converted_md5s = set()
+        for translation_id, source_md5, source_text in rows:
+            if source_md5 in converted_md5s:
+                continue
+            translations.filter(source_md5=source_md5).update(source_checksum=checksum(source_text), source_md5='')
+            converted_md5s.add(source_md5)
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modeltranslation', '0013_fieldtranslation_source_checksum'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_source_checksums, migrations.RunPython.noop),
+    ]
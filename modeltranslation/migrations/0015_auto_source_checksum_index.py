@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modeltranslation', '0014_fill_fieldtranslation_source_checksum'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='fieldtranslation',
+            index_together=set([('source_checksum',), ('lang', 'is_fuzzy'), ('content_type', 'object_id', 'lang', 'field', 'is_fuzzy')]),
+        ),
+    ]
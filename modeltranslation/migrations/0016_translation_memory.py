@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modeltranslation', '0015_auto_source_checksum_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fieldtranslation',
+            name='is_from_memory',
+            field=models.BooleanField(default=False, help_text='This translation was copied from another translation of the same source text.', verbose_name='From translation memory'),
+        ),
+        migrations.AlterIndexTogether(
+            name='fieldtranslation',
+            index_together=set([('source_checksum', 'lang', 'is_fuzzy'), ('lang', 'is_fuzzy'), ('content_type', 'object_id', 'lang', 'field', 'is_fuzzy')]),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modeltranslation', '0016_translation_memory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Name of the job', max_length=64, unique=True, verbose_name='Name')),
+                ('status', models.CharField(choices=[('idle', 'Idle'), ('pending', 'Pending'), ('running', 'Running')], default='idle', help_text='Status of the job', max_length=16, verbose_name='Status')),
+                ('options', models.TextField(default='{}', help_text='Options of the enqueued run in JSON', verbose_name='Options')),
+                ('checkpoint', models.TextField(default='{}', help_text='Progress of the last interrupted run in JSON', verbose_name='Checkpoint')),
+                ('lock_owner', models.CharField(blank=True, default='', help_text='Host and process id of the running job', max_length=128, verbose_name='Lock owner')),
+                ('lock_datetime', models.DateTimeField(default=None, null=True, verbose_name='Lock date and time')),
+                ('last_start_datetime', models.DateTimeField(default=None, null=True, verbose_name='Start date and time of the last run')),
+                ('last_end_datetime', models.DateTimeField(default=None, null=True, verbose_name='End date and time of the last complete run')),
+                ('last_result', models.TextField(default='{}', verbose_name='Result of the last complete run')),
+            ],
+            options={
+                'verbose_name': 'translation maintenance job',
+                'verbose_name_plural': 'translation maintenance jobs',
+            },
+        ),
+    ]
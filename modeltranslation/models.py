@@ -2,12 +2,22 @@
 
 ###########################################
 # Django models fields, etc.
-from django.db import models
+from django.db import models, connection, transaction
+from django.db.models import signals, Case, Value, When
+from django.core.exceptions import ImproperlyConfigured
+try:
+	from django.core.exceptions import EmptyResultSet
+except ImportError:
+	from django.db.models.sql.datastructures import EmptyResultSet
 
 ###########################################
 # Users
 from django.contrib.auth.models import User
 
+###########################################
+# Content types of the translated models
+from django.contrib.contenttypes.models import ContentType
+
 ###########################################
 # Timezone methods
 from django.utils import timezone
@@ -17,34 +27,241 @@ from django.utils import timezone
 from django.conf import settings
 
 ###########################################
-# Used to MD5 computation
+# Used to checksum computation
 import hashlib
+import struct
 
 ###########################################
-# Used in module load and inspections
+# Used in module load
 import importlib
-import inspect
+import itertools
+import json
 import sys
 
 ###########################################
 # Middleware used to get current user
 from cuser.middleware import CuserMiddleware
 
+from django.utils.module_loading import import_string
+
 from django.contrib import admin
 
+###########################################
+# Registry of translatable models
+from modeltranslation import registry
+
+###########################################
+# Metrics
+from modeltranslation import metrics
+
+###########################################
+# Translation cache
+from modeltranslation.transcache import TransCache, SharedTransCache, RequestTransCache, invalidate_cached_translations,\
+	translation_cache_is_enabled
+
+########################################################################
+## Hash function used to compute the checksums of the source texts.
+## Name of a hashlib algorithm or dotted path of a function that returns the digest of a bytestring.
+## The algorithm must be available in all the interpreters that share the database: checksums computed by other
+## algorithms are taken as changes of the source texts.
+CHECKSUM_ALGORITHM = getattr(settings, "MODELTRANSLATION_CHECKSUM_ALGORITHM", "sha1")
+
+########################################################################
+## Number of bytes of the digest kept in the checksum (it is stored as a 64-bit integer)
+CHECKSUM_SIZE = 8
+
+_checksum_digest = None
+
+
+def _get_checksum_digest():
+	"""
+	Returns the function that computes the digest of a bytestring with the hash function of CHECKSUM_ALGORITHM.
+	@raise ImproperlyConfigured: if the algorithm is not available in this interpreter (there is no fallback, so the
+	checksums don't depend on the interpreter).
+	"""
+	global _checksum_digest
+	if _checksum_digest is None:
+		if "." in CHECKSUM_ALGORITHM:
+			_checksum_digest = import_string(CHECKSUM_ALGORITHM)
+		# blake2b computes a digest of the needed size directly
+		elif CHECKSUM_ALGORITHM == "blake2b" and hasattr(hashlib, "blake2b"):
+			_checksum_digest = lambda data: hashlib.blake2b(data, digest_size=CHECKSUM_SIZE).digest()
+		elif CHECKSUM_ALGORITHM in hashlib.algorithms_available:
+			_checksum_digest = lambda data: hashlib.new(CHECKSUM_ALGORITHM, data).digest()
+		else:
+			raise ImproperlyConfigured(u"MODELTRANSLATION_CHECKSUM_ALGORITHM {0} is not available".format(CHECKSUM_ALGORITHM))
+	return _checksum_digest
+
+
 ########################################################################
 ## Computes a checksum from an unicode or str.
 def checksum(value):
-	if type(value) == str:
-		md5_value = hashlib.md5(value).hexdigest()
-	else:
-		md5_value = hashlib.md5(value.encode("utf-8")).hexdigest()
-	return md5_value
+	"""
+	Returns the checksum of value as a signed 64-bit integer, built with the first CHECKSUM_SIZE bytes of its digest.
+	"""
+	if not isinstance(value, bytes):
+		value = value.encode("utf-8")
+	return struct.unpack(">q", _get_checksum_digest()(value)[:CHECKSUM_SIZE])[0]
+
+
+########################################################################
+## Computes the MD5 checksum from an unicode or str.
+def md5_checksum(value):
+	"""
+	Returns the hex MD5 of value. It was the checksum of the translations created before source_checksum existed.
+	"""
+	if not isinstance(value, bytes):
+		value = value.encode("utf-8")
+	return hashlib.md5(value).hexdigest()
 
 ########################################################################
 ## Languages
 MODELTRANSLATION_LANG_CHOICES = settings.LANGUAGES
 
+########################################################################
+## Number of ids of translations deleted in each sentence when deleting orphan translations
+DELETE_ORPHANS_CHUNK_SIZE = getattr(settings, "MODELTRANSLATION_DELETE_ORPHANS_CHUNK_SIZE", 50000)
+
+########################################################################
+## Number of objects whose translations are updated at once
+UPDATE_TRANSLATIONS_CHUNK_SIZE = getattr(settings, "MODELTRANSLATION_UPDATE_TRANSLATIONS_CHUNK_SIZE", 500)
+
+########################################################################
+## Are new translations pre-filled with the translation of the same source text to the same language?
+TRANSLATION_MEMORY = getattr(settings, "MODELTRANSLATION_TRANSLATION_MEMORY", True)
+
+########################################################################
+## Must translations pre-filled from the translation memory be reviewed?
+TRANSLATION_MEMORY_IS_FUZZY = getattr(settings, "MODELTRANSLATION_TRANSLATION_MEMORY_IS_FUZZY", False)
+
+########################################################################
+## Number of words a translator translates in an hour (used to estimate the time saved by the translation memory)
+WORDS_PER_HOUR = getattr(settings, "MODELTRANSLATION_WORDS_PER_HOUR", 300)
+
+
+########################################################################
+## Splits an iterable in lists of chunk_size elements
+def _chunks(iterable, chunk_size):
+	iterator = iter(iterable)
+	while True:
+		chunk = list(itertools.islice(iterator, chunk_size))
+		if len(chunk) == 0:
+			return
+		yield chunk
+
+
+########################################################################
+## Deletes the rows of a table of translations whose object doesn't exist
+def _delete_orphan_rows(translation_model, module_name, model_name, existing_ids_sql, chunk_size, languages=None, start_id=None, callback=None, invalidate=False, content_type_id=None):
+	"""
+	Deletes the rows of translation_model (FieldTranslation or ObjectTranslation) of the model module_name.model_name
+	whose object_id is not returned by the subquery existing_ids_sql, with one DELETE sentence for each range of
+	chunk_size ids.
+	@param content_type_id: if not None, rows are selected by this content type instead of by module and model names
+	(FieldTranslation is indexed by content type, ObjectTranslation by names).
+	@param existing_ids_sql: tuple (sql, params) of the subquery of existing object ids. If None, all the rows of the
+	model are deleted.
+	@param languages: if not None, only rows of these languages are deleted.
+	@param start_id: if not None, only rows with a greater id are deleted (used to resume an interrupted deletion).
+	@param callback: function called after each range with the last id of the range and the number of deleted rows.
+	@param invalidate: if True, the cached translations of the objects whose rows are deleted are invalidated. Their ids
+	are selected before each DELETE sentence.
+	@return: number of deleted rows.
+	"""
+	qn = connection.ops.quote_name
+	meta = translation_model._meta
+	if content_type_id is not None:
+		model_condition = {"content_type_id": content_type_id}
+		sql = u"FROM {0} WHERE {1} = %s".format(qn(meta.db_table), qn(meta.get_field("content_type").column))
+		params = [content_type_id]
+	else:
+		model_condition = {"module": module_name, "model": model_name}
+		sql = u"FROM {0} WHERE {1} = %s AND {2} = %s".format(qn(meta.db_table), qn(meta.get_field("module").column), qn(meta.get_field("model").column))
+		params = [module_name, model_name]
+
+	if languages is not None:
+		sql += u" AND {0} IN ({1})".format(qn(meta.get_field("lang").column), u", ".join([u"%s"] * len(languages)))
+		params += list(languages)
+
+	if existing_ids_sql is not None:
+		sql += u" AND {0} NOT IN ({1})".format(qn(meta.get_field("object_id").column), existing_ids_sql[0])
+		params += list(existing_ids_sql[1])
+
+	# Ranges of ids of rows of this model
+	if chunk_size:
+		rows = translation_model.objects.filter(**model_condition)
+		if start_id is not None:
+			rows = rows.filter(id__gt=start_id)
+		id_range = rows.aggregate(min_id=models.Min("id"), max_id=models.Max("id"))
+		if id_range["min_id"] is None:
+			return 0
+		id_ranges = [(min_id, min_id + chunk_size - 1) for min_id in range(id_range["min_id"], id_range["max_id"] + 1, chunk_size)]
+		sql += u" AND {0} BETWEEN %s AND %s".format(qn(meta.pk.column))
+	else:
+		if start_id is not None:
+			sql += u" AND {0} > %s".format(qn(meta.pk.column))
+			params.append(start_id)
+		id_ranges = [()]
+
+	num_deleted_rows = 0
+	with connection.cursor() as cursor:
+		for id_range in id_ranges:
+			if invalidate:
+				cursor.execute(u"SELECT DISTINCT {0} {1}".format(qn(meta.get_field("object_id").column), sql), params + list(id_range))
+				keys = [TransCache.make_key(module_name, model_name, object_id) for (object_id,) in cursor.fetchall()]
+			cursor.execute(u"DELETE {0}".format(sql), params + list(id_range))
+			num_deleted_rows += cursor.rowcount
+			if invalidate and cursor.rowcount > 0:
+				invalidate_cached_translations(keys)
+			if callback and id_range:
+				callback(id_range[1], cursor.rowcount)
+	return num_deleted_rows
+
+
+########################################################################
+## Notifies that translations of several objects have been written without sending signals
+def _translations_changed(keys):
+	"""
+	Invalidates the cached translations of the objects and notifies the storage backend (see backends.py).
+	It must be called after bulk operations, because they don't send signals.
+	@param keys: keys of the objects, tuples (module, model, object_id).
+	"""
+	keys = list(keys)
+	if len(keys) == 0:
+		return
+	invalidate_cached_translations(keys)
+	from modeltranslation.backends import get_backend
+	get_backend().translations_changed(keys)
+
+
+########################################################################
+## Updates some fields of several objects of the same model
+def _bulk_update(objects, fields, batch_size=None):
+	"""
+	Updates fields of objects using QuerySet.bulk_update when available (Django >= 2.2).
+	Otherwise, it does the same as QuerySet.bulk_update: each batch of objects is updated with one UPDATE sentence that
+	sets each field with a CASE on the primary keys. Signals are not sent.
+	"""
+	if len(objects) == 0:
+		return 0
+	# Objects read with only() are instances of a deferred proxy class in Django < 1.10, whose updates select the ids of
+	# the rows before updating them
+	model = objects[0].__class__._meta.concrete_model
+	if hasattr(model.objects, "bulk_update"):
+		model.objects.bulk_update(objects, fields, batch_size=batch_size)
+		return len(objects)
+	model_fields = [model._meta.get_field(field) for field in fields]
+	max_batch_size = connection.ops.bulk_batch_size(["pk", "pk"] + model_fields, objects)
+	batch_size = min(batch_size, max_batch_size) if batch_size else max_batch_size
+	with transaction.atomic(savepoint=False):
+		for batch in _chunks(objects, max(batch_size, 1)):
+			values = {}
+			for field in model_fields:
+				when_statements = [When(pk=obj.pk, then=Value(getattr(obj, field.attname), output_field=field)) for obj in batch]
+				values[field.attname] = Case(*when_statements, output_field=field)
+			model.objects.filter(pk__in=[obj.pk for obj in batch]).update(**values)
+	return len(objects)
+
 ########################################################################################################################
 ## Gets the name of a translated attribute
 def trans_attr(attr, lang):
@@ -76,14 +293,8 @@ def trans_is_fuzzy_attr(attr,lang):
 ## Each one of the fields that is going to be translated in database
 class FieldTranslation(models.Model):
 
-	# Translatable modules (needs to be defined in settings.py)
-	_model_module_paths = settings.TRANSLATABLE_MODEL_MODULES
-
-	# Module cache, used to avoid importing several times the same module
-	_modules = {}
-
-	# Model cache that avoids importing more than once a Model
-	_models = {}
+	# ContentType id of each (module, model) pair (see get_content_type_id)
+	_content_type_ids = {}
 
 	## Name of the Python module containing the model
 	module = models.CharField(max_length=128, verbose_name=u"Module name", help_text=u"Module name that contains the model whose field is translated")
@@ -91,6 +302,10 @@ class FieldTranslation(models.Model):
 	## Name of the model whose field is translated
 	model = models.CharField(max_length=128, verbose_name=u"Model name", help_text=u"Model name whose field is translated")
 
+	## Content type of the model whose field is translated. Translations of an object are looked up by this integer key
+	## instead of by module and model names.
+	content_type = models.ForeignKey(ContentType, null=True, default=None, on_delete=models.CASCADE, related_name="+", verbose_name=u"Content type", help_text=u"Content type of the model whose field is translated")
+
 	## ID of the object whose field is translated
 	object_id = models.PositiveIntegerField(default=1, verbose_name=u"Object id", help_text=u'Object id whose field is translated')
 
@@ -103,8 +318,11 @@ class FieldTranslation(models.Model):
 	## Source text
 	source_text = models.TextField(verbose_name=u"Source text", help_text=u"Source text in default language")
 
-	## MD5 of the source text (used to test changes)
-	source_md5 = models.CharField(max_length=128, verbose_name=u"MD5 source text", help_text=u"MD5 checksum of source text")
+	## MD5 of the source text. Only kept for translations that have no source_checksum yet
+	source_md5 = models.CharField(max_length=128, blank=True, default="", verbose_name=u"MD5 source text", help_text=u"MD5 checksum of source text (legacy)")
+
+	## Checksum of the source text (used to test changes). See checksum function
+	source_checksum = models.BigIntegerField(null=True, default=None, verbose_name=u"Source text checksum", help_text=u"Checksum of source text")
 
 	## Translation of the source_text
 	translation = models.TextField(default=None, null=True, verbose_name=u"Translation", help_text=u"Translation showed to users in website when showing it in choosed language.")
@@ -112,6 +330,9 @@ class FieldTranslation(models.Model):
 	## Needs review? If True, it implies translation is not complete and will not be used.
 	is_fuzzy = models.BooleanField(default=False, verbose_name=u"¿Needs reviewing?", help_text=u"This translation needs some reviewing.")
 
+	## Was this translation copied from another translation of the same source text?
+	is_from_memory = models.BooleanField(default=False, verbose_name=u"From translation memory", help_text=u"This translation was copied from another translation of the same source text.")
+
 	## Context information that will help translators
 	context = models.TextField(default=None, null=True, verbose_name=u"Context", help_text=u"Help context that will be helpful for translators.")
 
@@ -129,9 +350,9 @@ class FieldTranslation(models.Model):
 		verbose_name = u"model object field translation"
 		verbose_name_plural = u"model object field translations"
 		index_together = [
-		    ["module", "model", "object_id", "lang", "field", "is_fuzzy"],
-		    ["lang", "is_fuzzy"],
-			["source_md5"]
+			["content_type", "object_id", "lang", "field", "is_fuzzy"],
+			["lang", "is_fuzzy"],
+			["source_checksum", "lang", "is_fuzzy"]
 		]
 
 
@@ -149,29 +370,10 @@ class FieldTranslation(models.Model):
 		return "{0}-{1}-{2}-{3}-'{4}'-'{5}'{6}".format(self.model,self.object_id,self.field,self.lang,self.source_text,self.translation,is_fuzzy_text)
 
 
-	####################################################################################################################
-	## Caching of translatable modules
-	@staticmethod
-	def _init_module_cache():
-		"""
-		Module caching, it helps with not having to import again and again same modules.
-		@return: boolean, True if module  caching has been done, False if module caching was already done.
-		"""
-
-		# While there are not loaded modules, load these ones
-		if len(FieldTranslation._modules) < len(FieldTranslation._model_module_paths):
-			for module_path in FieldTranslation._model_module_paths:
-				FieldTranslation._modules[module_path] = importlib.import_module(module_path)
-			return True
-		return False
-
-
 	####################################################################################################################
 	## Gets the Python module associated to this field translation
 	def get_python_module(self):
-		if not self.module in FieldTranslation._modules:
-			FieldTranslation._modules[self.module] = importlib.import_module(self.module)
-		return FieldTranslation._modules[self.module]
+		return sys.modules.get(self.module) or importlib.import_module(self.module)
 
 
 	####################################################################################################################
@@ -186,19 +388,48 @@ class FieldTranslation(models.Model):
 		if hasattr(self, "source_model"):
 			return self.source_model
 
-		# Getting the source model
-		module = self.get_python_module()
+		# Content types are cached by ContentType manager, so only the first translation of each model can query
+		# the database. Translations without content type are loaded by the names of their module and model.
+		source_model = None
+		if self.content_type_id is not None:
+			source_model = ContentType.objects.get_for_id(self.content_type_id).model_class()
+		if source_model is None:
+			source_model = FieldTranslation._get_source_model(self.module, self.model)
+		self.source_model = source_model
+		return self.source_model
 
-		# Test if module has inside the model we are looking for
-		if hasattr(module, self.model):
-			# Setting of source model
-			self.source_model = getattr(module, self.model)
-			# Setting of verbose name and its plural for later use
-			self.source_model.meta__verbose_name = self.source_model._meta.verbose_name
-			self.source_model.meta__verbose_name_plural = self.source_model._meta.verbose_name_plural
-			return self.source_model
-		
-		raise ValueError(u"Model {0} does not exist in module".format(self.model, self.module))
+
+	####################################################################################################################
+	## Gets the id of the content type of a model from the name of its module and its name
+	@staticmethod
+	def get_content_type_id(module_name, model_name):
+		"""
+		Returns the id of the ContentType of the model called model_name in the Python module module_name.
+		Ids are cached, so only the first call for each model can query the database.
+		"""
+		key = (module_name, model_name)
+		if not key in FieldTranslation._content_type_ids:
+			source_model = FieldTranslation._get_source_model(module_name, model_name)
+			FieldTranslation._content_type_ids[key] = ContentType.objects.get_for_model(source_model, for_concrete_model=False).id
+		return FieldTranslation._content_type_ids[key]
+
+
+	####################################################################################################################
+	## Gets the id of the content type of an object
+	@staticmethod
+	def get_object_content_type_id(obj):
+		return FieldTranslation.get_content_type_id(obj.__module__, obj.__class__.__name__)
+
+
+	####################################################################################################################
+	## Gets a model from the name of its module and its name
+	@staticmethod
+	def _get_source_model(module_name, model_name):
+		"""
+		Gets the model class called model_name in the Python module module_name from the registry of models.
+		@raise ValueError: if there is no such model.
+		"""
+		return registry.get_model(module_name, model_name)
 
 
 	####################################################################################################################
@@ -219,63 +450,338 @@ class FieldTranslation(models.Model):
 	####################################################################################################################
 	## Delete orphan translations (translations that have no parent object)
 	@staticmethod
-	def delete_orphan_translations(condition=None):
+	def delete_orphan_translations(condition=None, chunk_size=DELETE_ORPHANS_CHUNK_SIZE, model_keys=None, languages=None, start_ids=None, callback=None):
 		"""
-		Delete orphan translations.
-		This method needs refactoring to be improve its performance.
+		Delete orphan translations (translations whose object does not exist or does not fulfill condition).
+		For each model, orphan translations are deleted with one DELETE sentence that excludes the ids of the existing
+		objects. If chunk_size is not None, each sentence only deletes translations in a range of chunk_size ids, so
+		very big tables are not locked for a long time.
+		Translations of models that do not exist anymore are deleted too.
+		This method doesn't take any lock. Maintenance code must run it through jobs.delete_orphan_translations.
+		@param condition: dict with the filter the objects of each model must fulfill to keep their translations.
+		@param chunk_size: size of the ranges of FieldTranslation ids deleted in each sentence.
+		@param model_keys: list of pairs (module, model). If not None, only translations of these models are deleted.
+		@param languages: list of language codes. If not None, only translations of these languages are deleted.
+		@param start_ids: dict {(module, model): id}. Only translations with a greater id are deleted in these models.
+		@param callback: function called after each range of ids with the pair (module, model), the last id of the range
+		and the number of deleted translations.
+		@return: dict with the number of deleted translations of each model: {(module, model): number}.
 		"""
 		if condition is None:
 			condition = {}
-		# TODO: optimize using one SQL sentence
-		translations = FieldTranslation.objects.all()
-		for translation in translations:
-			translation._load_source_model()
-			condition["id"] = translation.object_id
-			if not translation.source_model.objects.filter(**condition).exists():
-				translation.delete()
+		if start_ids is None:
+			start_ids = {}
+
+		num_deleted_translations = {}
+		for content_type_id, module_name, model_name in FieldTranslation._get_translated_model_keys():
+			model_key = (module_name, model_name)
+			if model_keys is not None and not model_key in model_keys:
+				continue
+
+			# Ids of the objects whose translations are kept
+			try:
+				source_model = FieldTranslation._get_source_model(module_name, model_name)
+				existing_ids_sql = source_model.objects.filter(**condition).order_by().values("pk").query.sql_with_params()
+			# Model does not exist or no object fulfills the condition, all translations of this model are deleted
+			except (ValueError, EmptyResultSet):
+				existing_ids_sql = None
+
+			model_callback = None
+			if callback:
+				model_callback = lambda last_id, num_deleted, model_key=model_key: callback(model_key, last_id, num_deleted)
+			# Objects that don't fulfill the condition are not orphans and deleted ids can be reused, so the cached
+			# translations of the objects are invalidated in all the processes
+			num_deleted_translations[model_key] = num_deleted_translations.get(model_key, 0) + _delete_orphan_rows(
+				FieldTranslation, module_name, model_name, existing_ids_sql, chunk_size,
+				languages=languages, start_id=start_ids.get(model_key), callback=model_callback,
+				invalidate=translation_cache_is_enabled() or RequestTransCache.is_active(), content_type_id=content_type_id
+			)
+			# Denormalized copies of the translations (see backends.py)
+			_delete_orphan_rows(ObjectTranslation, module_name, model_name, existing_ids_sql, chunk_size, languages=languages)
+
+		return num_deleted_translations
+
+
+	####################################################################################################################
+	## Models that have translations
+	@staticmethod
+	def _get_translated_model_keys():
+		"""
+		Returns a list of tuples (content type id, module, model) with the models that have translations.
+		Content types are the first column of the index of FieldTranslation. Translations without content type (their
+		model could not be resolved, see migration 0011) are grouped by their module and model names.
+		"""
+		model_keys = []
+		content_type_ids = FieldTranslation.objects.order_by("content_type").values_list("content_type_id", flat=True).distinct()
+		for content_type_id in list(content_type_ids):
+			if content_type_id is None:
+				names = FieldTranslation.objects.filter(content_type__isnull=True).order_by("module", "model").values_list("module", "model").distinct()
+				model_keys += [(None, module_name, model_name) for module_name, model_name in names]
+			else:
+				module_name, model_name = FieldTranslation.objects.filter(content_type_id=content_type_id).values_list("module", "model")[0]
+				model_keys.append((content_type_id, module_name, model_name))
+		return model_keys
+
+
+	####################################################################################################################
+	## Gets the translatable models of the translatable modules
+	@staticmethod
+	def _get_translatable_models():
+		"""
+		Returns the list of non-abstract models with translatable fields (see registry.py).
+		"""
+		return registry.get_translatable_models()
+
+
+	####################################################################################################################
+	## Gets the translatable fields of each translatable model
+	@staticmethod
+	def _get_translatable_fields_by_model():
+		"""
+		Returns a dict {(module, model): frozenset of translatable fields} with all the translatable models.
+		It is computed only once.
+		"""
+		return registry.get_translatable_fields_by_model()
+
+
+	####################################################################################################################
+	## Filter of the translations of the translatable fields
+	@staticmethod
+	def _active_translations_condition():
+		"""
+		Returns a Q object that only matches translations of current translatable fields of translatable models.
+		"""
+		condition = models.Q(pk__in=[])
+		for (module_name, model_name), fields in FieldTranslation._get_translatable_fields_by_model().items():
+			content_type_id = FieldTranslation.get_content_type_id(module_name, model_name)
+			condition |= models.Q(content_type_id=content_type_id, field__in=list(fields))
+		return condition
+
+
+	####################################################################################################################
+	## Active translations: translations of current translatable fields of translatable models
+	@staticmethod
+	def active_translations():
+		"""
+		Returns a queryset with the translations of current translatable fields of translatable models.
+		Stale translations (of fields that are not translatable anymore) are excluded in SQL.
+		"""
+		return FieldTranslation.objects.filter(FieldTranslation._active_translations_condition())
+
+
+	####################################################################################################################
+	## Delete stale translations (translations of fields that are not translatable anymore)
+	@staticmethod
+	def delete_stale_translations():
+		"""
+		Deletes the translations of the fields that are not translatable anymore and of the models that are not
+		translatable anymore. This is a maintenance task, it should not be called when reading translations.
+		@return: number of deleted translations.
+		"""
+		stale_translations = FieldTranslation.objects.exclude(FieldTranslation._active_translations_condition())
+		num_deleted_translations, _ = stale_translations.delete()
+		return num_deleted_translations
 
 
 	####################################################################################################################
 	## Creates new entries in FieldTranslations table based on new objects not yet inserted
 	@staticmethod
-	def update_translations(condition=None):
+	def update_translations(condition=None, chunk_size=UPDATE_TRANSLATIONS_CHUNK_SIZE):
 		"""
 		Updates FieldTranslations table
+		@return: number of created or updated translations.
+		"""
+		num_translations_by_model = FieldTranslation.update_translations_by_model(condition=condition, chunk_size=chunk_size)
+		return sum(num["created"] + num["updated"] for num in num_translations_by_model.values())
+
+
+	####################################################################################################################
+	## Creates new entries in FieldTranslations table and updates the entries whose source text has changed
+	@staticmethod
+	def update_translations_by_model(condition=None, chunk_size=UPDATE_TRANSLATIONS_CHUNK_SIZE, model_keys=None, languages=None, start_pks=None, callback=None):
+		"""
+		Updates FieldTranslations table in bulk.
+		Objects of each translatable model are read in chunks of chunk_size objects. For each chunk, existing
+		translations are loaded in one query, missing translations are created with bulk_create and translations whose
+		source text has changed are updated in bulk.
+		@param condition: dict with the filter of the objects whose translations are updated.
+		@param chunk_size: number of objects processed at once.
+		@param model_keys: list of pairs (module, model). If not None, only translations of these models are updated.
+		@param languages: list of language codes. If None, translations of all languages but the default one are updated.
+		@param start_pks: dict {(module, model): pk}. Only objects with a greater primary key are processed in these
+		models (used to resume an interrupted update).
+		@param callback: function called after each chunk with the pair (module, model), the primary key of the last
+		object of the chunk and a dict with the numbers of translations of the chunk.
+		@return: dict {(module, model): {"created": number, "updated": number, "reused": number}}. "reused" is the number
+		of created translations that were pre-filled from the translation memory.
 		"""
 		if condition is None:
 			condition = {}
+		if start_pks is None:
+			start_pks = {}
+
+		# Current languages
+		if languages is None:
+			languages = [lang[0] for lang in MODELTRANSLATION_LANG_CHOICES if lang[0] != settings.LANGUAGE_CODE]
+
+		num_translations_by_model = {}
+		for cls in FieldTranslation._get_translatable_models():
+			model_key = (cls.__module__, cls.__name__)
+			if model_keys is not None and not model_key in model_keys:
+				continue
+			num_translations_by_model[model_key] = {"created": 0, "updated": 0, "reused": 0}
+			translatable_fields = list(cls._meta.translatable_fields)
+			objects = cls.objects.filter(**condition)
+			if start_pks.get(model_key) is not None:
+				objects = objects.filter(pk__gt=start_pks[model_key])
+			objects = objects.order_by("pk").values_list("pk", *translatable_fields).iterator()
+			for chunk in _chunks(objects, chunk_size):
+				num_created, num_updated, num_reused = FieldTranslation._update_chunk_translations(cls, translatable_fields, languages, chunk)
+				num_translations_by_model[model_key]["created"] += num_created
+				num_translations_by_model[model_key]["updated"] += num_updated
+				num_translations_by_model[model_key]["reused"] += num_reused
+				if callback:
+					callback(model_key, chunk[-1][0], {"created": num_created, "updated": num_updated, "reused": num_reused})
+
+		return num_translations_by_model
 
-		# Number of updated translations
-		num_translations = 0
-		
-		# Module caching
-		FieldTranslation._init_module_cache()
 
-		# Current languages dict
-		LANGUAGES = dict(lang for lang in MODELTRANSLATION_LANG_CHOICES)
-		if settings.LANGUAGE_CODE in LANGUAGES:
-			del LANGUAGES[settings.LANGUAGE_CODE]
+	####################################################################################################################
+	## Creates and updates the translations of a chunk of objects of a model
+	@staticmethod
+	def _update_chunk_translations(cls, translatable_fields, languages, chunk):
+		"""
+		Creates the missing translations of a chunk of objects and updates the ones whose source text has changed.
+		@param chunk: list of tuples (object_id, value of field 1, value of field 2, ...) in the same order as
+		translatable_fields.
+		@return: tuple (number of created translations, number of updated translations, number of created translations
+		pre-filled from the translation memory).
+		"""
+		module_name = cls.__module__
+		model_name = cls.__name__
+		content_type_id = FieldTranslation.get_content_type_id(module_name, model_name)
+
+		# Existing translations of the objects of the chunk
+		object_ids = [row[0] for row in chunk]
+		existing_translations = FieldTranslation.objects.filter(content_type_id=content_type_id, object_id__in=object_ids)\
+			.only("id", "object_id", "field", "lang", "source_md5", "source_checksum", "translation", "is_fuzzy")
+		existing_translations = dict(((trans.object_id, trans.field, trans.lang), trans) for trans in existing_translations)
 
-		# For each module, we are going to update the translations
-		for key in FieldTranslation._modules.keys():
-			module = FieldTranslation._modules[key]
+		now_datetime = timezone.now()
+		creator_user_id = FieldTranslation._get_creator_user_id()
+		new_translations = []
+		changed_translations = []
+		checksum_translations = []
+		changed_object_ids = set()
+		for row in chunk:
+			object_id = row[0]
+			for field, source_text in zip(translatable_fields, row[1:]):
+				# Translations are only created when attribute is a string
+				if source_text is None:
+					continue
+				# Checksum is computed once for all the languages
+				source_checksum = checksum(source_text)
+				for lang in languages:
+					trans = existing_translations.get((object_id, field, lang))
+					if trans is None:
+						new_translations.append(FieldTranslation(
+							module=module_name, model=model_name, content_type_id=content_type_id, object_id=object_id, field=field, lang=lang,
+							source_text=source_text, source_checksum=source_checksum, translation="", is_fuzzy=True, context="",
+							creation_datetime=now_datetime, last_update_datetime=now_datetime, creator_user_id=creator_user_id
+						))
+						changed_object_ids.add(object_id)
+					elif not trans._has_source_checksum(source_checksum, source_text):
+						trans.source_text = source_text
+						trans.source_md5 = ""
+						trans.source_checksum = source_checksum
+						# We don't want to show empty translations in our website
+						if trans.translation == "":
+							trans.is_fuzzy = True
+						trans.last_update_datetime = now_datetime
+						trans.creator_user_id = creator_user_id
+						changed_translations.append(trans)
+						changed_object_ids.add(object_id)
+					# Source text has not changed but its checksum is still the legacy MD5
+					elif trans.source_checksum is None:
+						trans.source_md5 = ""
+						trans.source_checksum = source_checksum
+						checksum_translations.append(trans)
+
+		num_reused = FieldTranslation._fill_from_translation_memory(new_translations)
+		if len(new_translations) > 0:
+			FieldTranslation.objects.bulk_create(new_translations, batch_size=UPDATE_TRANSLATIONS_CHUNK_SIZE)
+		if len(changed_translations) > 0:
+			_bulk_update(changed_translations, ["source_text", "source_md5", "source_checksum", "is_fuzzy", "last_update_datetime", "creator_user"])
+		if len(checksum_translations) > 0:
+			_bulk_update(checksum_translations, ["source_md5", "source_checksum"])
+
+		# Bulk operations don't send signals
+		_translations_changed([TransCache.make_key(module_name, model_name, object_id) for object_id in changed_object_ids])
+
+		return len(new_translations), len(changed_translations), num_reused
 
-			# Class of the module
-			clsmembers = inspect.getmembers(sys.modules[key], inspect.isclass)
-			for cls in clsmembers:
-				cls = cls[1]
 
-				# If the model has in Meta "translatable_fields", we insert this fields
-				if hasattr(cls,"_meta") and not cls._meta.abstract and hasattr(cls._meta,"translatable_fields") and len(cls._meta.translatable_fields)>0:
-					objects = cls.objects.filter(**condition)
-					
-					# For each object, language and field are updated
-					for obj in objects:
-						for lang in LANGUAGES.keys():
-							for field in cls._meta.translatable_fields:
-								if FieldTranslation.update(obj=obj, field=field, lang=lang, context=""):
-									num_translations += 1
-		return num_translations
+	####################################################################################################################
+	## Pre-fills new translations with existing translations of the same source text
+	@staticmethod
+	def _fill_from_translation_memory(translations):
+		"""
+		Translation memory: each empty new translation gets the last non-fuzzy translation of the same source text to
+		the same language, if there is one. Translations are looked up by (source_checksum, lang) with two queries for
+		all the translations.
+		@param translations: list of new FieldTranslation objects (not saved).
+		@return: number of pre-filled translations.
+		"""
+		if not TRANSLATION_MEMORY:
+			return 0
+		empty_translations = [trans for trans in translations if not trans.translation]
+		if len(empty_translations) == 0:
+			return 0
+
+		# Last translation of each source text and language
+		memory_translations = FieldTranslation.objects\
+			.filter(source_checksum__in=list(set(trans.source_checksum for trans in empty_translations)),
+			        lang__in=list(set(trans.lang for trans in empty_translations)), is_fuzzy=False)\
+			.exclude(translation__isnull=True).exclude(translation="")\
+			.order_by().values("source_checksum", "lang").annotate(last_id=models.Max("id"))
+		memory_ids = [memory_translation["last_id"] for memory_translation in memory_translations]
+		if len(memory_ids) == 0:
+			return 0
+		memory_translations = FieldTranslation.objects.filter(id__in=memory_ids).only("source_checksum", "lang", "source_text", "translation")
+		memory = dict(((trans.source_checksum, trans.lang), trans) for trans in memory_translations)
+
+		num_reused = 0
+		for trans in empty_translations:
+			memory_trans = memory.get((trans.source_checksum, trans.lang))
+			# Source texts are compared to discard checksum collisions
+			if memory_trans is None or memory_trans.source_text != trans.source_text:
+				continue
+			trans.translation = memory_trans.translation
+			trans.is_fuzzy = TRANSLATION_MEMORY_IS_FUZZY
+			trans.is_from_memory = True
+			num_reused += 1
+		return num_reused
+
+
+	####################################################################################################################
+	## Time saved by the translation memory
+	@staticmethod
+	def translation_memory_report(words_per_hour=WORDS_PER_HOUR):
+		"""
+		Counts the translations that were pre-filled from the translation memory and estimates the translator hours
+		they saved from the number of words of their source texts.
+		@param words_per_hour: number of words a translator translates in an hour.
+		@return: dict {lang: {"translations": number, "words": number, "hours": number}}.
+		"""
+		report = {}
+		reused_translations = FieldTranslation.objects.filter(is_from_memory=True).values_list("lang", "source_text").iterator()
+		for lang, source_text in reused_translations:
+			lang_report = report.setdefault(lang, {"translations": 0, "words": 0, "hours": 0.0})
+			lang_report["translations"] += 1
+			lang_report["words"] += len(source_text.split())
+		for lang_report in report.values():
+			lang_report["hours"] = lang_report["words"] / float(words_per_hour)
+		return report
 
 
 	####################################################################################################################
@@ -310,7 +816,7 @@ class FieldTranslation(models.Model):
 	####################################################################################################################
 	## Constructs a new FieldTranslation object
 	@staticmethod
-	def factory(obj, field, source_text, lang, context=""):
+	def factory(obj, field, source_text, lang, context="", source_checksum=None):
 		"""
 		Static method that constructs a translation based on its contents.
 		"""
@@ -321,8 +827,9 @@ class FieldTranslation(models.Model):
 		# Module name
 		obj_module = obj.__module__
 		
-		# Computation of MD5 of the source text
-		source_md5 = checksum(source_text)
+		# Computation of the checksum of the source text
+		if source_checksum is None:
+			source_checksum = checksum(source_text)
 
 		# Translated text
 		translation = ""
@@ -341,8 +848,8 @@ class FieldTranslation(models.Model):
 			is_fuzzy = getattr(obj,is_fuzzy_lang)
 
 		# Construction of the translation
-		trans = FieldTranslation(module=obj_module, model=obj_classname, object_id=obj.id,
-		                         field=field, lang=lang, source_text=source_text, source_md5=source_md5,
+		trans = FieldTranslation(module=obj_module, model=obj_classname, content_type_id=FieldTranslation.get_content_type_id(obj_module, obj_classname), object_id=obj.id,
+		                         field=field, lang=lang, source_text=source_text, source_checksum=source_checksum,
 		                         translation=translation, is_fuzzy=is_fuzzy, context=context)
 		return trans
 
@@ -350,29 +857,47 @@ class FieldTranslation(models.Model):
 	####################################################################################################################
 	## Updates this translation
 	def _update(self, obj, field, source_text, context=""):
+		# Only new or changed translations are saved
+		if self._set_from_object(obj=obj, field=field, source_text=source_text, context=context) or not self.id:
+			self.save()
+		return self
+
+
+	####################################################################################################################
+	## Sets the attributes of this translation from the source object
+	def _set_from_object(self, obj, field, source_text, source_checksum=None, context=""):
+		"""
+		Updates the attributes of this translation from the source text and from the dynamic attributes
+		<field>_<lang> and <field>_<lang>_is_fuzzy of the source object, without saving it.
+		@param source_checksum: checksum of source_text. It is computed if not given.
+		@return: True if any of the attributes of the translation has changed.
+		"""
+		old_values = (self.source_md5, self.source_checksum, self.translation, self.is_fuzzy, self.context)
+
 		#### Update 1: "is_fuzzy" update
 		# is_fuzzy field
 		lang = self.lang
-		is_fuzzy = False
 		is_fuzzy_lang = trans_is_fuzzy_attr(field,lang)
 		# If source object has is_fuzzy_lang attribute for this field, we get it
 		if hasattr(obj, is_fuzzy_lang):
-			is_fuzzy = getattr(obj, is_fuzzy_lang)
-			self.is_fuzzy = is_fuzzy
+			self.is_fuzzy = getattr(obj, is_fuzzy_lang)
 
 		#### Update 2: Update object
-		# Source text and source MD5
+		# Source text and its checksum (legacy MD5 is removed)
 		self.source_text = source_text
-		self.source_md5 = checksum(source_text)
+		self.source_md5 = ""
+		self.source_checksum = source_checksum if source_checksum is not None else checksum(source_text)
 
 		# Translated text
 		# Maybe source object has the translated text. In that case, we get it
 		field_lang = trans_attr(field,lang)
 		if hasattr(obj,field_lang):
 			translation = getattr(obj, field_lang)
-			# Is the translation different? In that case, changes the context
+			# Is the translation different? In that case, changes the context and it is not a copy from the
+			# translation memory anymore
 			if self.translation != translation:
 				self.context = context
+				self.is_from_memory = False
 			# Translation is alway updated
 			self.translation = translation
 
@@ -380,22 +905,91 @@ class FieldTranslation(models.Model):
 		# We don't want to show empty translations in our website
 		if self.translation == "":
 			self.is_fuzzy = True
-		
-		self.save()
-		return self
+
+		return old_values != (self.source_md5, self.source_checksum, self.translation, self.is_fuzzy, self.context)
+
+
+	####################################################################################################################
+	## Is the source text of this translation the one with this checksum?
+	def _has_source_checksum(self, source_checksum, source_text):
+		"""
+		Compares the checksum of the source text of this translation with source_checksum. Translations created before
+		source_checksum existed are compared by the MD5 of source_text, so they are not taken as changed.
+		"""
+		if self.source_checksum is not None:
+			return self.source_checksum == source_checksum
+		return self.source_md5 == md5_checksum(source_text)
+
+
+	####################################################################################################################
+	## Creates and updates all the translations of an object
+	@staticmethod
+	def update_object_translations(obj, languages, context=""):
+		"""
+		Updates all the translations of an object with only one query to get its existing translations. Only new and
+		changed translations are written, with one bulk_create and one bulk update.
+		@param obj: object with translatable fields.
+		@param languages: language codes of the translations.
+		@return: dict with all the translations of the object in database {(field, lang): (translation, is_fuzzy)}.
+		"""
+		obj_module = obj.__module__
+		obj_classname = obj.__class__.__name__
+		existing_translations = FieldTranslation.objects.filter(content_type_id=FieldTranslation.get_content_type_id(obj_module, obj_classname), object_id=obj.id)
+		existing_translations = dict(((trans.field, trans.lang), trans) for trans in existing_translations)
+
+		new_translations = []
+		changed_translations = []
+		for field in obj._meta.translatable_fields:
+			source_text = getattr(obj, field)
+			# Updates translation only when attribute is a string
+			if source_text is None:
+				continue
+			# Checksum is computed once for all the languages
+			source_checksum = checksum(source_text)
+			setattr(obj, u"md5"+field, source_checksum)
+			for lang in languages:
+				trans = existing_translations.get((field, lang))
+				if trans is None:
+					trans = FieldTranslation.factory(obj=obj, field=field, source_text=source_text, lang=lang, context=context, source_checksum=source_checksum)
+					trans._set_from_object(obj=obj, field=field, source_text=source_text, source_checksum=source_checksum, context=context)
+					new_translations.append(trans)
+					existing_translations[(field, lang)] = trans
+				elif trans._set_from_object(obj=obj, field=field, source_text=source_text, source_checksum=source_checksum, context=context):
+					changed_translations.append(trans)
+
+		FieldTranslation._fill_from_translation_memory(new_translations)
+
+		now_datetime = timezone.now()
+		creator_user_id = FieldTranslation._get_creator_user_id()
+		for trans in new_translations:
+			trans.creation_datetime = now_datetime
+		for trans in new_translations + changed_translations:
+			trans.last_update_datetime = now_datetime
+			trans.creator_user_id = creator_user_id
+
+		if len(new_translations) > 0:
+			FieldTranslation.objects.bulk_create(new_translations)
+		if len(changed_translations) > 0:
+			_bulk_update(changed_translations, ["source_text", "source_md5", "source_checksum", "translation", "is_fuzzy", "is_from_memory", "context", "last_update_datetime", "creator_user"])
+
+		return dict((key, (trans.translation, trans.is_fuzzy)) for key, trans in existing_translations.items())
 
 
 	####################################################################################################################
 	## Updates a translation
 	@staticmethod
+	@metrics.timed("modeltranslation_field_translation_update_seconds")
 	def update(obj, field, lang, context=""):
+		# The translations loaded in obj are read again in its next lookup (see translation._translations_are_loaded)
+		obj.__dict__.pop("_loaded_translations", None)
 		try:
 			# Class name
 			obj_classname = obj.__class__.__name__
 			# Module name
 			obj_module = obj.__module__
 			# Updating of the translation
-			trans = FieldTranslation.objects.get(module=obj_module, model=obj_classname, object_id=obj.id, field=field, lang=lang)
+			content_type_id = FieldTranslation.get_content_type_id(obj_module, obj_classname)
+			trans = FieldTranslation.objects.get(content_type_id=content_type_id, object_id=obj.id, field=field, lang=lang)
 			return trans._update(obj=obj, field=field, source_text=getattr(obj,field), context=context)
 
 		# In case the translation does not exist, create a new one
@@ -426,15 +1020,186 @@ class FieldTranslation(models.Model):
 		self.last_update_datetime = now_datetime
 		
 		# Current user is creator
-		# (get current user with django-cuser middleware)
 		self.creator_user = None
-		current_user = CuserMiddleware.get_user()
-		if not current_user is None and not current_user.is_anonymous():
-			self.creator_user_id = current_user.id
-		
+		self.creator_user_id = FieldTranslation._get_creator_user_id()
+
+		# A translation edited by a translator is not a copy from the translation memory anymore
+		if self.is_from_memory and self.id and self.translation != getattr(self, "_loaded_translation", self.translation):
+			self.is_from_memory = False
+			if kwargs.get("update_fields") is not None:
+				kwargs["update_fields"] = list(kwargs["update_fields"]) + ["is_from_memory"]
+
 		# Parent constructor call
 		super(FieldTranslation, self).save(*args, **kwargs)
+		self._loaded_translation = self.translation
+
+
+	####################################################################################################################
+	## Creates a FieldTranslation object from a database row
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		"""
+		Keeps the translation loaded from database to know in save if it has been edited.
+		"""
+		instance = super(FieldTranslation, cls).from_db(db, field_names, values)
+		instance._loaded_translation = instance.__dict__.get("translation")
+		return instance
+
+
+	####################################################################################################################
+	## Gets the id of the current user
+	@staticmethod
+	def _get_creator_user_id():
+		"""
+		Returns the id of the current user (get current user with django-cuser middleware) or None if it is anonymous.
+		"""
+		current_user = CuserMiddleware.get_user()
+		if not current_user is None and not current_user.is_anonymous():
+			return current_user.id
+		return None
+
+
+########################################################################
+## All the translations of an object to a language in only one row
+class ObjectTranslation(models.Model):
+	"""
+	Denormalized copy of the FieldTranslation objects of an object in a language.
+	It is only used by ObjectTranslationBackend (see backends.py), that reads all the translations of an object with
+	one lookup by primary key instead of scanning one row for each field.
+	"""
+
+	## Name of the Python module containing the model
+	module = models.CharField(max_length=128, verbose_name=u"Module name", help_text=u"Module name that contains the model whose fields are translated")
+
+	## Name of the model whose fields are translated
+	model = models.CharField(max_length=128, verbose_name=u"Model name", help_text=u"Model name whose fields are translated")
+
+	## ID of the object whose fields are translated
+	object_id = models.PositiveIntegerField(default=1, verbose_name=u"Object id", help_text=u'Object id whose fields are translated')
+
+	## Language used in the translations
+	lang = models.CharField(max_length=16, choices=MODELTRANSLATION_LANG_CHOICES, verbose_name=u"Language Id", help_text=u'Language ISO code of these translations')
+
+	## Translations of the fields in JSON: {"<field>": ["<translation>", <is_fuzzy>], ...}
+	translations = models.TextField(default="{}", verbose_name=u"Translations", help_text=u"Translation and is_fuzzy flag of each field in JSON")
+
+	## Last update date and time of the translations
+	last_update_datetime = models.DateTimeField(verbose_name=u"Last update date and time of these translations")
+
+	## Metainformation of ObjectTranslation
+	class Meta:
+		verbose_name = u"model object translation"
+		verbose_name_plural = u"model object translations"
+		unique_together = [
+			["module", "model", "object_id", "lang"]
+		]
+
+
+	####################################################################################################################
+	## Conversion of an object ObjectTranslation to str
+	def __str__(self):
+		return "{0}-{1}-{2}-{3}".format(self.module, self.model, self.object_id, self.lang)
+
+
+	####################################################################################################################
+	## Translations of this object as a dict {(field, lang): (translation, is_fuzzy)}
+	def get_translations_dict(self):
+		translations = json.loads(self.translations)
+		return dict(((field, self.lang), (values[0], values[1])) for field, values in translations.items())
+
+
+	####################################################################################################################
+	## Sets the translations of this object from a dict {field: (translation, is_fuzzy)}
+	def set_translations_dict(self, translations):
+		self.translations = json.dumps(dict((field, [values[0], values[1]]) for field, values in translations.items()), sort_keys=True)
+
+
+########################################################################
+## Maintenance job of the translations
+class TranslationJob(models.Model):
+	"""
+	State of a maintenance job (see jobs.py). Its row is the lock that prevents two runs of the same job from
+	overlapping, the queue where the administration enqueues runs and the store of the checkpoint of the last
+	interrupted run.
+	"""
+
+	## Status of a job that is not running
+	IDLE = "idle"
+
+	## Status of a job that has been enqueued and must be run
+	PENDING = "pending"
+
+	## Status of a job that is running
+	RUNNING = "running"
+
+	STATUS_CHOICES = (
+		(IDLE, u"Idle"),
+		(PENDING, u"Pending"),
+		(RUNNING, u"Running"),
+	)
+
+	## Name of the job
+	name = models.CharField(max_length=64, unique=True, verbose_name=u"Name", help_text=u"Name of the job")
+
+	## Status of the job
+	status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=IDLE, verbose_name=u"Status", help_text=u"Status of the job")
+
+	## Options of the enqueued run in JSON
+	options = models.TextField(default="{}", verbose_name=u"Options", help_text=u"Options of the enqueued run in JSON")
+
+	## Checkpoint of the last interrupted run in JSON
+	checkpoint = models.TextField(default="{}", verbose_name=u"Checkpoint", help_text=u"Progress of the last interrupted run in JSON")
+
+	## Process that holds the lock
+	lock_owner = models.CharField(max_length=128, blank=True, default="", verbose_name=u"Lock owner", help_text=u"Host and process id of the running job")
+
+	## Last time the lock was refreshed by the running job
+	lock_datetime = models.DateTimeField(null=True, default=None, verbose_name=u"Lock date and time")
+
+	## Start of the last run
+	last_start_datetime = models.DateTimeField(null=True, default=None, verbose_name=u"Start date and time of the last run")
+
+	## End of the last complete run
+	last_end_datetime = models.DateTimeField(null=True, default=None, verbose_name=u"End date and time of the last complete run")
+
+	## Result of the last complete run in JSON
+	last_result = models.TextField(default="{}", verbose_name=u"Result of the last complete run")
+
+	## Metainformation of TranslationJob
+	class Meta:
+		verbose_name = u"translation maintenance job"
+		verbose_name_plural = u"translation maintenance jobs"
+
+
+	####################################################################################################################
+	## Conversion of an object TranslationJob to str
+	def __str__(self):
+		return "{0}-{1}".format(self.name, self.status)
+
+
+########################################################################
+## Invalidates the cached translations of the object of a FieldTranslation
+def _invalidate_cached_translations(sender, instance, **kwargs):
+	"""
+	Removes from the local translation cache the object whose translation has been saved or deleted.
+	Saved translations are written through to the shared translation cache, deleted ones are removed from it.
+	"""
+	key = TransCache.make_key(instance.module, instance.model, instance.object_id)
+	TransCache.factory().delete(key)
+	RequestTransCache.delete_many([key])
+	if kwargs.get("created") is not None:
+		SharedTransCache.factory().update(key, instance.field, instance.lang, instance.translation, instance.is_fuzzy)
+	else:
+		SharedTransCache.factory().delete(key)
+	# The storage backend can keep its own copy of the translations
+	from modeltranslation.backends import get_backend
+	get_backend().translations_changed([key])
+
+
+signals.post_save.connect(_invalidate_cached_translations, sender=FieldTranslation)
+signals.post_delete.connect(_invalidate_cached_translations, sender=FieldTranslation)
 
 
 # Admin registration of FieldTranslation model
-admin.site.register(FieldTranslation)
\ No newline at end of file
+admin.site.register(FieldTranslation)
+admin.site.register(TranslationJob)
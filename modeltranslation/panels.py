@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+from debug_toolbar.panels import Panel
+
+from modeltranslation import profiler
+
+
+########################################################################
+########################################################################
+#	django-debug-toolbar panel with the translation lookups of each request (see profiler.py).
+#	It is optional: add it to DEBUG_TOOLBAR_PANELS only if django-debug-toolbar is installed:
+#		DEBUG_TOOLBAR_PANELS = [
+#			# ...
+#			"modeltranslation.panels.TranslationLookupsPanel",
+#		]
+########################################################################
+########################################################################
+
+
+########################################################################
+## Panel of translation lookups
+class TranslationLookupsPanel(Panel):
+
+	title = u"Translations"
+	template = "modeltranslation/debug_toolbar/lookups.html"
+
+	profile = None
+
+	@property
+	def nav_subtitle(self):
+		stats = self.get_stats()
+		if not stats:
+			return u""
+		return u"{0} lookups, {1} queries".format(stats["num_lookups"], stats["num_queries"])
+
+	def enable_instrumentation(self):
+		if profiler.ENABLED:
+			self.profile = profiler.start(name=u"django-debug-toolbar")
+
+	def disable_instrumentation(self):
+		if self.profile is not None:
+			profiler.end()
+			self.profile.log_warnings()
+
+	def _record_profile(self):
+		if self.profile is None:
+			self.record_stats({"enabled": False, "num_lookups": 0, "num_queries": 0})
+		else:
+			stats = self.profile.stats()
+			stats["enabled"] = True
+			self.record_stats(stats)
+
+	# django-debug-toolbar < 2.0
+	def process_response(self, request, response):
+		self._record_profile()
+
+	# django-debug-toolbar >= 2.0
+	def generate_stats(self, request, response):
+		self._record_profile()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+
+from django.db import connections
+
+from modeltranslation.models import FieldTranslation, UPDATE_TRANSLATIONS_CHUNK_SIZE, _chunks
+from modeltranslation.transcache import TransCache
+
+
+########################################################################
+########################################################################
+#	Parallel update of translations.
+#	Objects of each translatable model are split in units of consecutive primary keys, and each unit is updated by
+#	FieldTranslation.update_translations_by_model in a process of a pool. Each process opens its own database
+#	connections, so the database must be shared by several processes (an in-memory SQLite database is not).
+#
+#	Units don't overlap, so each translation is written by only one process and the merged counts don't depend on
+#	the number of processes nor on the order the units finish.
+########################################################################
+########################################################################
+
+
+########################################################################
+## Number of chunks of objects in each unit of work
+UNIT_CHUNKS = 10
+
+
+########################################################################
+## Initializes each process of the pool
+def _init_worker():
+	import django
+	from django.apps import apps
+	# Processes that are not forked (spawn start method) must load Django
+	if not apps.ready:
+		django.setup()
+
+
+########################################################################
+## Updates the translations of a unit of work
+def _update_unit(unit):
+	"""
+	Updates the translations of the objects of a model whose primary key is in a range.
+	@param unit: tuple (module, model, first pk, last pk, condition, languages, chunk_size).
+	@return: tuple ((module, model), last pk, counts).
+	"""
+	module_name, model_name, first_pk, last_pk, condition, languages, chunk_size = unit
+	unit_condition = dict(condition, pk__gte=first_pk, pk__lte=last_pk)
+	num_translations_by_model = FieldTranslation.update_translations_by_model(
+		condition=unit_condition, chunk_size=chunk_size, model_keys=[(module_name, model_name)], languages=languages
+	)
+	return (module_name, model_name), last_pk, num_translations_by_model[(module_name, model_name)]
+
+
+########################################################################
+## Units of work of all the translatable models
+def _get_units(condition, chunk_size, model_keys, languages, start_pks, unit_size):
+	"""
+	Yields the units of work in a deterministic order: models in the order of the registry and, for each model,
+	consecutive ranges of unit_size primary keys.
+	"""
+	for cls in FieldTranslation._get_translatable_models():
+		model_key = (cls.__module__, cls.__name__)
+		if model_keys is not None and not model_key in model_keys:
+			continue
+		objects = cls.objects.filter(**condition)
+		if start_pks.get(model_key) is not None:
+			objects = objects.filter(pk__gt=start_pks[model_key])
+		pks = objects.order_by("pk").values_list("pk", flat=True).iterator()
+		for unit_pks in _chunks(pks, unit_size):
+			yield (model_key[0], model_key[1], unit_pks[0], unit_pks[-1], condition, languages, chunk_size)
+
+
+########################################################################
+## Updates the translations with a pool of processes
+def update_translations_parallel(workers, condition=None, chunk_size=UPDATE_TRANSLATIONS_CHUNK_SIZE, model_keys=None, languages=None, start_pks=None, callback=None, unit_size=None):
+	"""
+	Does the same as FieldTranslation.update_translations_by_model with a pool of workers processes.
+	@param workers: number of processes.
+	@param unit_size: number of objects of each unit of work (by default, UNIT_CHUNKS chunks).
+	@param callback: function called with the pair (module, model), the last primary key of a unit and its counts
+	after each unit. Units are notified in order, so the last primary key can be used as a checkpoint.
+	See update_translations_by_model for the other parameters.
+	@return: dict {(module, model): {"created": number, "updated": number, "reused": number}}.
+	"""
+	if condition is None:
+		condition = {}
+	if start_pks is None:
+		start_pks = {}
+	if unit_size is None:
+		unit_size = chunk_size * UNIT_CHUNKS
+
+	num_translations_by_model = {}
+	units = list(_get_units(condition, chunk_size, model_keys, languages, start_pks, unit_size))
+
+	# Connections can't be shared with the processes of the pool
+	for connection in connections.all():
+		connection.close()
+	pool = multiprocessing.Pool(processes=workers, initializer=_init_worker)
+	try:
+		for model_key, last_pk, counts in pool.imap(_update_unit, units):
+			model_counts = num_translations_by_model.setdefault(model_key, {"created": 0, "updated": 0, "reused": 0})
+			for count_name, count in counts.items():
+				model_counts[count_name] += count
+			if callback:
+				callback(model_key, last_pk, counts)
+		pool.close()
+	except:
+		pool.terminate()
+		raise
+	finally:
+		pool.join()
+
+	# Translations written by other processes are not invalidated in the local cache of this one
+	TransCache.factory().clear()
+	return num_translations_by_model
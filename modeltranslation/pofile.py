@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+
+import io
+import re
+
+from django.conf import settings
+from django.utils import timezone
+
+from modeltranslation import metrics
+from modeltranslation.models import checksum, FieldTranslation, _bulk_update, _chunks, _translations_changed
+from modeltranslation.transcache import TransCache
+
+
+########################################################################
+## Number of translations read from database in each cursor fetch
+EXPORT_CHUNK_SIZE = getattr(settings, "MODELTRANSLATION_EXPORT_CHUNK_SIZE", 2000)
+
+
+########################################################################
+## Escape sequences of PO strings
+_PO_ESCAPES = {u"\\": u"\\\\", u"\"": u"\\\"", u"\t": u"\\t", u"\r": u"\\r", u"\n": u"\\n"}
+_PO_ESCAPE_RE = re.compile(u"[\\\\\"\t\r\n]")
+
+
+########################################################################
+## Escapes a text to be included in a PO string
+def po_escape(text):
+	"""
+	Escapes backslashes, double quotes, tabs and line breaks of a text in only one pass.
+	"""
+	return _PO_ESCAPE_RE.sub(lambda match: _PO_ESCAPES[match.group(0)], text)
+
+
+########################################################################
+## Formats a PO keyword with its string
+def po_string(keyword, text):
+	"""
+	Returns the lines of a PO keyword (msgid, msgstr, msgctxt) with its text.
+	Texts with several lines are split in several strings, one for each line, as gettext does.
+	"""
+	if text is None:
+		text = u""
+
+	# Only one line
+	if u"\n" not in text[:-1]:
+		return u"{0} \"{1}\"\n".format(keyword, po_escape(text))
+
+	# Several lines
+	lines = [u"{0} \"\"\n".format(keyword)]
+	start = 0
+	while start < len(text):
+		end = text.find(u"\n", start)
+		end = len(text) if end == -1 else end + 1
+		lines.append(u"\"{0}\"\n".format(po_escape(text[start:end])))
+		start = end
+	return u"".join(lines)
+
+
+########################################################################
+## Header of the PO file
+def po_header(lang):
+	"""
+	Returns the header of the PO file of the translations to language lang.
+	"""
+	website_name = getattr(settings, "WEBSITE_NAME", u"")
+	last_translator = u""
+	last_translator_email = u""
+	if len(settings.ADMINS) > 0:
+		last_translator = settings.ADMINS[0][0]
+		last_translator_email = settings.ADMINS[0][1]
+	now = timezone.localtime(timezone.now()) if settings.USE_TZ else timezone.now()
+
+	replacements = {
+		"website_name": website_name, "last_translator": last_translator, "last_translator_email": last_translator_email,
+		"year": now.strftime("%Y"), "now": now.strftime("%Y-%m-%d %H:%M%z"), "lang": lang
+	}
+
+	return (
+		u"# Translations for {website_name}.\n"
+		u"# Copyright (C) {website_name}\n"
+		u"# This file is distributed under the same license as the PACKAGE package.\n"
+		u"# {last_translator} <{last_translator_email}>, {year}.\n"
+		u"#\n"
+		u"msgid \"\"\n"
+		u"msgstr \"\"\n"
+		u"\"Project-Id-Version: 1.0\\n\"\n"
+		u"\"Report-Msgid-Bugs-To: \\n\"\n"
+		u"\"POT-Creation-Date: {now}\\n\"\n"
+		u"\"PO-Revision-Date: {now}\\n\"\n"
+		u"\"Last-Translator: {last_translator} <{last_translator_email}>\\n\"\n"
+		u"\"Language-Team: {lang} <LL@li.org>\\n\"\n"
+		u"\"Language: {lang}\\n\"\n"
+		u"\"MIME-Version: 1.0\\n\"\n"
+		u"\"Content-Type: text/plain; charset=utf-8\\n\"\n"
+		u"\"Content-Transfer-Encoding: 8bit\\n\"\n"
+		u"\"Plural-Forms: nplurals=2; plural=n != 1;\\n\"\n"
+	).format(**replacements)
+
+
+########################################################################
+## One entry of the PO file
+def po_entry(translation):
+	"""
+	Returns the PO entry of a FieldTranslation. Its msgctxt identifies the translation when importing the PO file.
+	"""
+	if translation.context:
+		reference = u" ".join(translation.context.splitlines())
+	else:
+		reference = u"{0} {1} ({2})".format(translation.model, translation.object_id, translation.field)
+
+	entry = u"\n#: {0}\n".format(reference)
+	if translation.is_fuzzy:
+		entry += u"#, fuzzy\n"
+	msgctxt = u"{0}--{1}--{2}--{3}--{4}".format(translation.id, translation.module, translation.model, translation.object_id, translation.field)
+	entry += po_string(u"msgctxt", msgctxt)
+	entry += po_string(u"msgid", translation.source_text)
+	entry += po_string(u"msgstr", translation.translation)
+	return entry
+
+
+########################################################################
+## Generates the PO file of a language
+def generate_po(lang, chunk_size=EXPORT_CHUNK_SIZE):
+	"""
+	Generator of the PO file of the translations to language lang.
+	Translations are read with a database cursor and yielded in blocks of chunk_size entries, so memory usage does not
+	depend on the number of translations.
+	"""
+	# Time from the first to the last block
+	with metrics.timer("modeltranslation_job_seconds", job="export_po"):
+		yield po_header(lang)
+
+		translations = FieldTranslation.objects.filter(lang=lang).order_by("id")\
+			.only("id", "module", "model", "object_id", "field", "source_text", "translation", "is_fuzzy", "context")
+
+		num_translations = 0
+		entries = []
+		for translation in translations.iterator():
+			entries.append(po_entry(translation))
+			if len(entries) >= chunk_size:
+				num_translations += len(entries)
+				yield u"".join(entries)
+				entries = []
+		if len(entries) > 0:
+			num_translations += len(entries)
+			yield u"".join(entries)
+	metrics.increment("modeltranslation_job_translations_total", num_translations, job="export_po", result="exported")
+
+
+########################################################################
+## Writes the PO file of a language
+def write_po(lang, file_or_path, chunk_size=EXPORT_CHUNK_SIZE):
+	"""
+	Writes the PO file of the translations to language lang in a file.
+	@param file_or_path: path of the file or text file object opened for writing.
+	@return: number of written characters.
+	"""
+	if isinstance(file_or_path, (str, type(u""))):
+		with io.open(file_or_path, "w", encoding="utf-8") as po_file:
+			return write_po(lang, po_file, chunk_size=chunk_size)
+
+	num_chars = 0
+	for block in generate_po(lang, chunk_size=chunk_size):
+		file_or_path.write(block)
+		num_chars += len(block)
+	return num_chars
+
+
+########################################################################
+########################################################################
+## IMPORT ##
+
+
+########################################################################
+## Number of entries of the PO file applied at once
+IMPORT_CHUNK_SIZE = getattr(settings, "MODELTRANSLATION_IMPORT_CHUNK_SIZE", 1000)
+
+
+########################################################################
+## Context of the entries generated by this application: id--module--model--object_id--field.
+## Files exported by old versions have no module (id--model--object_id--field): their translations can be updated but
+## not created again.
+_MSGCTXT_RE = re.compile(r"^(?P<id>\d+)--(?:(?P<module>[\w.]+)--)?(?P<model>\w+)--(?P<object_id>\d+)--(?P<field>\w+)$")
+
+## Lines with a keyword and its string
+_KEYWORD_RE = re.compile(r"^(?P<keyword>msgctxt|msgid|msgstr)\s+\"(?P<text>.*)\"\s*$")
+
+## Continuation strings
+_STRING_RE = re.compile(r"^\"(?P<text>.*)\"\s*$")
+
+## Escape sequences in PO strings
+_PO_UNESCAPES = {u"n": u"\n", u"t": u"\t", u"r": u"\r", u"\"": u"\"", u"\\": u"\\"}
+_PO_UNESCAPE_RE = re.compile(r"\\(.)")
+
+
+########################################################################
+## Unescapes a PO string
+def po_unescape(text):
+	return _PO_UNESCAPE_RE.sub(lambda match: _PO_UNESCAPES.get(match.group(1), match.group(1)), text)
+
+
+########################################################################
+## Keywords of a PO entry in the order they appear
+_PO_KEYWORDS = ("msgctxt", "msgid", "msgstr")
+
+
+def _new_po_entry():
+	return {"msgctxt": None, "msgid": None, "msgstr": None, "is_fuzzy": False}
+
+
+########################################################################
+## Parses the entries of a PO file
+def parse_po(lines):
+	"""
+	Generator of the entries of a PO file. It reads the lines of the file one by one, so the file is not loaded in
+	memory.
+	@param lines: iterable of lines (bytes in UTF-8 or text), for example an opened file or an UploadedFile.
+	@return: generator of dicts with keys "msgctxt", "msgid", "msgstr" (None if they are not present) and "is_fuzzy".
+	"""
+	entry = None
+	keyword = None
+	for line in lines:
+		if isinstance(line, bytes):
+			line = line.decode("utf-8")
+		line = line.strip()
+
+		# An entry ends with the strings of its msgstr: the next empty line or comment closes it
+		if (line == u"" or line.startswith(u"#")) and entry is not None and entry["msgstr"] is not None:
+			yield entry
+			entry = None
+			keyword = None
+
+		# Flags of the entry
+		if line.startswith(u"#,"):
+			if entry is None:
+				entry = _new_po_entry()
+			entry["is_fuzzy"] = u"fuzzy" in [flag.strip() for flag in line[2:].split(u",")]
+			continue
+
+		# Empty lines and comments
+		if line == u"" or line.startswith(u"#"):
+			continue
+
+		# Keyword (msgctxt, msgid, msgstr)
+		result = _KEYWORD_RE.match(line)
+		if result:
+			keyword = result.group("keyword")
+			# A new entry starts with a keyword that can't follow the ones already read (msgctxt comes before msgid and
+			# msgid before msgstr)
+			if entry is not None and any(entry[previous] is not None for previous in _PO_KEYWORDS[_PO_KEYWORDS.index(keyword):]):
+				yield entry
+				entry = None
+			if entry is None:
+				entry = _new_po_entry()
+			entry[keyword] = po_unescape(result.group("text"))
+			continue
+
+		# Continuation of the string of the last keyword
+		result = _STRING_RE.match(line)
+		if result and entry is not None and keyword is not None:
+			entry[keyword] += po_unescape(result.group("text"))
+
+	if entry is not None:
+		yield entry
+
+
+########################################################################
+## Imports a PO file generated by this application
+@metrics.timed("modeltranslation_job_seconds", job="import_po")
+def import_po(lines, lang, chunk_size=IMPORT_CHUNK_SIZE):
+	"""
+	Imports the translations of a PO file to language lang. Please take note that this PO file MUST be generated with
+	this application because msgctxt of each entry is used as translation id.
+	Entries are parsed while the file is read and applied in chunks of chunk_size entries: existing translations are
+	read with one query for each chunk and written in bulk. Translations whose text and fuzzy flag are unchanged are
+	not written.
+	@param lines: iterable of lines of the PO file, for example an opened file or an UploadedFile.
+	@return: dict with the number of "created", "updated", "unchanged" and "skipped" entries.
+	"""
+	num_entries = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+	# Ids of the translations already imported
+	imported_ids = set()
+	for chunk in _chunks(parse_po(lines), chunk_size):
+		chunk_num_entries = _import_po_chunk(chunk, lang, imported_ids)
+		for key, value in chunk_num_entries.items():
+			num_entries[key] += value
+	for key, value in num_entries.items():
+		metrics.increment("modeltranslation_job_translations_total", value, job="import_po", result=key)
+	return num_entries
+
+
+########################################################################
+## Imports some entries of a PO file
+def _import_po_chunk(entries, lang, imported_ids):
+	num_entries = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+
+	# Entries generated by this application, by translation id
+	entries_by_id = {}
+	for entry in entries:
+		# Header of the file
+		if entry["msgctxt"] is None and entry["msgid"] == u"":
+			continue
+		result = _MSGCTXT_RE.match(entry["msgctxt"] or u"")
+		if result is None or entry["msgstr"] is None:
+			num_entries["skipped"] += 1
+			continue
+		entry["match"] = result
+		translation_id = int(result.group("id"))
+		# Only the first entry of each translation is imported
+		if translation_id in imported_ids:
+			num_entries["skipped"] += 1
+			continue
+		imported_ids.add(translation_id)
+		entries_by_id[translation_id] = entry
+
+	existing_translations = FieldTranslation.objects.only("id", "module", "model", "object_id", "lang", "translation", "is_fuzzy", "is_from_memory")\
+		.in_bulk(list(entries_by_id.keys()))
+
+	now_datetime = timezone.now()
+	creator_user_id = FieldTranslation._get_creator_user_id()
+	new_translations = []
+	changed_translations = []
+	for translation_id, entry in entries_by_id.items():
+		field_trans = existing_translations.get(translation_id)
+
+		# Translation from another language
+		if field_trans is not None and field_trans.lang != lang:
+			num_entries["skipped"] += 1
+			continue
+
+		# Translation does not exist: it is created (entries of old files have no module, so they can't be created)
+		if field_trans is None:
+			result = entry["match"]
+			if result.group("module") is None:
+				num_entries["skipped"] += 1
+				continue
+			try:
+				content_type_id = FieldTranslation.get_content_type_id(result.group("module"), result.group("model"))
+			except (ImportError, ValueError):
+				# Model does not exist
+				num_entries["skipped"] += 1
+				continue
+			source_text = entry["msgid"] or u""
+			new_translations.append(FieldTranslation(
+				module=result.group("module"), model=result.group("model"), content_type_id=content_type_id, object_id=int(result.group("object_id")),
+				field=result.group("field"), lang=lang, source_text=source_text, source_checksum=checksum(source_text),
+				translation=entry["msgstr"], is_fuzzy=entry["is_fuzzy"],
+				creation_datetime=now_datetime, last_update_datetime=now_datetime, creator_user_id=creator_user_id
+			))
+
+		# Translation is unchanged
+		elif field_trans.translation == entry["msgstr"] and field_trans.is_fuzzy == entry["is_fuzzy"]:
+			num_entries["unchanged"] += 1
+
+		# Sets translation and is_fuzzy attribute
+		else:
+			# Translations edited by translators are not copies from the translation memory anymore
+			if field_trans.translation != entry["msgstr"]:
+				field_trans.is_from_memory = False
+			field_trans.translation = entry["msgstr"]
+			field_trans.is_fuzzy = entry["is_fuzzy"]
+			field_trans.last_update_datetime = now_datetime
+			field_trans.creator_user_id = creator_user_id
+			changed_translations.append(field_trans)
+
+	if len(new_translations) > 0:
+		FieldTranslation.objects.bulk_create(new_translations)
+	if len(changed_translations) > 0:
+		_bulk_update(changed_translations, ["translation", "is_fuzzy", "is_from_memory", "last_update_datetime", "creator_user"])
+
+	# Bulk operations don't send signals
+	_translations_changed(set(
+		TransCache.make_key(trans.module, trans.model, trans.object_id) for trans in new_translations + changed_translations
+	))
+
+	num_entries["created"] += len(new_translations)
+	num_entries["updated"] += len(changed_translations)
+	return num_entries
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import logging
+import os
+import sys
+import threading
+import timeit
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.template.base import Node
+from django.utils import translation
+
+import modeltranslation
+
+
+########################################################################
+########################################################################
+#	Profiler of translation lookups.
+#	While a profile is active in a thread (see TranslationProfilerMiddleware and the django-debug-toolbar panel in
+#	panels.py), each translation lookup is recorded with the code or template line that made it, its object, field and
+#	language, the number of queries it issued and its duration.
+#	When the translations of a model are read from the database one object at a time more than
+#	MODELTRANSLATION_PROFILER_THRESHOLD times in a profile, a warning suggesting prefetch_translations is logged.
+#
+#	The profiler is meant for development: it is enabled with MODELTRANSLATION_PROFILER setting (DEBUG by default),
+#	that is read at startup. When it is disabled, lookup functions are not wrapped.
+########################################################################
+########################################################################
+
+
+########################################################################
+## Is the profiler enabled?
+ENABLED = getattr(settings, "MODELTRANSLATION_PROFILER", settings.DEBUG)
+
+########################################################################
+## Number of lookups of a model that query the database one object at a time above which a warning is logged
+THRESHOLD = getattr(settings, "MODELTRANSLATION_PROFILER_THRESHOLD", 10)
+
+########################################################################
+## Maximum number of frames inspected to find the caller of a lookup
+MAX_CALLER_DEPTH = 50
+
+logger = logging.getLogger("modeltranslation.profiler")
+
+# Frames of these directories are not reported as callers
+_INTERNAL_DIRS = tuple(
+	os.path.dirname(os.path.abspath(module.__file__)) + os.sep for module in (modeltranslation, django)
+)
+_TESTS_DIR = os.path.join(os.path.dirname(os.path.abspath(modeltranslation.__file__)), "tests") + os.sep
+
+# Profile of each thread and depth of its nested lookups
+_local = threading.local()
+
+
+########################################################################
+## Profile of the translation lookups of a request
+class TranslationProfile(object):
+
+	def __init__(self, name=u"", threshold=THRESHOLD):
+		self.name = name
+		self.threshold = threshold
+		self.lookups = []
+
+	def add(self, caller, model, object_id, field, lang, num_queries, seconds):
+		self.lookups.append({
+			"caller": caller, "model": model, "object_id": object_id, "field": field, "lang": lang,
+			"queries": num_queries, "hit_database": num_queries > 0, "seconds": seconds,
+		})
+
+	@property
+	def num_queries(self):
+		return sum(lookup["queries"] for lookup in self.lookups)
+
+	@property
+	def seconds(self):
+		return sum(lookup["seconds"] for lookup in self.lookups)
+
+	def n_plus_one(self):
+		"""
+		Returns the models whose translations have been read from the database one object at a time more than threshold
+		times, as a list of dicts with keys "model", "lookups" (number of lookups that queried the database) and
+		"callers" (callers of those lookups, most frequent first).
+		"""
+		lookups_by_model = {}
+		for lookup in self.lookups:
+			if lookup["hit_database"]:
+				lookups_by_model.setdefault(lookup["model"], []).append(lookup)
+
+		suspects = []
+		for model, lookups in sorted(lookups_by_model.items()):
+			if len(lookups) <= self.threshold:
+				continue
+			num_lookups_by_caller = {}
+			for lookup in lookups:
+				num_lookups_by_caller[lookup["caller"]] = num_lookups_by_caller.get(lookup["caller"], 0) + 1
+			callers = sorted(num_lookups_by_caller.keys(), key=lambda caller: -num_lookups_by_caller[caller])
+			suspects.append({"model": model, "lookups": len(lookups), "callers": callers})
+		return suspects
+
+	def log_warnings(self):
+		"""Logs a warning for each model with N+1 translation lookups"""
+		for suspect in self.n_plus_one():
+			logger.warning(
+				u"%s: translations of %s were read from the database one object at a time %s times (%s). "
+				u"Load them in batch with prefetch_translations or {%% prefetch_translations %%} tag.",
+				self.name, suspect["model"], suspect["lookups"], u", ".join(suspect["callers"][:3])
+			)
+
+	def stats(self):
+		"""Dict with the lookups and the N+1 warnings of the profile"""
+		return {
+			"lookups": self.lookups, "num_lookups": len(self.lookups), "num_queries": self.num_queries,
+			"seconds": self.seconds, "n_plus_one": self.n_plus_one(), "threshold": self.threshold,
+		}
+
+
+########################################################################
+## Starts a profile in the current thread
+def start(name=u""):
+	"""
+	Starts recording the translation lookups of the current thread.
+	Queries are counted with the debug cursor of the default connection, that is forced while the profile is active.
+	@return: the new TranslationProfile.
+	"""
+	profile = TranslationProfile(name=name)
+	_local.profile = profile
+	_local.depth = 0
+	_local.force_debug_cursor = getattr(connection, "force_debug_cursor", False)
+	connection.force_debug_cursor = True
+	return profile
+
+
+########################################################################
+## Ends the profile of the current thread
+def end():
+	"""
+	Stops recording the translation lookups of the current thread.
+	@return: the TranslationProfile or None if there was no active profile.
+	"""
+	profile = getattr(_local, "profile", None)
+	if profile is not None:
+		connection.force_debug_cursor = _local.force_debug_cursor
+	_local.profile = None
+	return profile
+
+
+########################################################################
+## Is there an active profile in this thread?
+def is_active():
+	return getattr(_local, "profile", None) is not None
+
+
+########################################################################
+## Caller of a lookup
+def _get_caller(frame):
+	"""
+	Returns the template and line of the template node or the file, line and function of the code that made the lookup,
+	skipping the frames of modeltranslation and Django.
+	"""
+	caller = None
+	depth = 0
+	while frame is not None and depth < MAX_CALLER_DEPTH:
+		node = frame.f_locals.get("self")
+		if isinstance(node, Node) and getattr(node, "token", None) is not None:
+			origin = getattr(node, "origin", None)
+			template = u"{0}:{1}".format(getattr(origin, "name", None) or u"<template>", getattr(node.token, "lineno", u"?"))
+			return u"{0} ({1})".format(template, caller) if caller else template
+		filename = os.path.abspath(frame.f_code.co_filename)
+		if caller is None and (not filename.startswith(_INTERNAL_DIRS) or filename.startswith(_TESTS_DIR)):
+			caller = u"{0}:{1} in {2}".format(filename, frame.f_lineno, frame.f_code.co_name)
+		frame = frame.f_back
+		depth += 1
+	return caller or u"<unknown>"
+
+
+########################################################################
+## Number of queries of the default connection after a query of its log
+def _count_queries_since(last_query):
+	num_queries = 0
+	for query in reversed(connection.queries_log):
+		if query is last_query:
+			break
+		num_queries += 1
+	return num_queries
+
+
+########################################################################
+## Decorator of the lookup functions
+def profiled(function):
+	"""
+	Records each call of a lookup function (instance, attr, lang=None) in the active profile of the thread.
+	Lookups made inside another lookup are part of it. If the profiler is disabled, the function is returned
+	undecorated.
+	"""
+	if not ENABLED:
+		return function
+
+	@functools.wraps(function)
+	def profiled_function(instance, attr, *args, **kwargs):
+		profile = getattr(_local, "profile", None)
+		if profile is None or _local.depth > 0:
+			return function(instance, attr, *args, **kwargs)
+
+		last_query = connection.queries_log[-1] if connection.queries_log else None
+		_local.depth += 1
+		start_time = timeit.default_timer()
+		try:
+			return function(instance, attr, *args, **kwargs)
+		finally:
+			seconds = timeit.default_timer() - start_time
+			_local.depth -= 1
+			lang = args[0] if args else kwargs.get("lang")
+			profile.add(
+				caller=_get_caller(sys._getframe(1)),
+				model=u"{0}.{1}".format(instance.__class__.__module__, instance.__class__.__name__),
+				object_id=getattr(instance, "id", None), field=attr, lang=lang or translation.get_language(),
+				num_queries=_count_queries_since(last_query), seconds=seconds
+			)
+	return profiled_function
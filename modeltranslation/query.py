@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+from django.db import connection, models
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.utils import translation
+
+from modeltranslation.models import FieldTranslation, trans_attr
+from modeltranslation.translation import get_fallback_languages
+
+try:
+	from django.db.models import OuterRef, Subquery
+except ImportError:
+	# Django < 1.11
+	OuterRef = Subquery = None
+
+
+########################################################################
+########################################################################
+#	Translated values computed in database.
+#	Each translated field is an annotation with a correlated subquery on FieldTranslation that gets its non-fuzzy
+#	translation. If there is no such translation, the value of the source field is used.
+#	This allows filtering, ordering and paginating querysets by translated values without loading the objects.
+#
+#	For example:
+#		Event.objects.filter(...).with_translation("name", "es").order_by("name_es_translated")
+#		Event.objects.filter_translated(name__icontains="fiesta", lang="es")
+########################################################################
+########################################################################
+
+
+########################################################################
+## Name of the annotation of a translated field
+def translated_alias(field, lang):
+	"""
+	Returns the name of the annotation with the translation of field in language lang: <field>_<lang>_translated.
+	For example: name_es_translated
+	"""
+	return u"{0}_translated".format(trans_attr(field, lang))
+
+
+########################################################################
+## Expression with the translated value of a field
+def translated_expression(model, field, lang=None):
+	"""
+	Returns an expression with the translation of field to language lang of each object of model.
+	Non-fuzzy translations are used. If the object has no such translation, the translations of the fallback languages
+	of lang (see get_fallback_languages) are tried in order, and then the value of field is used.
+	Each subquery only returns one value, there should be only one translation.
+	@param lang: language code. If None, current language is used.
+	"""
+	if lang is None:
+		lang = translation.get_language()
+
+	# Default language has no translations
+	languages = get_fallback_languages(lang)
+	if len(languages) == 0:
+		return F(field)
+
+	content_type_id = FieldTranslation.get_content_type_id(model.__module__, model.__name__)
+	translations = [_translation_subquery(model, content_type_id, field, fallback_lang) for fallback_lang in languages]
+	return Coalesce(*(translations + [F(field)]), output_field=models.TextField())
+
+
+########################################################################
+## Subquery with the non-fuzzy translation of a field of each object
+def _translation_subquery(model, content_type_id, field, lang):
+	if Subquery is not None:
+		translations = FieldTranslation.objects.filter(
+			content_type_id=content_type_id, object_id=OuterRef("pk"), field=field, lang=lang, is_fuzzy=False
+		).order_by().values("translation")[:1]
+		return Subquery(translations, output_field=models.TextField())
+
+	qn = connection.ops.quote_name
+	trans_meta = FieldTranslation._meta
+	sql = (
+		u"SELECT MAX({trans_table}.{translation}) FROM {trans_table} WHERE "
+		u"{trans_table}.{content_type} = %s AND {trans_table}.{object_id} = {{source_table}}.{source_pk} AND "
+		u"{trans_table}.{field} = %s AND {trans_table}.{lang} = %s AND {trans_table}.{is_fuzzy} = %s"
+	).format(
+		trans_table=qn(trans_meta.db_table),
+		translation=qn(trans_meta.get_field("translation").column),
+		content_type=qn(trans_meta.get_field("content_type").column),
+		object_id=qn(trans_meta.get_field("object_id").column),
+		field=qn(trans_meta.get_field("field").column),
+		lang=qn(trans_meta.get_field("lang").column),
+		is_fuzzy=qn(trans_meta.get_field("is_fuzzy").column),
+		source_pk=qn(model._meta.pk.column),
+	)
+	return _CorrelatedRawSQL(sql, (content_type_id, field, lang, False), output_field=models.TextField())
+
+
+########################################################################
+## Correlated subquery in SQL (Django < 1.11 has no OuterRef)
+class _CorrelatedRawSQL(RawSQL):
+	"""
+	RawSQL whose {source_table} placeholder is replaced by the alias of the table of the model in the query being
+	compiled. That alias is not the name of the table when the query is a subquery (for example, of an __in lookup).
+	"""
+
+	def as_sql(self, compiler, connection):
+		source_table = compiler.quote_name_unless_alias(compiler.query.get_initial_alias())
+		return u"({0})".format(self.sql.replace(u"{source_table}", source_table)), self.params
+
+
+########################################################################
+## Annotates a queryset with the translated value of a field
+def with_translation(queryset, field, lang=None, alias=None):
+	"""
+	Annotates each object of queryset with the translation of field to language lang.
+	@param alias: name of the annotation. By default, <field>_<lang>_translated (see translated_alias).
+	"""
+	if lang is None:
+		lang = translation.get_language()
+	if alias is None:
+		alias = translated_alias(field, lang)
+	return queryset.annotate(**{alias: translated_expression(queryset.model, field, lang)})
+
+
+########################################################################
+## Filters a queryset by translated values
+def filter_translated(queryset, lang=None, **lookups):
+	"""
+	Filters queryset using translated values of its fields. Lookups of fields that are not translatable are not changed.
+	For example: filter_translated(Event.objects.all(), name__icontains="fiesta", lang="es")
+	"""
+	if lang is None:
+		lang = translation.get_language()
+	translatable_fields = getattr(queryset.model._meta, "translatable_fields", ())
+	translated_lookups = {}
+	for lookup, value in lookups.items():
+		field, _, lookup_type = lookup.partition("__")
+		# Lookups of the other fields (and through relations) are applied as usual
+		if not field in translatable_fields:
+			translated_lookups[lookup] = value
+			continue
+		alias = translated_alias(field, lang)
+		if not alias in queryset.query.annotations:
+			queryset = with_translation(queryset, field, lang, alias)
+		translated_lookups[alias + ("__" + lookup_type if lookup_type else "")] = value
+	return queryset.filter(**translated_lookups)
+
+
+########################################################################
+## Orders a queryset by translated values
+def order_by_translated(queryset, *fields, **kwargs):
+	"""
+	Orders queryset using translated values of fields. Descending order is specified with "-" as usual.
+	@param lang: (keyword argument) language code. If None, current language is used.
+	"""
+	lang = kwargs.get("lang")
+	if lang is None:
+		lang = translation.get_language()
+	ordering = []
+	for field in fields:
+		descending = field.startswith("-")
+		field = field.lstrip("-")
+		alias = translated_alias(field, lang)
+		if not alias in queryset.query.annotations:
+			queryset = with_translation(queryset, field, lang, alias)
+		ordering.append(("-" if descending else "") + alias)
+	return queryset.order_by(*ordering)
+
+
+########################################################################
+## QuerySet with translated values
+class TranslatableQuerySet(models.QuerySet):
+	"""
+	QuerySet of translatable models with methods to annotate, filter and order by translated values.
+	"""
+
+	def with_translation(self, field, lang=None, alias=None):
+		return with_translation(self, field, lang=lang, alias=alias)
+
+	def filter_translated(self, lang=None, **lookups):
+		return filter_translated(self, lang=lang, **lookups)
+
+	def order_by_translated(self, *fields, **kwargs):
+		return order_by_translated(self, *fields, **kwargs)
+
+
+########################################################################
+## Manager of translatable models
+TranslatableManager = models.Manager.from_queryset(TranslatableQuerySet)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+from django.conf import settings
+
+
+########################################################################
+########################################################################
+#	Registry of translatable models.
+#	It is built once from Django's app registry (see apps.py) and resolves the names (module, model) stored in each
+#	FieldTranslation to the model class with a dict lookup, without importing modules nor inspecting their members.
+#
+#	Translatable models are the non-abstract models with translatable_fields in their Meta. If
+#	TRANSLATABLE_MODEL_MODULES setting is defined, only the models of those modules are translatable.
+########################################################################
+########################################################################
+
+
+########################################################################
+## Model class of each (module, model) pair
+_models_by_key = None
+
+########################################################################
+## Frozen set of translatable fields of each translatable (module, model) pair
+_translatable_fields_by_key = None
+
+_lock = threading.Lock()
+
+
+########################################################################
+## Builds the registry
+def build():
+	"""
+	Builds the registry from the models of the installed apps. It is called from the ready method of the AppConfig of
+	modeltranslation, so it is done only once, when all the models have been loaded.
+	"""
+	global _models_by_key, _translatable_fields_by_key
+	from django.apps import apps
+
+	translatable_model_modules = getattr(settings, "TRANSLATABLE_MODEL_MODULES", None)
+	models_by_key = {}
+	translatable_fields_by_key = {}
+	for model in apps.get_models():
+		key = (model.__module__, model.__name__)
+		models_by_key[key] = model
+		# Setting of verbose name and its plural for later use
+		model.meta__verbose_name = model._meta.verbose_name
+		model.meta__verbose_name_plural = model._meta.verbose_name_plural
+		translatable_fields = getattr(model._meta, "translatable_fields", None)
+		if translatable_fields and (translatable_model_modules is None or model.__module__ in translatable_model_modules):
+			translatable_fields_by_key[key] = frozenset(translatable_fields)
+
+	with _lock:
+		_models_by_key = models_by_key
+		_translatable_fields_by_key = translatable_fields_by_key
+
+
+########################################################################
+## Builds the registry if it has not been built yet
+def _ensure_built():
+	if _models_by_key is None:
+		build()
+
+
+########################################################################
+## Model class of a pair (module, model)
+def get_model(module_name, model_name):
+	"""
+	Returns the model class called model_name in the Python module module_name.
+	@raise ValueError: if there is no such model.
+	"""
+	_ensure_built()
+	try:
+		return _models_by_key[(module_name, model_name)]
+	except KeyError:
+		raise ValueError(u"Model {0} does not exist in module {1}".format(model_name, module_name))
+
+
+########################################################################
+## Translatable fields of each translatable model
+def get_translatable_fields_by_model():
+	"""
+	Returns a dict {(module, model): frozenset of translatable fields} with all the translatable models.
+	"""
+	_ensure_built()
+	return _translatable_fields_by_key
+
+
+########################################################################
+## Translatable models
+def get_translatable_models():
+	"""
+	Returns the list of translatable model classes.
+	"""
+	_ensure_built()
+	return [_models_by_key[key] for key in _translatable_fields_by_key.keys()]
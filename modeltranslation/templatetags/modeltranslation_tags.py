@@ -4,7 +4,17 @@ from django import template
 from django.conf import settings
 from django.utils.translation import get_language
 
-from modeltranslation.translation import _get_fieldtranslations
+from django.db import models
+try:
+	from django.db.models import prefetch_related_objects
+except ImportError:
+	# Django < 1.10
+	from django.db.models.query import prefetch_related_objects as _prefetch_related_objects
+
+	def prefetch_related_objects(model_instances, *related_lookups):
+		_prefetch_related_objects(model_instances, list(related_lookups))
+
+from modeltranslation.translation import _get_memoized_translated_field, prefetch_translations
 
 register = template.Library()
 
@@ -39,13 +49,64 @@ def get_translated_attribute(instance, attr):
 	if not attr in translatable_fields:
 		return getattr(instance, attr)
 
-	# Gets field translations of this instance and return the translated attribute
-	field_translation = _get_fieldtranslations(instance, field=attr, lang=lang)
-	if field_translation:
-		if not field_translation.is_fuzzy:
-			return field_translation.translation
-	return getattr(instance, attr)
+	# Gets the translated attribute (translations are memoized during the request and read from the translation cache
+	# when possible)
+	return _get_memoized_translated_field(instance, attr, lang)
 
 
 # Register this template filter
 register.filter('_', get_translated_attribute)
+
+
+########################################################################
+## Loads the translations of a collection of objects to current language
+## with only one query, so {{ <obj>|_:"<attr>" }} inside a loop doesn't
+## query the database. For example:
+## {% prefetch_translations events "name,description,area.name" %}
+def prefetch_translations_tag(items, fields=""):
+	"""
+	Loads the translations of items (a list or a queryset, that is evaluated) to current language.
+	@param fields: comma-separated names of the fields whose translations are loaded. A field can be reached through a
+	relation path, like "area.name". If empty, translations of all the fields of the items are loaded.
+	"""
+	lang = get_language()
+	if items is None or lang is None or lang.lower() == settings.LANGUAGE_CODE:
+		return u""
+
+	# Querysets are evaluated here, so the loop of the template uses the same instances
+	instances = list(items)
+	if len(instances) == 0:
+		return u""
+
+	# Fields grouped by the relation path of their objects ("" are the items themselves)
+	fields_by_path = {}
+	for field in [field.strip() for field in fields.split(",") if field.strip()]:
+		path, _, field = field.rpartition(".")
+		fields_by_path.setdefault(path, []).append(field)
+	if len(fields_by_path) == 0:
+		fields_by_path[""] = []
+
+	for path, path_fields in fields_by_path.items():
+		objects = instances
+		if path:
+			# Related objects are loaded with one query for each relation
+			try:
+				prefetch_related_objects(instances, path.replace(".", "__"))
+			except (AttributeError, ValueError):
+				pass
+			for relation in path.split("."):
+				related_objects = []
+				for obj in objects:
+					related = getattr(obj, relation, None)
+					# Many-to-many and reverse relations
+					if isinstance(related, models.Manager):
+						related_objects += list(related.all())
+					elif related is not None:
+						related_objects.append(related)
+				objects = related_objects
+		prefetch_translations(objects, lang=lang.lower(), fields=path_fields or None)
+	return u""
+
+
+# Register this template tag
+register.simple_tag(prefetch_translations_tag, name="prefetch_translations")
@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "modeltranslation.tests.settings")
+
+import django
+from django.apps import apps
+if not apps.ready:
+	django.setup()
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+from django.utils import translation
+
+from modeltranslation import jobs, metrics
+from modeltranslation.models import FieldTranslation, ObjectTranslation, TranslationJob
+from modeltranslation.pofile import import_po, write_po
+from modeltranslation.tests.testapp.models import Area, Event
+from modeltranslation.transcache import RequestTransCache, TransCache
+from modeltranslation.translation import _get_translated_field, prefetch_translations
+
+
+########################################################################
+########################################################################
+#	Micro-benchmarks of the hot paths of modeltranslation.
+#	Synthetic events and areas (see testapp) are created in a SQLite database file until FieldTranslation has about
+#	the given number of rows, and each hot path is timed. Results are written as JSON, so runs in different commits
+#	can be compared:
+#		python -m modeltranslation.tests.benchmarks --sizes 1000,100000 --output before.json
+#		python -m modeltranslation.tests.benchmarks --sizes 1000,100000 --output after.json --compare before.json
+#
+#	Each benchmark stores the min, median and max seconds of its runs and the number of queries of one run.
+#	Benchmarks that work on a sample of objects also store the median seconds per object.
+#	Set MODELTRANSLATION_METRICS=1 environment variable to run them with metrics enabled.
+########################################################################
+########################################################################
+
+
+########################################################################
+## Default numbers of FieldTranslation rows
+DEFAULT_SIZES = (1000, 100000, 1000000)
+
+########################################################################
+## Number of objects used by the benchmarks that work on a sample of objects
+SAMPLE_SIZE = 100
+
+########################################################################
+## Number of areas of the events
+NUM_AREAS = 10
+
+########################################################################
+## Language of the translations read by the benchmarks. Translations of TRANSLATED_LANG are reviewed, the ones of
+## the other languages are left fuzzy.
+TRANSLATED_LANG = "en"
+
+########################################################################
+## Template that renders a list of events with the _ filter
+LIST_TEMPLATE = u'{% load modeltranslation_tags %}{% for event in events %}{{ event|_:"name" }} {{ event.area|_:"name" }}\n{% endfor %}'
+
+########################################################################
+## Same template, loading the translations with prefetch_translations tag before the loop
+PREFETCH_LIST_TEMPLATE = u'{% load modeltranslation_tags %}{% prefetch_translations events "name,area.name" %}' + \
+	u'{% for event in events %}{{ event|_:"name" }} {{ event.area|_:"name" }}\n{% endfor %}'
+
+########################################################################
+## Code run in a new process to measure the startup (see _measure_startup)
+STARTUP_CODE = u"""
+import json, timeit
+start = timeit.default_timer()
+import django
+django.setup()
+setup_seconds = timeit.default_timer() - start
+from modeltranslation.tests.testapp.models import Event
+from modeltranslation.translation import _get_translated_field
+event = Event.objects.order_by("pk").first()
+start = timeit.default_timer()
+if event is not None:
+	_get_translated_field(event, "name", "{lang}")
+first_translation_seconds = timeit.default_timer() - start
+print(json.dumps({{"setup": setup_seconds, "first_translation": first_translation_seconds}}))
+"""
+
+
+########################################################################
+## Times a function
+def _measure(function, repeat=1, setup=None, num_objects=None):
+	"""
+	Runs function repeat times and returns a dict with the min, median and max seconds of the runs and the number of
+	queries of the first run.
+	@param setup: function called before each run (not timed). Its result is passed to function.
+	@param num_objects: number of objects processed in each run. If given, the median seconds per object are returned too.
+	"""
+	times = []
+	num_queries = None
+	for _ in range(repeat):
+		args = (setup(),) if setup else ()
+		with CaptureQueriesContext(connection) as queries:
+			start = timeit.default_timer()
+			function(*args)
+			times.append(timeit.default_timer() - start)
+		if num_queries is None:
+			num_queries = len(queries)
+	times.sort()
+	result = {"min": times[0], "median": times[len(times) // 2], "max": times[-1], "repeat": repeat, "queries": num_queries}
+	if num_objects:
+		result["median_per_object"] = result["median"] / num_objects
+	return result
+
+
+########################################################################
+## Empties the tables used by the benchmarks
+def _empty_tables():
+	# Deleting with a queryset would load the objects to send post_delete signals
+	qn = connection.ops.quote_name
+	with connection.cursor() as cursor:
+		for model in (FieldTranslation, ObjectTranslation, TranslationJob, Event, Area):
+			cursor.execute(u"DELETE FROM {0}".format(qn(model._meta.db_table)))
+	TransCache.factory().clear()
+
+
+########################################################################
+## Creates the objects of the benchmarks
+def _create_objects(num_rows):
+	"""
+	Creates the areas and the events whose translations make about num_rows FieldTranslation rows.
+	Objects are created in bulk, so they have no translations yet.
+	@return: number of created events.
+	"""
+	num_languages = len([lang for lang, _ in settings.LANGUAGES if lang != settings.LANGUAGE_CODE])
+	area_rows = NUM_AREAS * len(Area._meta.translatable_fields) * num_languages
+	num_events = max(SAMPLE_SIZE, (num_rows - area_rows) // (len(Event._meta.translatable_fields) * num_languages))
+
+	Area.objects.bulk_create([Area(name=u"Area {0}".format(i)) for i in range(NUM_AREAS)])
+	area_ids = list(Area.objects.order_by("pk").values_list("pk", flat=True))
+	Event.objects.bulk_create(
+		(
+			Event(
+				name=u"Event {0}".format(i), description=u"Description of the event number {0}".format(i),
+				area_id=area_ids[i % NUM_AREAS]
+			)
+			for i in range(num_events)
+		),
+		batch_size=1000
+	)
+	return num_events
+
+
+########################################################################
+## Size of the indexes of FieldTranslation
+def _index_sizes():
+	"""
+	Returns a dict {index name: bytes} with the size of each index of FieldTranslation table, or None if the dbstat
+	virtual table of SQLite is not available.
+	"""
+	table = FieldTranslation._meta.db_table
+	with connection.cursor() as cursor:
+		constraints = connection.introspection.get_constraints(cursor, table)
+		index_names = [name for name, constraint in constraints.items() if constraint["index"]]
+		try:
+			cursor.execute(
+				u"SELECT name, SUM(pgsize) FROM dbstat WHERE name IN ({0}) GROUP BY name".format(u", ".join([u"%s"] * len(index_names))),
+				index_names
+			)
+		except Exception:
+			return None
+		return dict((name, size) for name, size in cursor.fetchall())
+
+
+########################################################################
+## Benchmarks with a number of FieldTranslation rows
+def _run_size(num_rows, repeat):
+	"""
+	Runs all the benchmarks with about num_rows FieldTranslation rows.
+	@return: dict with the results of each benchmark.
+	"""
+	results = {}
+	_empty_tables()
+	num_events = _create_objects(num_rows)
+
+	# Creation of the translations of all the objects
+	results["update_translations"] = _measure(lambda: jobs.update_translations(restart=True, force=True))
+	results["rows"] = FieldTranslation.objects.count()
+	results["events"] = num_events
+	results["index_sizes"] = _index_sizes()
+
+	# Translations of one language are reviewed, so the reads return translations
+	FieldTranslation.objects.filter(lang=TRANSLATED_LANG).update(translation=F("source_text"), is_fuzzy=False)
+
+	sample_pks = list(Event.objects.order_by("pk").values_list("pk", flat=True)[:SAMPLE_SIZE])
+
+	def fresh_events():
+		TransCache.factory().clear()
+		return list(Event.objects.filter(pk__in=sample_pks).select_related("area").order_by("pk"))
+
+	# Synchronization of the translations when an object is saved (_save_translations)
+	def save_events(events):
+		for event in events:
+			event.save()
+	results["save_unchanged"] = _measure(save_events, repeat=repeat, setup=fresh_events, num_objects=len(sample_pks))
+
+	num_changes = [0]
+
+	def changed_events():
+		num_changes[0] += 1
+		events = fresh_events()
+		for event in events:
+			event.name = u"{0} ({1})".format(event.name, num_changes[0])
+		return events
+	results["save_changed"] = _measure(save_events, repeat=repeat, setup=changed_events, num_objects=len(sample_pks))
+
+	# Translated attributes
+	def get_translated_fields(events):
+		for event in events:
+			_get_translated_field(event, "name", TRANSLATED_LANG)
+	results["get_translated_field"] = _measure(get_translated_fields, repeat=repeat, setup=fresh_events, num_objects=len(sample_pks))
+
+	def load_translations(events):
+		for event in events:
+			event.load_translations(TRANSLATED_LANG)
+	results["load_translations"] = _measure(load_translations, repeat=repeat, setup=fresh_events, num_objects=len(sample_pks))
+
+	results["prefetch_translations"] = _measure(
+		lambda events: prefetch_translations(events, lang=TRANSLATED_LANG), repeat=repeat, setup=fresh_events,
+		num_objects=len(sample_pks)
+	)
+
+	# Rendering of a list with the _ filter, as in a request with TranslationMemoMiddleware
+	def render(template):
+		def render_events(events):
+			RequestTransCache.start()
+			try:
+				with translation.override(TRANSLATED_LANG):
+					template.render(Context({"events": events}))
+			finally:
+				RequestTransCache.end()
+		return render_events
+	results["render_list"] = _measure(render(Template(LIST_TEMPLATE)), repeat=repeat, setup=fresh_events, num_objects=len(sample_pks))
+	results["render_prefetched_list"] = _measure(
+		render(Template(PREFETCH_LIST_TEMPLATE)), repeat=repeat, setup=fresh_events, num_objects=len(sample_pks)
+	)
+
+	# PO files
+	po_file = io.StringIO()
+	results["export_po"] = _measure(lambda: write_po(TRANSLATED_LANG, po_file))
+	po_lines = po_file.getvalue().splitlines(True)
+	results["import_po_unchanged"] = _measure(lambda: import_po(po_lines, TRANSLATED_LANG))
+	changed_po_lines = [line.replace(u'msgstr "', u'msgstr "~', 1) for line in po_lines]
+	results["import_po_changed"] = _measure(lambda: import_po(changed_po_lines, TRANSLATED_LANG))
+
+	# Deletion of the translations of a tenth of the events
+	qn = connection.ops.quote_name
+	with connection.cursor() as cursor:
+		cursor.execute(u"DELETE FROM {0} WHERE {1} % 10 = 0".format(qn(Event._meta.db_table), qn(Event._meta.pk.column)))
+	results["delete_orphan_translations"] = _measure(lambda: jobs.delete_orphan_translations(restart=True, force=True))
+
+	return results
+
+
+########################################################################
+## Startup of a new process
+def _measure_startup(repeat):
+	"""
+	Measures in new processes the time spent by django.setup (loading of the models and the registry of translatable
+	models) and by the first translation lookup.
+	"""
+	code = STARTUP_CODE.format(lang=TRANSLATED_LANG)
+	runs = []
+	for _ in range(repeat):
+		output = subprocess.check_output([sys.executable, "-c", code], env=dict(os.environ))
+		runs.append(json.loads(output.decode("utf-8").strip().splitlines()[-1]))
+	results = {}
+	for name in ("setup", "first_translation"):
+		times = sorted(run[name] for run in runs)
+		results[name] = {"min": times[0], "median": times[len(times) // 2], "max": times[-1], "repeat": repeat}
+	return results
+
+
+########################################################################
+## Overhead of the metrics
+def _measure_metrics_overhead(num_calls=100000):
+	"""
+	Measures the seconds per call of a function instrumented with metrics.timed, metrics.timer and metrics.increment,
+	with metrics disabled and enabled, and of the same function without instrumentation.
+	"""
+	def function():
+		pass
+
+	def timed_block():
+		with metrics.timer("modeltranslation_benchmark_seconds"):
+			pass
+
+	def counter():
+		metrics.increment("modeltranslation_benchmark_total")
+
+	def seconds_per_call(callable_object):
+		return min(timeit.Timer(callable_object).repeat(repeat=3, number=num_calls)) / num_calls
+
+	results = {"plain": seconds_per_call(function)}
+	enabled = metrics.ENABLED
+	try:
+		for name, metrics_enabled in (("disabled", False), ("enabled", True)):
+			metrics.ENABLED = metrics_enabled
+			# Functions are decorated when their module is loaded, with the setting of that moment
+			timed_function = metrics.timed("modeltranslation_benchmark_seconds")(function)
+			results[name] = {
+				"timed": seconds_per_call(timed_function),
+				"timed_is_undecorated": timed_function is function,
+				"timer": seconds_per_call(timed_block),
+				"increment": seconds_per_call(counter),
+			}
+	finally:
+		metrics.ENABLED = enabled
+		if hasattr(metrics.get_sink(), "reset"):
+			metrics.get_sink().reset()
+	return results
+
+
+########################################################################
+## Commit of the working copy
+def _get_commit():
+	try:
+		output = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)))
+		return output.decode("ascii").strip()
+	except Exception:
+		return None
+
+
+########################################################################
+## Runs all the benchmarks
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=5):
+	"""
+	Runs the benchmarks with each number of FieldTranslation rows of sizes.
+	@return: dict with the results, that can be serialized as JSON.
+	"""
+	call_command("migrate", interactive=False, run_syncdb=True, verbosity=0)
+
+	results = {
+		"date": datetime.datetime.utcnow().isoformat(),
+		"commit": _get_commit(),
+		"python": platform.python_version(),
+		"django": django.get_version(),
+		"sqlite": connection.Database.sqlite_version,
+		"sizes": {},
+	}
+	for num_rows in sizes:
+		print(u"Benchmarks with {0} translations...".format(num_rows), file=sys.stderr)
+		results["sizes"][str(num_rows)] = _run_size(num_rows, repeat)
+	# Startup is measured with the database of the last size
+	results["startup"] = _measure_startup(repeat)
+	results["metrics_overhead"] = _measure_metrics_overhead()
+	return results
+
+
+########################################################################
+## Compares two runs
+def compare(old_results, new_results):
+	"""
+	Returns the lines of a report with the ratio between the new and the old median time of each benchmark.
+	"""
+	lines = [u"{0} -> {1}".format(old_results.get("commit"), new_results.get("commit"))]
+	for size, new_benchmarks in sorted(new_results["sizes"].items(), key=lambda item: int(item[0])):
+		old_benchmarks = old_results["sizes"].get(size, {})
+		for name, new_result in sorted(new_benchmarks.items()):
+			old_result = old_benchmarks.get(name)
+			if not isinstance(new_result, dict) or not isinstance(old_result, dict) or not "median" in new_result:
+				continue
+			ratio = new_result["median"] / old_result["median"] if old_result["median"] else float("inf")
+			lines.append(u"{0:>8} {1:<28} {2:10.4f}s -> {3:10.4f}s  x{4:.2f}  queries {5} -> {6}".format(
+				size, name, old_result["median"], new_result["median"], ratio, old_result.get("queries"), new_result.get("queries")
+			))
+	return lines
+
+
+########################################################################
+## Command line
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=u"Benchmarks of the hot paths of modeltranslation.")
+	parser.add_argument("--sizes", default=u",".join(str(size) for size in DEFAULT_SIZES),
+		help=u"Comma-separated numbers of FieldTranslation rows.")
+	parser.add_argument("--repeat", type=int, default=5, help=u"Number of runs of the fast benchmarks.")
+	parser.add_argument("--output", default="modeltranslation-benchmarks.json", help=u"JSON file of the results.")
+	parser.add_argument("--compare", default=None, help=u"JSON file of a previous run to compare with.")
+	args = parser.parse_args(argv)
+
+	sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+	results = run_benchmarks(sizes=sizes, repeat=args.repeat)
+	with io.open(args.output, "w", encoding="utf-8") as output_file:
+		output_file.write(type(u"")(json.dumps(results, indent=2, sort_keys=True)))
+
+	if args.compare:
+		with io.open(args.compare, encoding="utf-8") as compare_file:
+			old_results = json.load(compare_file)
+		for line in compare(old_results, results):
+			print(line)
+
+
+if __name__ == "__main__":
+	main()
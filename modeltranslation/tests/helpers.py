@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+from django.test.utils import override_settings
+
+from modeltranslation.models import FieldTranslation
+from modeltranslation.tests.testapp.models import Area, Event
+from modeltranslation.transcache import TransCache, invalidate_cached_translations
+
+
+########################################################################
+########################################################################
+#	Fixtures shared by the tests.
+#	Objects are created with bulk_create, that doesn't send post_save, so their translations are only created when
+#	a test asks for them.
+########################################################################
+########################################################################
+
+
+########################################################################
+## Creates areas without translations
+def bulk_create_areas(num_areas=1):
+	Area.objects.bulk_create([Area(name=u"Area {0}".format(i)) for i in range(num_areas)])
+	return list(Area.objects.order_by("pk"))
+
+
+########################################################################
+## Creates events without translations
+def bulk_create_events(num_events=3, areas=(None,), num_descriptions=None):
+	"""
+	Creates events named "Event <i>" with the description "Description <i>".
+	@param areas: areas assigned to the events in turn.
+	@param num_descriptions: number of different descriptions. If None, each event has its own description.
+	@return: list of the events ordered by pk.
+	"""
+	if num_descriptions is None:
+		num_descriptions = num_events
+	Event.objects.bulk_create([
+		Event(name=u"Event {0}".format(i), description=u"Description {0}".format(i % num_descriptions), area=areas[i % len(areas)])
+		for i in range(num_events)
+	])
+	return list(Event.objects.select_related("area").order_by("pk"))
+
+
+########################################################################
+## Creates events and their translations
+def create_events(num_events=3, area=None):
+	events = bulk_create_events(num_events=num_events, areas=(area,))
+	FieldTranslation.update_translations()
+	return events
+
+
+########################################################################
+## Creates events and translates their names and the name of their area to English
+def create_translated_events(num_events=3):
+	area = Area.objects.create(name=u"Area")
+	events = create_events(num_events=num_events, area=area)
+	for obj in events + [area]:
+		translate(obj, "name", "en", u"{0} en".format(obj.name))
+	return events
+
+
+########################################################################
+## Sets a reviewed translation of a field of an object
+def translate(obj, field, lang, translation_text):
+	FieldTranslation.objects.filter(
+		content_type_id=FieldTranslation.get_object_content_type_id(obj), object_id=obj.id, field=field, lang=lang
+	).update(translation=translation_text, is_fuzzy=False)
+	# Bulk updates don't send signals
+	invalidate_cached_translations([TransCache.instance_key(obj)])
+
+
+########################################################################
+## Translations of the objects of a model
+def model_translations(model):
+	return FieldTranslation.objects.filter(content_type_id=FieldTranslation.get_content_type_id(model.__module__, model.__name__))
+
+
+########################################################################
+## Runs the tests of a TestCase with the default local translation cache
+class LocalCacheMixin(object):
+	"""
+	The test settings disable the local translation cache (MODELTRANSLATION_CACHE_SIZE = 0). Test cases that inherit
+	from this mixin run with its default size and TTL, as in production, and with an empty cache in each test.
+	"""
+
+	def setUp(self):
+		self.settings_override = override_settings(MODELTRANSLATION_CACHE_SIZE=TransCache.DEFAULT_SIZE)
+		self.settings_override.enable()
+		self.singleton = TransCache.SINGLETON
+		TransCache.SINGLETON = None
+		super(LocalCacheMixin, self).setUp()
+
+	def tearDown(self):
+		super(LocalCacheMixin, self).tearDown()
+		TransCache.SINGLETON = self.singleton
+		self.settings_override.disable()
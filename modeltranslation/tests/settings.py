@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+
+
+########################################################################
+########################################################################
+#	Settings of the tests and benchmarks of modeltranslation.
+#	They only need the dependencies of modeltranslation and a SQLite database file:
+#		DJANGO_SETTINGS_MODULE=modeltranslation.tests.settings django-admin test modeltranslation.tests
+#		DJANGO_SETTINGS_MODULE=modeltranslation.tests.settings python -m modeltranslation.tests.benchmarks
+#	The database is a file (not in memory) so it can be shared by several processes (see parallel.py).
+########################################################################
+########################################################################
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DATABASE_PATH = os.environ.get(
+	"MODELTRANSLATION_TEST_DATABASE", os.path.join(tempfile.gettempdir(), "modeltranslation_tests.sqlite3")
+)
+
+SECRET_KEY = "modeltranslation-tests"
+
+DEBUG = False
+
+DATABASES = {
+	"default": {
+		"ENGINE": "django.db.backends.sqlite3",
+		"NAME": DATABASE_PATH,
+		"OPTIONS": {"timeout": 30},
+		"TEST": {"NAME": DATABASE_PATH + "-test"},
+	}
+}
+
+INSTALLED_APPS = (
+	"django.contrib.admin",
+	"django.contrib.auth",
+	"django.contrib.contenttypes",
+	"django.contrib.sessions",
+	"django.contrib.messages",
+	"django.contrib.staticfiles",
+	"tinymce",
+	"cuser",
+	"modeltranslation",
+	"modeltranslation.tests.testapp",
+)
+
+MIDDLEWARE_CLASSES = (
+	"django.contrib.sessions.middleware.SessionMiddleware",
+	"django.middleware.common.CommonMiddleware",
+	"django.contrib.auth.middleware.AuthenticationMiddleware",
+	"django.contrib.messages.middleware.MessageMiddleware",
+	"cuser.middleware.CuserMiddleware",
+	"modeltranslation.middleware.TranslationMemoMiddleware",
+)
+MIDDLEWARE = MIDDLEWARE_CLASSES
+
+ROOT_URLCONF = "modeltranslation.tests.urls"
+
+# The shared translation cache is disabled; its tests use the translations cache
+CACHES = {
+	"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default"},
+	"translations": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "translations"},
+}
+
+TEMPLATES = [
+	{
+		"BACKEND": "django.template.backends.django.DjangoTemplates",
+		"APP_DIRS": True,
+		"OPTIONS": {
+			"context_processors": [
+				"django.template.context_processors.request",
+				"django.contrib.auth.context_processors.auth",
+				"django.contrib.messages.context_processors.messages",
+			],
+		},
+	},
+]
+
+STATIC_URL = "/static/"
+
+USE_TZ = True
+
+LANGUAGE_CODE = "es"
+
+LANGUAGES = (
+	("es", u"Español"),
+	("en", u"English"),
+	("fr", u"Français"),
+)
+
+IS_MONOLINGUAL = False
+
+# The local translation cache would hide the queries that are measured
+MODELTRANSLATION_CACHE_SIZE = 0
+
+MODELTRANSLATION_METRICS = os.environ.get("MODELTRANSLATION_METRICS") == "1"
+
+MODELTRANSLATION_PROFILER = os.environ.get("MODELTRANSLATION_PROFILER") == "1"
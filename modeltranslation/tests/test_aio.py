@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from unittest import skipIf
+
+from django.test import TransactionTestCase
+
+try:
+	from unittest import mock
+except ImportError:
+	import mock
+
+# The async API needs Python 3.5+ and asgiref
+try:
+	import asyncio
+	from modeltranslation import aio
+except (ImportError, SyntaxError):
+	aio = None
+
+from modeltranslation.backends import get_backend
+from modeltranslation.models import FieldTranslation
+from modeltranslation.tests.helpers import create_translated_events
+from modeltranslation.tests.testapp.models import Event
+from modeltranslation.translation import _get_translated_field
+
+
+########################################################################
+## Async API of the translations
+## Lookups run in other threads with their own connections, so the data must be committed (TransactionTestCase)
+@skipIf(aio is None, "The async API needs Python 3.5+ and asgiref")
+class AsyncTranslationsTest(TransactionTestCase):
+
+	NUM_EVENTS = 3
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=self.NUM_EVENTS)
+		self.loop = asyncio.get_event_loop()
+
+	def run_async(self, coroutine):
+		return self.loop.run_until_complete(coroutine)
+
+	def test_aget_trans_attr(self):
+		event = Event.objects.get(pk=self.events[0].pk)
+		self.assertEqual(self.run_async(aio.aget_trans_attr(event, "name", "en")), u"Event 0 en")
+		# Fuzzy translations fall back to the original value
+		self.assertEqual(self.run_async(event.aget_trans_attr("description", "en")), u"Description 0")
+		# Unsaved objects have no translations
+		self.assertEqual(self.run_async(aio.aget_trans_attr(Event(name=u"New"), "name", "en")), u"New")
+
+	def test_aprefetch_translations(self):
+		events = self.run_async(aio.aprefetch_translations(Event.objects.order_by("pk"), lang="en"))
+		self.assertEqual(len(events), self.NUM_EVENTS)
+		# Prefetched translations are used by the synchronous lookups too
+		with self.assertNumQueries(0):
+			self.assertEqual([_get_translated_field(event, "name", "en") for event in events], [u"{0} en".format(event.name) for event in self.events])
+
+	def test_lookups_do_not_block_the_event_loop(self):
+		backend = get_backend()
+		get_many_translations = backend.get_many_translations
+		loop_is_free = []
+
+		def blocking_get_many_translations(*args, **kwargs):
+			# The event is only set if the event loop can run a callback while the lookup is running
+			loop_ran = threading.Event()
+			self.loop.call_soon_threadsafe(loop_ran.set)
+			loop_is_free.append(loop_ran.wait(5))
+			return get_many_translations(*args, **kwargs)
+
+		with mock.patch.object(backend, "get_many_translations", blocking_get_many_translations):
+			events = self.run_async(aio.aprefetch_translations(self.events, lang="en"))
+		self.assertEqual(loop_is_free, [True])
+		self.assertEqual(_get_translated_field(events[-1], "name", "en"), u"Event 2 en")
+
+	def test_aupdate(self):
+		event = self.events[0]
+		event.name = u"Renamed"
+		event.name_fr = u"Renommé"
+		event.name_fr_is_fuzzy = False
+		trans = self.run_async(aio.aupdate(event, "name", "fr"))
+		self.assertEqual((trans.source_text, trans.translation, trans.is_fuzzy), (u"Renamed", u"Renommé", False))
+		stored_trans = FieldTranslation.objects.get(content_type_id=FieldTranslation.get_object_content_type_id(event), object_id=event.id, field="name", lang="fr")
+		self.assertEqual((stored_trans.translation, stored_trans.is_fuzzy), (u"Renommé", False))
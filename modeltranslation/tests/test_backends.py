@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+try:
+	from unittest import mock
+except ImportError:
+	import mock
+
+from modeltranslation.backends import ObjectTranslationBackend, RowTranslationBackend
+from modeltranslation.models import FieldTranslation, ObjectTranslation
+from modeltranslation.tests.helpers import create_translated_events
+from modeltranslation.tests.testapp.models import Event
+from modeltranslation.transcache import TransCache
+from modeltranslation.translation import _get_translated_field
+
+
+########################################################################
+## Storage backends of translations
+class TranslationBackendTest(TestCase):
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=3)
+		self.keys = [TransCache.instance_key(event) for event in self.events] + [TransCache.instance_key(self.events[0].area)]
+		call_command("sync_object_translations", stdout=StringIO())
+
+	def test_row_translations(self):
+		with self.assertNumQueries(1):
+			translations_by_key = RowTranslationBackend().get_many_translations(self.keys)
+		self.assertEqual(translations_by_key[self.keys[0]][("name", "en")], (u"Event 0 en", False))
+		self.assertEqual(translations_by_key[self.keys[-1]][("name", "en")], (u"Area en", False))
+		self.assertEqual(translations_by_key[self.keys[0]][("description", "fr")], (u"", True))
+
+	def test_both_backends_return_the_same_translations(self):
+		row_backend, object_backend = RowTranslationBackend(), ObjectTranslationBackend()
+		for kwargs in ({}, {"lang": "en"}, {"lang": ["en", "fr"]}, {"fields": ["name"]}):
+			with self.assertNumQueries(1):
+				object_translations = object_backend.get_many_translations(self.keys, **kwargs)
+			self.assertEqual(object_translations, row_backend.get_many_translations(self.keys, **kwargs))
+		self.assertEqual(object_backend.get_translations(self.keys[1], lang="en"), row_backend.get_translations(self.keys[1], lang="en"))
+
+	def test_objects_without_translations(self):
+		key = (Event.__module__, Event.__name__, self.events[-1].id + 1)
+		for backend in (RowTranslationBackend(), ObjectTranslationBackend()):
+			self.assertEqual(backend.get_many_translations([key]), {key: {}})
+			with self.assertNumQueries(0):
+				self.assertEqual(backend.get_many_translations([]), {})
+
+	def test_object_translations_are_written(self):
+		with mock.patch("modeltranslation.backends._backend", ObjectTranslationBackend()):
+			# Saved translations
+			trans = FieldTranslation.objects.get(content_type_id=FieldTranslation.get_object_content_type_id(self.events[0]), object_id=self.events[0].id, field="name", lang="en")
+			trans.translation = u"Saved"
+			trans.save()
+			# Translations of saved objects
+			self.events[1].name_en = u"Object saved"
+			self.events[1].save()
+			object_translations = ObjectTranslationBackend().get_many_translations(self.keys[:2], lang="en")
+			self.assertEqual(object_translations[self.keys[0]][("name", "en")], (u"Saved", False))
+			self.assertEqual(object_translations[self.keys[1]][("name", "en")], (u"Object saved", False))
+			self.assertEqual(_get_translated_field(Event.objects.get(pk=self.events[0].pk), "name", "en"), u"Saved")
+
+
+########################################################################
+## sync_object_translations command
+class SyncObjectTranslationsTest(TestCase):
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=3)
+		self.keys = [TransCache.instance_key(event) for event in self.events]
+
+	def call_command(self, *args):
+		stdout, stderr = StringIO(), StringIO()
+		call_command("sync_object_translations", *args, chunk_size=2, stdout=stdout, stderr=stderr)
+		return stdout.getvalue(), stderr.getvalue()
+
+	def test_backfill(self):
+		stdout, _ = self.call_command()
+		num_objects = len(self.events) + 1
+		self.assertIn(u"{0} objects written".format(num_objects), stdout)
+		self.assertEqual(ObjectTranslation.objects.count(), 2 * num_objects)
+		self.assertEqual(ObjectTranslationBackend().get_many_translations(self.keys), RowTranslationBackend().get_many_translations(self.keys))
+
+	def test_verify_and_fix(self):
+		self.call_command()
+		FieldTranslation.objects.filter(content_type_id=FieldTranslation.get_object_content_type_id(self.events[0]), object_id=self.events[0].id, lang="en").update(translation=u"Changed")
+		stdout, stderr = self.call_command("--verify")
+		self.assertIn(u"1 inconsistent", stdout)
+		self.assertIn(u"{0}.{1} {2}".format(*self.keys[0]), stderr)
+		self.call_command("--verify", "--fix")
+		stdout, _ = self.call_command("--verify")
+		self.assertIn(u"0 inconsistent", stdout)
+		self.assertEqual(ObjectTranslationBackend().get_translations(self.keys[0], lang="en")[("name", "en")], (u"Changed", False))
+
+	def test_verify_denormalized_orphans(self):
+		self.call_command()
+		# Translations of an object that are only in ObjectTranslation
+		FieldTranslation.objects.filter(content_type_id=FieldTranslation.get_object_content_type_id(self.events[0]), object_id=self.events[0].id).delete()
+		stdout, stderr = self.call_command("--verify")
+		self.assertIn(u"1 inconsistent", stdout)
+		self.assertIn(u"{0}.{1} {2}".format(*self.keys[0]), stderr)
+		self.call_command("--verify", "--fix")
+		self.assertFalse(ObjectTranslation.objects.filter(object_id=self.events[0].id, model=u"Event").exists())
+		stdout, _ = self.call_command("--verify")
+		self.assertIn(u"0 inconsistent", stdout)
+
+	def test_objects_are_read_in_index_order(self):
+		with CaptureQueriesContext(connection) as queries:
+			self.call_command()
+		table = connection.ops.quote_name(FieldTranslation._meta.db_table)
+		keys_sql = [query["sql"] for query in queries.captured_queries if u"FROM {0}".format(table) in query["sql"] and u"ORDER BY" in query["sql"]][0]
+		self.assertIn(u"ORDER BY {0}.{1} ASC, {0}.{2} ASC".format(table, connection.ops.quote_name("content_type_id"), connection.ops.quote_name("object_id")), keys_sql)
+
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+from django.template import Context, Template
+from django.test import TestCase
+from django.utils import translation
+
+try:
+	from unittest import mock
+except ImportError:
+	import mock
+
+from modeltranslation.tests.helpers import create_translated_events, translate
+from modeltranslation.tests.testapp.models import Event
+from modeltranslation.translation import _fallback_chains, _get_translated_field, get_fallback_languages, prefetch_translations
+
+
+########################################################################
+## Language fallback chains
+class FallbackLanguagesTest(TestCase):
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=2)
+		# French falls back to English
+		for patch in (mock.patch.dict(_fallback_chains, clear=True), mock.patch.dict("modeltranslation.translation.FALLBACK_LANGUAGES", {"fr": ["en"]})):
+			patch.start()
+			self.addCleanup(patch.stop)
+
+	def test_chains(self):
+		self.assertEqual(get_fallback_languages("fr"), ["fr", "en"])
+		# Regional languages fall back to their generic language
+		self.assertEqual(get_fallback_languages("en-gb"), ["en-gb", "en"])
+		# Chains end before the default language
+		self.assertEqual(get_fallback_languages("es-ar"), ["es-ar"])
+		self.assertEqual(get_fallback_languages("es"), [])
+		with mock.patch.dict("modeltranslation.translation.FALLBACK_LANGUAGES", {"fr": ["es", "en"]}):
+			_fallback_chains.clear()
+			self.assertEqual(get_fallback_languages("fr"), ["fr"])
+
+	def test_translated_field(self):
+		translate(self.events[1], "name", "fr", u"Event 1 fr")
+		# All the languages of the chain are read with one query
+		with self.assertNumQueries(1):
+			self.assertEqual(_get_translated_field(self.events[0], "name", "fr"), u"Event 0 en")
+		self.assertEqual(_get_translated_field(self.events[1], "name", "fr"), u"Event 1 fr")
+		# Fuzzy translations in all the chain fall back to the source text
+		self.assertEqual(_get_translated_field(self.events[0], "description", "fr"), u"Description 0")
+
+	def test_prefetch_translations(self):
+		with self.assertNumQueries(1):
+			prefetch_translations(self.events, lang="fr")
+		with self.assertNumQueries(0):
+			self.assertEqual([_get_translated_field(event, "name", "fr") for event in self.events], [u"Event 0 en", u"Event 1 en"])
+
+	def test_template_filter(self):
+		with translation.override("fr"):
+			output = Template(u"{% load modeltranslation_tags %}{{ event|_:\"name\" }}").render(Context({"event": self.events[0]}))
+		self.assertEqual(output, u"Event 0 en")
+
+	def test_translated_annotation(self):
+		translate(self.events[1], "name", "fr", u"Event 1 fr")
+		events = Event.objects.with_translation("name", "fr").order_by("pk")
+		self.assertEqual([event.name_fr_translated for event in events], [u"Event 0 en", u"Event 1 fr"])
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.six import StringIO
+
+try:
+	from unittest import mock
+except ImportError:
+	import mock
+
+from modeltranslation import jobs
+from modeltranslation.models import FieldTranslation, TranslationJob
+from modeltranslation.tests.helpers import bulk_create_areas, bulk_create_events, model_translations
+from modeltranslation.tests.testapp.models import Area, Event
+
+
+########################################################################
+## Interrupts a job after some chunks
+class Interruption(Exception):
+	pass
+
+
+def interrupt_after(num_chunks):
+	messages = []
+
+	def progress(message):
+		messages.append(message)
+		if len(messages) == num_chunks:
+			raise Interruption()
+	return progress
+
+
+########################################################################
+## Maintenance jobs of the translations
+class TranslationJobsTest(TestCase):
+
+	def setUp(self):
+		bulk_create_events(num_events=6)
+		bulk_create_areas()
+		self.event_key = (Event.__module__, Event.__name__)
+
+	def call_command(self, name, *args, **options):
+		stdout = StringIO()
+		call_command(name, *args, stdout=stdout, **options)
+		return stdout.getvalue()
+
+	def test_update_translations_command(self):
+		output = self.call_command("update_translations", "--model", "testapp.Event", "--lang", "en", "--chunk-size", "2")
+		# Progress of each chunk
+		self.assertEqual(output.count(u"{0}.{1}: objects up to pk".format(*self.event_key)), 3)
+		self.assertIn(u"12 translations created", output)
+		self.assertEqual(set(model_translations(Event).values_list("lang", flat=True)), set(["en"]))
+		self.assertFalse(model_translations(Area).exists())
+		job = TranslationJob.objects.get(name=jobs.UPDATE_TRANSLATIONS)
+		self.assertEqual((job.status, job.checkpoint, job.lock_owner), (TranslationJob.IDLE, "{}", ""))
+
+	def test_delete_orphan_translations_command(self):
+		FieldTranslation.update_translations()
+		Event.objects.filter(name__in=[u"Event 0", u"Event 1"]).delete()
+		Area.objects.all().delete()
+		output = self.call_command("delete_orphan_translations", "--model", "testapp.Event")
+		self.assertIn(u"8 orphan translations deleted", output)
+		self.assertTrue(model_translations(Area).exists())
+
+	def test_unknown_model(self):
+		with self.assertRaises(CommandError):
+			self.call_command("update_translations", "--model", "testapp.Removed")
+
+	def test_lock(self):
+		TranslationJob.objects.create(name=jobs.UPDATE_TRANSLATIONS, status=TranslationJob.RUNNING, lock_owner=u"other:1", lock_datetime=timezone.now())
+		with self.assertRaises(CommandError):
+			self.call_command("update_translations")
+		self.assertFalse(model_translations(Event).exists())
+		# The lock can be taken by force
+		self.call_command("update_translations", "--force")
+		self.assertTrue(model_translations(Event).exists())
+
+	def test_abandoned_lock(self):
+		lock_datetime = timezone.now() - timedelta(seconds=jobs.LOCK_TIMEOUT + 1)
+		TranslationJob.objects.create(name=jobs.UPDATE_TRANSLATIONS, status=TranslationJob.RUNNING, lock_owner=u"other:1", lock_datetime=lock_datetime)
+		jobs.update_translations()
+		self.assertTrue(model_translations(Event).exists())
+
+	def test_resume(self):
+		with self.assertRaises(Interruption):
+			jobs.update_translations(chunk_size=2, models=["testapp.Event"], progress=interrupt_after(1))
+		job = TranslationJob.objects.get(name=jobs.UPDATE_TRANSLATIONS)
+		self.assertEqual(job.status, TranslationJob.IDLE)
+		self.assertIn(u"{0}.{1}".format(*self.event_key), json.loads(job.checkpoint)["last_ids"])
+		num_languages = len(set(model_translations(Event).values_list("lang", flat=True)))
+		# The objects of the first chunk are not read again and the counts include them
+		with mock.patch.object(FieldTranslation, "_update_chunk_translations", wraps=FieldTranslation._update_chunk_translations) as update_chunk:
+			counts = jobs.update_translations(chunk_size=2, models=["testapp.Event"])
+		self.assertEqual(update_chunk.call_count, 2)
+		self.assertEqual(counts[self.event_key]["created"], 6 * 2 * num_languages)
+		self.assertEqual(TranslationJob.objects.get(name=jobs.UPDATE_TRANSLATIONS).checkpoint, "{}")
+
+	def test_restart(self):
+		with self.assertRaises(Interruption):
+			jobs.update_translations(chunk_size=2, models=["testapp.Event"], progress=interrupt_after(1))
+		counts = jobs.update_translations(chunk_size=2, models=["testapp.Event"], restart=True)
+		# The translations of the first chunk already exist
+		self.assertEqual(counts[self.event_key]["created"], 4 * 2 * len(set(model_translations(Event).values_list("lang", flat=True))))
+
+	def test_enqueue_and_run_pending_jobs(self):
+		self.assertTrue(jobs.enqueue_job(jobs.UPDATE_TRANSLATIONS, {"models": ["testapp.Event"]}))
+		self.assertEqual(TranslationJob.objects.get(name=jobs.UPDATE_TRANSLATIONS).status, TranslationJob.PENDING)
+		self.assertFalse(model_translations(Event).exists())
+		output = self.call_command("run_translation_jobs")
+		self.assertIn(u"1 jobs run", output)
+		self.assertTrue(model_translations(Event).exists())
+		self.assertFalse(model_translations(Area).exists())
+		self.assertEqual(TranslationJob.objects.get(name=jobs.UPDATE_TRANSLATIONS).status, TranslationJob.IDLE)
+
+	def test_running_jobs_are_not_enqueued(self):
+		TranslationJob.objects.create(name=jobs.UPDATE_TRANSLATIONS, status=TranslationJob.RUNNING, lock_owner=u"other:1", lock_datetime=timezone.now())
+		self.assertFalse(jobs.enqueue_job(jobs.UPDATE_TRANSLATIONS))
+
+	def test_job_launcher(self):
+		launcher = mock.Mock()
+		with mock.patch("modeltranslation.jobs.JOB_LAUNCHER", "launcher"), mock.patch("modeltranslation.jobs.import_string", return_value=launcher):
+			jobs.enqueue_job(jobs.DELETE_ORPHAN_TRANSLATIONS, {"stale": True})
+		launcher.assert_called_once_with(jobs.DELETE_ORPHAN_TRANSLATIONS, {"stale": True})
+
+	def test_admin_view_only_enqueues(self):
+		self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "admin"))
+		response = self.client.get(reverse("modeltranslation:update_translations_url"))
+		self.assertEqual(response.status_code, 200)
+		self.assertFalse(FieldTranslation.objects.exists())
+		self.assertEqual(
+			set(TranslationJob.objects.filter(status=TranslationJob.PENDING).values_list("name", flat=True)),
+			set([jobs.UPDATE_TRANSLATIONS, jobs.DELETE_ORPHAN_TRANSLATIONS])
+		)
+
+	def test_orphan_deletion_entry_points_honor_the_lock(self):
+		# Every command that deletes orphan translations runs the job, so none of them can overlap a locked run
+		TranslationJob.objects.create(name=jobs.DELETE_ORPHAN_TRANSLATIONS, status=TranslationJob.RUNNING, lock_owner=u"other:1", lock_datetime=timezone.now())
+		commands = [
+			("delete_orphan_translations",),
+			("export_translations", "en", "--delete-orphans"),
+			("import_translations", "en", "missing.po", "--delete-orphans"),
+		]
+		with mock.patch.object(FieldTranslation, "delete_orphan_translations") as delete_orphan_translations:
+			for command in commands:
+				with self.assertRaises(CommandError):
+					self.call_command(*command)
+		self.assertFalse(delete_orphan_translations.called)
+
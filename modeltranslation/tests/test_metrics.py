@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+from django.test import SimpleTestCase
+
+from modeltranslation import metrics
+
+
+########################################################################
+## Metrics sink and instrumentation helpers
+class MetricsTest(SimpleTestCase):
+
+	def setUp(self):
+		self.enabled = metrics.ENABLED
+		self.sink = metrics.MemoryMetricsSink(buckets=(0.1, 1))
+		self._sink = metrics._sink
+		metrics._sink = self.sink
+
+	def tearDown(self):
+		metrics.ENABLED = self.enabled
+		metrics._sink = self._sink
+
+	def function(self):
+		return 42
+
+	def test_disabled_metrics_are_not_instrumented(self):
+		metrics.ENABLED = False
+		function = self.function
+		self.assertIs(metrics.timed("modeltranslation_test_seconds")(function), function)
+		metrics.increment("modeltranslation_test_total")
+		with metrics.timer("modeltranslation_test_seconds"):
+			pass
+		self.assertEqual(self.sink.render_prometheus(), u"\n")
+
+	def test_enabled_metrics(self):
+		metrics.ENABLED = True
+		received = []
+		receiver = lambda sender, **kwargs: received.append(kwargs["name"])
+		metrics.counter_incremented.connect(receiver)
+		metrics.timing_observed.connect(receiver)
+		try:
+			self.assertEqual(metrics.timed("modeltranslation_test_seconds", job="test")(self.function)(), 42)
+			metrics.increment("modeltranslation_test_total", 2, cache="local")
+		finally:
+			metrics.counter_incremented.disconnect(receiver)
+			metrics.timing_observed.disconnect(receiver)
+		self.assertEqual(received, ["modeltranslation_test_seconds", "modeltranslation_test_total"])
+
+		output = self.sink.render_prometheus()
+		self.assertIn(u'# TYPE modeltranslation_test_total counter\nmodeltranslation_test_total{cache="local"} 2\n', output)
+		self.assertIn(u'# TYPE modeltranslation_test_seconds histogram\n', output)
+		self.assertIn(u'modeltranslation_test_seconds_bucket{job="test",le="+Inf"} 1\n', output)
+		self.assertIn(u'modeltranslation_test_seconds_count{job="test"} 1\n', output)
+
+	def test_histogram_buckets_are_cumulative(self):
+		for seconds in (0.05, 0.5, 5):
+			self.sink.observe("modeltranslation_test_seconds", seconds, {})
+		output = self.sink.render_prometheus()
+		self.assertIn(u'modeltranslation_test_seconds_bucket{le="0.1"} 1\n', output)
+		self.assertIn(u'modeltranslation_test_seconds_bucket{le="1.0"} 2\n', output)
+		self.assertIn(u'modeltranslation_test_seconds_bucket{le="+Inf"} 3\n', output)
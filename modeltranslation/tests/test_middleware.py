@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.utils import translation
+
+from modeltranslation.middleware import TranslationMemoMiddleware
+from modeltranslation.models import FieldTranslation
+from modeltranslation.tests.helpers import create_translated_events
+from modeltranslation.tests.testapp.models import Event
+from modeltranslation.transcache import RequestTransCache, TransCache
+
+
+########################################################################
+## Store of the translations of a request
+class RequestTransCacheTest(SimpleTestCase):
+
+	def tearDown(self):
+		RequestTransCache.end()
+
+	def test_outside_requests(self):
+		self.assertFalse(RequestTransCache.is_active())
+		self.assertFalse(RequestTransCache.set(("m", "A", 1), "en", {"name": u"A"}))
+		self.assertIsNone(RequestTransCache.get(("m", "A", 1), "en"))
+
+	def test_request_store(self):
+		RequestTransCache.start()
+		self.assertTrue(RequestTransCache.set(("m", "A", 1), "en", {"name": u"A", "description": None}))
+		self.assertEqual(RequestTransCache.get(("m", "A", 1), "en"), {"name": u"A", "description": None})
+		self.assertIsNone(RequestTransCache.get(("m", "A", 1), "fr"))
+		RequestTransCache.delete_many([("m", "A", 1)])
+		self.assertIsNone(RequestTransCache.get(("m", "A", 1), "en"))
+		# Entries don't outlive their request
+		RequestTransCache.set(("m", "A", 1), "en", {"name": u"A"})
+		RequestTransCache.end()
+		RequestTransCache.start()
+		self.assertIsNone(RequestTransCache.get(("m", "A", 1), "en"))
+
+
+########################################################################
+## Memoization of the _ template filter during each request
+class TranslationMemoMiddlewareTest(TestCase):
+
+	TEMPLATE = u"{% load modeltranslation_tags %}{{ header|_:\"name\" }}|{{ body|_:\"name\" }}|{{ body|_:\"description\" }}|{{ footer|_:\"description\" }}"
+
+	def setUp(self):
+		self.event = create_translated_events(num_events=1)[0]
+		self.request = RequestFactory().get("/")
+
+	def render(self):
+		# Each instance of the object is a different Python object
+		events = [Event.objects.get(pk=self.event.pk) for _ in range(3)]
+		with self.assertNumQueries(1), translation.override("en"):
+			return Template(self.TEMPLATE).render(Context(dict(zip(("header", "body", "footer"), events))))
+
+	def test_one_query_per_object(self):
+		output = []
+
+		def view(request):
+			output.append(self.render())
+			return HttpResponse()
+
+		TranslationMemoMiddleware(view)(self.request)
+		# Fuzzy translations are negative entries: their source text is rendered without querying again
+		self.assertEqual(output, [u"Event 0 en|Event 0 en|Description 0|Description 0"])
+		self.assertFalse(RequestTransCache.is_active())
+
+	def test_old_style_middleware(self):
+		middleware = TranslationMemoMiddleware()
+		middleware.process_request(self.request)
+		self.assertTrue(RequestTransCache.is_active())
+		self.assertEqual(self.render(), u"Event 0 en|Event 0 en|Description 0|Description 0")
+		middleware.process_response(self.request, HttpResponse())
+		self.assertFalse(RequestTransCache.is_active())
+
+	def test_saved_translations_are_invalidated(self):
+		RequestTransCache.start()
+		self.addCleanup(RequestTransCache.end)
+		self.render()
+		trans = FieldTranslation.objects.get(content_type_id=FieldTranslation.get_object_content_type_id(self.event), object_id=self.event.id, field="name", lang="en")
+		trans.translation = u"New name"
+		trans.save()
+		self.assertIsNone(RequestTransCache.get(TransCache.instance_key(self.event), "en"))
+		self.assertTrue(self.render().startswith(u"New name|"))
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+
+import importlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.six import StringIO
+
+try:
+	from unittest import mock
+except ImportError:
+	import mock
+
+from modeltranslation.models import checksum, md5_checksum, FieldTranslation, ObjectTranslation, _bulk_update
+from modeltranslation.pofile import generate_po, import_po
+from modeltranslation.tests.helpers import bulk_create_events, create_events, LocalCacheMixin, model_translations, translate
+from modeltranslation.tests.testapp.models import Area, Event
+from modeltranslation.translation import _get_translated_field
+
+
+########################################################################
+## delete_orphan_translations
+class DeleteOrphanTranslationsTest(TestCase):
+
+	def setUp(self):
+		self.area = Area.objects.create(name=u"Area")
+		self.events = create_events(num_events=4, area=self.area)
+		self.num_translations_by_event = model_translations(Event).filter(object_id=self.events[0].id).count()
+		self.event_key = (Event.__module__, Event.__name__)
+
+	def test_orphans_are_deleted(self):
+		Event.objects.filter(pk__in=[self.events[0].pk, self.events[1].pk]).delete()
+		num_deleted = FieldTranslation.delete_orphan_translations()
+		self.assertEqual(num_deleted[self.event_key], 2 * self.num_translations_by_event)
+		self.assertEqual(set(model_translations(Event).values_list("object_id", flat=True)), set([self.events[2].id, self.events[3].id]))
+		# Translations of other models are kept
+		self.assertTrue(model_translations(Area).filter(object_id=self.area.id).exists())
+
+	def test_condition(self):
+		FieldTranslation.delete_orphan_translations(condition={"name": u"Event 3"})
+		self.assertEqual(set(model_translations(Event).values_list("object_id", flat=True)), set([self.events[3].id]))
+
+	def test_deleted_translations_are_not_read(self):
+		translate(self.events[0], "name", "en", u"Event 0 en")
+		self.assertEqual(_get_translated_field(Event.objects.get(pk=self.events[0].pk), "name", "en"), u"Event 0 en")
+		FieldTranslation.delete_orphan_translations(condition={"name": u"Event 3"})
+		self.assertEqual(_get_translated_field(Event.objects.get(pk=self.events[0].pk), "name", "en"), u"Event 0")
+
+	def test_chunks_and_callback(self):
+		Event.objects.all().delete()
+		ranges = []
+		callback = lambda model_key, last_id, num_deleted: ranges.append((model_key, last_id, num_deleted))
+		num_deleted = FieldTranslation.delete_orphan_translations(chunk_size=2, callback=callback)
+		event_ranges = [(last_id, num) for model_key, last_id, num in ranges if model_key == self.event_key]
+		self.assertEqual(sum(num for last_id, num in event_ranges), num_deleted[self.event_key])
+		self.assertGreater(len(event_ranges), 1)
+		self.assertFalse(model_translations(Event).exists())
+
+	def test_resume(self):
+		Event.objects.all().delete()
+		translations = list(model_translations(Event).order_by("id").values_list("id", flat=True))
+		start_id = translations[len(translations) // 2]
+		FieldTranslation.delete_orphan_translations(start_ids={self.event_key: start_id})
+		self.assertEqual(list(model_translations(Event).order_by("id").values_list("id", flat=True)), [trans_id for trans_id in translations if trans_id <= start_id])
+
+	def test_languages_and_models(self):
+		Event.objects.all().delete()
+		self.area.delete()
+		FieldTranslation.delete_orphan_translations(model_keys=[self.event_key], languages=["en"])
+		self.assertEqual(set(model_translations(Event).values_list("lang", flat=True)), set(["fr"]))
+		self.assertTrue(model_translations(Area).exists())
+
+	def test_models_without_content_type(self):
+		# Translations of two removed models whose content types could not be resolved
+		model_translations(Event).filter(object_id=self.events[0].id).update(content_type=None, module=u"gone.models", model=u"A")
+		model_translations(Event).filter(object_id=self.events[1].id).update(content_type=None, module=u"gone.models", model=u"B")
+		num_deleted = FieldTranslation.delete_orphan_translations()
+		self.assertEqual(num_deleted[(u"gone.models", u"A")], self.num_translations_by_event)
+		self.assertEqual(num_deleted[(u"gone.models", u"B")], self.num_translations_by_event)
+		self.assertFalse(FieldTranslation.objects.filter(content_type__isnull=True).exists())
+		self.assertEqual(set(model_translations(Event).values_list("object_id", flat=True)), set([self.events[2].id, self.events[3].id]))
+
+	def test_object_translations_are_deleted(self):
+		ObjectTranslation.objects.create(module=Event.__module__, model=Event.__name__, object_id=self.events[0].id, lang="en", last_update_datetime=timezone.now())
+		self.events[0].delete()
+		FieldTranslation.delete_orphan_translations()
+		self.assertFalse(ObjectTranslation.objects.exists())
+
+	def test_rows_are_selected_by_content_type(self):
+		# FieldTranslation is indexed by content type, not by module and model names
+		Event.objects.all().delete()
+		with CaptureQueriesContext(connection) as queries:
+			FieldTranslation.delete_orphan_translations()
+		table = FieldTranslation._meta.db_table
+		deletes = [query["sql"] for query in queries.captured_queries if query["sql"].startswith(u"DELETE") and table in query["sql"]]
+		self.assertTrue(deletes)
+		for sql in deletes:
+			self.assertIn(u"content_type_id", sql)
+			self.assertNotIn(connection.ops.quote_name("module"), sql)
+
+
+########################################################################
+## delete_orphan_translations with the default local translation cache
+class DeleteOrphanTranslationsLocalCacheTest(LocalCacheMixin, DeleteOrphanTranslationsTest):
+	pass
+
+
+########################################################################
+## update_translations
+class UpdateTranslationsTest(TestCase):
+
+	def setUp(self):
+		bulk_create_events(num_events=5)
+		self.event_key = (Event.__module__, Event.__name__)
+		self.num_languages = len(settings.LANGUAGES) - 1
+
+	def test_missing_translations_are_created(self):
+		num_translations = FieldTranslation.update_translations_by_model(model_keys=[self.event_key])
+		self.assertEqual(num_translations[self.event_key]["created"], 5 * 2 * self.num_languages)
+		self.assertEqual(model_translations(Event).count(), 5 * 2 * self.num_languages)
+		self.assertFalse(model_translations(Event).filter(is_fuzzy=False).exists())
+
+	def test_unchanged_translations_are_not_written(self):
+		FieldTranslation.update_translations()
+		# Existing translations of the chunk are read with one query and nothing is written
+		with self.assertNumQueries(2):
+			num_translations = FieldTranslation.update_translations_by_model(model_keys=[self.event_key])
+		self.assertEqual(num_translations[self.event_key], {"created": 0, "updated": 0, "reused": 0})
+
+	def test_changed_source_texts_are_updated(self):
+		FieldTranslation.update_translations()
+		event = Event.objects.order_by("pk")[0]
+		model_translations(Event).filter(object_id=event.id, field="name", lang="en").update(translation=u"Event en", is_fuzzy=False)
+		# Updates without signals
+		Event.objects.filter(pk=event.pk).update(name=u"Renamed")
+		num_translations = FieldTranslation.update_translations_by_model(model_keys=[self.event_key])
+		self.assertEqual(num_translations[self.event_key], {"created": 0, "updated": self.num_languages, "reused": 0})
+		trans = model_translations(Event).get(object_id=event.id, field="name", lang="en")
+		self.assertEqual((trans.source_text, trans.source_checksum, trans.translation), (u"Renamed", checksum(u"Renamed"), u"Event en"))
+
+	def test_chunks_languages_and_start_pks(self):
+		events = list(Event.objects.order_by("pk"))
+		chunks = []
+		FieldTranslation.update_translations_by_model(
+			chunk_size=2, model_keys=[self.event_key], languages=["en"], start_pks={self.event_key: events[0].pk},
+			callback=lambda model_key, last_pk, counts: chunks.append((last_pk, counts["created"]))
+		)
+		self.assertEqual(chunks, [(events[2].pk, 4), (events[4].pk, 4)])
+		self.assertEqual(set(model_translations(Event).values_list("lang", flat=True)), set(["en"]))
+		self.assertFalse(model_translations(Event).filter(object_id=events[0].pk).exists())
+
+
+########################################################################
+## Source model of the translations
+class SourceModelTest(TestCase):
+
+	def test_source_model_by_content_type(self):
+		create_events(num_events=1)
+		trans = model_translations(Event).first()
+		# The content type is used, not the names of the module and the model
+		trans.model = u"Renamed"
+		self.assertIs(trans.get_source_model(), Event)
+
+	def test_source_model_without_content_type(self):
+		create_events(num_events=1)
+		trans = model_translations(Event).first()
+		trans.content_type = None
+		self.assertIs(trans.get_source_model(), Event)
+
+
+########################################################################
+## Migration that sets the content type of the existing translations
+class FillContentTypesMigrationTest(TestCase):
+
+	def setUp(self):
+		self.migration = importlib.import_module("modeltranslation.migrations.0011_fill_fieldtranslation_content_type")
+		self.apps = MigrationLoader(connection).project_state().apps
+		create_events(num_events=2, area=Area.objects.create(name=u"Area"))
+		FieldTranslation.objects.update(content_type=None)
+
+	def fill_content_types(self):
+		with connection.schema_editor() as schema_editor:
+			self.migration.fill_content_types(self.apps, schema_editor)
+
+	def test_content_types(self):
+		num_content_types = ContentType.objects.count()
+		self.fill_content_types()
+		self.assertFalse(FieldTranslation.objects.filter(content_type__isnull=True).exists())
+		for model in (Event, Area):
+			content_type = ContentType.objects.get_for_model(model)
+			self.assertEqual(content_type.app_label, u"testapp")
+			self.assertEqual(
+				FieldTranslation.objects.filter(module=model.__module__, model=model.__name__).exclude(content_type=content_type).count(), 0
+			)
+		# Existing content types are used
+		self.assertEqual(ContentType.objects.count(), num_content_types)
+
+	def test_unresolved_models(self):
+		FieldTranslation.objects.filter(model="Area").update(module=u"removed.models")
+		self.fill_content_types()
+		# Translations of models that can't be found are set aside, the other ones are updated
+		self.assertEqual(set(FieldTranslation.objects.filter(content_type__isnull=True).values_list("module", flat=True)), set([u"removed.models"]))
+		self.assertFalse(FieldTranslation.objects.filter(model="Event", content_type__isnull=True).exists())
+		# and they are deleted as orphans
+		num_deleted = FieldTranslation.delete_orphan_translations()
+		self.assertGreater(num_deleted[(u"removed.models", u"Area")], 0)
+		self.assertFalse(FieldTranslation.objects.filter(content_type__isnull=True).exists())
+
+
+########################################################################
+## Checksums of the source texts
+class ChecksumTest(SimpleTestCase):
+
+	def test_checksum(self):
+		# Checksums are the same in all the interpreters
+		self.assertEqual(checksum(u"Event 0"), -2817577175016781432)
+		self.assertEqual(checksum(u"F\u00eate"), 3826796366101337765)
+		self.assertEqual(checksum(u"F\u00eate".encode("utf-8")), checksum(u"F\u00eate"))
+
+	def test_migration_checksum(self):
+		migration = importlib.import_module("modeltranslation.migrations.0014_fill_fieldtranslation_source_checksum")
+		for value in (u"", u"Event 0", u"F\u00eate"):
+			self.assertEqual(migration.checksum(value), checksum(value))
+
+	def test_unavailable_algorithm(self):
+		with mock.patch("modeltranslation.models.CHECKSUM_ALGORITHM", "unavailable"), mock.patch("modeltranslation.models._checksum_digest", None):
+			with self.assertRaises(ImproperlyConfigured):
+				checksum(u"Event 0")
+
+
+########################################################################
+## Migration that replaces the MD5 of the source texts by their checksum
+class FillSourceChecksumsMigrationTest(TestCase):
+
+	def setUp(self):
+		self.migration = importlib.import_module("modeltranslation.migrations.0014_fill_fieldtranslation_source_checksum")
+		self.apps = MigrationLoader(connection).project_state().apps
+		self.events = create_events(num_events=2)
+		for source_text in (u"Event 0", u"Event 1", u"Description 0", u"Description 1"):
+			FieldTranslation.objects.filter(source_text=source_text).update(source_checksum=None, source_md5=md5_checksum(source_text))
+
+	def test_checksums(self):
+		with connection.schema_editor() as schema_editor:
+			self.migration.fill_source_checksums(self.apps, schema_editor)
+		self.assertFalse(FieldTranslation.objects.filter(source_checksum__isnull=True).exists())
+		for trans in model_translations(Event):
+			self.assertEqual((trans.source_checksum, trans.source_md5), (checksum(trans.source_text), u""))
+
+	def test_legacy_checksums_are_not_changes(self):
+		num_translations = FieldTranslation.update_translations_by_model(model_keys=[(Event.__module__, Event.__name__)])
+		self.assertEqual(num_translations[(Event.__module__, Event.__name__)], {"created": 0, "updated": 0, "reused": 0})
+		# Their checksums are converted
+		self.assertFalse(model_translations(Event).filter(source_checksum__isnull=True).exists())
+
+
+########################################################################
+## Translation memory
+class TranslationMemoryTest(TestCase):
+
+	def setUp(self):
+		event = Event.objects.create(name=u"Concert", description=u"A concert")
+		model_translations(Event).filter(object_id=event.id, field="name", lang="en").update(translation=u"Concert en", is_fuzzy=False)
+		self.event = Event.objects.create(name=u"Concert", description=u"Another concert")
+
+	def translation(self, field="name", lang="en"):
+		return model_translations(Event).get(object_id=self.event.id, field=field, lang=lang)
+
+	def test_new_translations_are_filled(self):
+		trans = self.translation()
+		self.assertEqual((trans.translation, trans.is_fuzzy, trans.is_from_memory), (u"Concert en", False, True))
+		# Only reviewed translations of the same source text are reused
+		self.assertEqual((self.translation(lang="fr").translation, self.translation(lang="fr").is_from_memory), (u"", False))
+		self.assertFalse(self.translation(field="description").is_from_memory)
+
+	def test_bulk_update_translations(self):
+		Event.objects.bulk_create([Event(name=u"Concert", description=u"A third concert")])
+		num_translations = FieldTranslation.update_translations_by_model(model_keys=[(Event.__module__, Event.__name__)])
+		self.assertEqual(num_translations[(Event.__module__, Event.__name__)]["reused"], 1)
+
+	def test_report(self):
+		stdout = StringIO()
+		call_command("translation_memory_report", words_per_hour=2, stdout=stdout)
+		self.assertEqual(FieldTranslation.translation_memory_report(words_per_hour=2), {"en": {"translations": 1, "words": 1, "hours": 0.5}})
+		self.assertIn(u"en: 1 translations, 1 words, 0.5 hours", stdout.getvalue())
+
+	def test_edited_translations_are_not_from_memory(self):
+		trans = self.translation()
+		trans.is_fuzzy = True
+		trans.save()
+		self.assertTrue(self.translation().is_from_memory)
+		trans.translation = u"Edited concert"
+		trans.save()
+		self.assertFalse(self.translation().is_from_memory)
+
+	def test_translations_edited_in_objects_are_not_from_memory(self):
+		self.event.name_en = u"Edited concert"
+		self.event.save()
+		self.assertFalse(self.translation().is_from_memory)
+
+	def test_imported_translations_are_not_from_memory(self):
+		po_content = u"".join(generate_po("en")).replace(u"msgstr \"Concert en\"", u"msgstr \"Imported concert\"")
+		import_po(po_content.splitlines(True), "en")
+		trans = self.translation()
+		self.assertEqual((trans.translation, trans.is_from_memory), (u"Imported concert", False))
+
+
+########################################################################
+## Bulk update of rows
+class BulkUpdateTest(TestCase):
+
+	def setUp(self):
+		create_events(num_events=3)
+		self.user = User.objects.create_user("translator")
+
+	def test_batches(self):
+		translations = list(model_translations(Event).only("id", "translation", "is_fuzzy", "creator_user").order_by("id"))
+		for trans in translations:
+			trans.translation = u"Translation {0}".format(trans.id)
+			trans.is_fuzzy = False
+			trans.creator_user_id = self.user.id
+		# One query for each batch
+		with self.assertNumQueries(3):
+			self.assertEqual(_bulk_update(translations, ["translation", "is_fuzzy", "creator_user"], batch_size=5), len(translations))
+		for trans in model_translations(Event):
+			self.assertEqual((trans.translation, trans.is_fuzzy, trans.creator_user_id), (u"Translation {0}".format(trans.id), False, self.user.id))
+		with self.assertNumQueries(0):
+			self.assertEqual(_bulk_update([], ["translation"]), 0)
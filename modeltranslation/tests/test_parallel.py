@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from django.utils.six import StringIO
+
+from modeltranslation.models import FieldTranslation
+from modeltranslation.parallel import _get_units, update_translations_parallel
+from modeltranslation.tests.helpers import bulk_create_areas, bulk_create_events
+from modeltranslation.tests.testapp.models import Area, Event
+
+
+########################################################################
+########################################################################
+#	Parallel update of translations (see parallel.py).
+#	Processes of the pool use their own connections, so the data must be committed (TransactionTestCase) in a
+#	SQLite database file (see TEST NAME in settings.py).
+########################################################################
+########################################################################
+
+
+########################################################################
+## Parallel update of translations
+class ParallelUpdateTranslationsTest(TransactionTestCase):
+
+	NUM_EVENTS = 25
+
+	def setUp(self):
+		bulk_create_areas(num_areas=3)
+		bulk_create_events(num_events=self.NUM_EVENTS, num_descriptions=5)
+
+	def translations(self):
+		return sorted(FieldTranslation.objects.values_list("content_type_id", "object_id", "field", "lang", "source_checksum", "is_fuzzy"))
+
+	def test_same_result_as_sequential_update(self):
+		num_sequential = FieldTranslation.update_translations_by_model(chunk_size=2)
+		sequential_translations = self.translations()
+		FieldTranslation.objects.all().delete()
+
+		last_pks = []
+		num_parallel = update_translations_parallel(
+			2, chunk_size=2, unit_size=5, callback=lambda model_key, last_pk, counts: last_pks.append((model_key, last_pk))
+		)
+		self.assertEqual(num_parallel, num_sequential)
+		self.assertEqual(self.translations(), sequential_translations)
+
+		# Units are notified in order, so their last primary keys can be used as checkpoints
+		event_key = (Event.__module__, Event.__name__)
+		event_last_pks = [last_pk for model_key, last_pk in last_pks if model_key == event_key]
+		self.assertEqual(event_last_pks, sorted(event_last_pks))
+		self.assertEqual(event_last_pks[-1], Event.objects.order_by("-pk").values_list("pk", flat=True)[0])
+
+	def test_same_result_with_any_number_of_workers(self):
+		results = []
+		for workers in (2, 3):
+			FieldTranslation.objects.all().delete()
+			num_translations = update_translations_parallel(workers, chunk_size=3, unit_size=4)
+			results.append((num_translations, self.translations()))
+		self.assertEqual(results[0], results[1])
+
+	def test_resume_from_start_pks(self):
+		event_key = (Event.__module__, Event.__name__)
+		start_pk = Event.objects.order_by("pk").values_list("pk", flat=True)[10]
+		num_translations = update_translations_parallel(2, chunk_size=2, unit_size=5, model_keys=[event_key], start_pks={event_key: start_pk})
+		num_events = Event.objects.filter(pk__gt=start_pk).count()
+		num_languages = len([lang for lang, _ in settings.LANGUAGES if lang != settings.LANGUAGE_CODE])
+		self.assertEqual(num_translations[event_key]["created"], num_events * num_languages * len(Event._meta.translatable_fields))
+		self.assertFalse(FieldTranslation.objects.filter(object_id__lte=start_pk, model=Event.__name__).exists())
+
+	def test_units(self):
+		event_key = (Event.__module__, Event.__name__)
+		pks = list(Event.objects.order_by("pk").values_list("pk", flat=True))
+		units = [unit for unit in _get_units({}, 2, [event_key], None, {event_key: pks[2]}, 5) if unit[:2] == event_key]
+		# Consecutive ranges of unit_size primary keys after the start primary key
+		self.assertEqual([(unit[2], unit[3]) for unit in units], [(pks[i], pks[min(i + 4, len(pks) - 1)]) for i in range(3, len(pks), 5)])
+
+	def test_command_with_workers(self):
+		stdout = StringIO()
+		call_command("update_translations", "--workers", "2", "--chunk-size", "5", stdout=stdout)
+		num_languages = len([lang for lang, _ in settings.LANGUAGES if lang != settings.LANGUAGE_CODE])
+		num_translations = (self.NUM_EVENTS * len(Event._meta.translatable_fields) + 3 * len(Area._meta.translatable_fields)) * num_languages
+		self.assertEqual(FieldTranslation.objects.count(), num_translations)
+		self.assertIn(u"{0} translations created".format(num_translations), stdout.getvalue())
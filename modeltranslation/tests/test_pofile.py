@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.six import StringIO
+
+try:
+	from unittest import mock
+except ImportError:
+	import mock
+
+from modeltranslation import jobs
+from modeltranslation.models import FieldTranslation, TranslationJob
+from modeltranslation.pofile import generate_po, import_po, parse_po, po_header, po_string, write_po
+from modeltranslation.tests.helpers import create_translated_events, LocalCacheMixin
+
+
+########################################################################
+## Export of PO files
+class ExportPoTest(TestCase):
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=3)
+		self.translations = FieldTranslation.objects.filter(lang="en")
+
+	def test_po_string(self):
+		self.assertEqual(po_string(u"msgid", u"Say \"hi\"\tnow"), u"msgid \"Say \\\"hi\\\"\\tnow\"\n")
+		self.assertEqual(po_string(u"msgstr", u"One\nTwo"), u"msgstr \"\"\n\"One\\n\"\n\"Two\"\n")
+		self.assertEqual(po_string(u"msgstr", None), u"msgstr \"\"\n")
+
+	def test_blocks(self):
+		blocks = list(generate_po("en", chunk_size=2))
+		# Header and blocks of chunk_size entries
+		self.assertIn(u"Language: en", blocks[0])
+		self.assertEqual([block.count(u"msgctxt") for block in blocks[1:]], [2, 2, 2, 1])
+
+	def test_entries(self):
+		po_content = u"".join(generate_po("en"))
+		self.assertEqual(po_content.count(u"msgctxt"), self.translations.count())
+		trans = self.translations.get(object_id=self.events[0].id, model="Event", field="name")
+		entry = u"msgctxt \"{0}--{1}--Event--{2}--name\"\nmsgid \"Event 0\"\nmsgstr \"Event 0 en\"\n".format(trans.id, trans.module, trans.object_id)
+		self.assertIn(entry, po_content)
+		# Fuzzy translations are flagged
+		self.assertEqual(po_content.count(u"#, fuzzy"), self.translations.filter(is_fuzzy=True).count())
+
+	def test_write_po(self):
+		directory = tempfile.mkdtemp()
+		try:
+			path = os.path.join(directory, "en.po")
+			num_chars = write_po("en", path, chunk_size=2)
+			with io.open(path, encoding="utf-8") as po_file:
+				self.assertEqual(po_file.read(), u"".join(generate_po("en")))
+			self.assertEqual(os.path.getsize(path), num_chars)
+		finally:
+			shutil.rmtree(directory)
+
+
+########################################################################
+## export_translations command
+class ExportCommandTest(TestCase):
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=3)
+		self.events[0].delete()
+
+	def export(self, *args):
+		stdout = StringIO()
+		call_command("export_translations", "en", *args, stdout=stdout)
+		return stdout.getvalue()
+
+	def test_orphans_are_kept(self):
+		po_content = self.export()
+		self.assertEqual(po_content, u"".join(generate_po("en")))
+		self.assertIn(u"msgid \"Event 0\"", po_content)
+
+	def test_delete_orphans(self):
+		po_content = self.export("--delete-orphans")
+		self.assertNotIn(u"msgid \"Event 0\"", po_content)
+		self.assertNotEqual(TranslationJob.objects.get(name=jobs.DELETE_ORPHAN_TRANSLATIONS).last_end_datetime, None)
+
+	def test_delete_orphans_honors_the_lock(self):
+		TranslationJob.objects.create(name=jobs.DELETE_ORPHAN_TRANSLATIONS, status=TranslationJob.RUNNING, lock_owner=u"other:1", lock_datetime=timezone.now())
+		with self.assertRaises(CommandError):
+			self.export("--delete-orphans")
+		self.assertTrue(FieldTranslation.objects.filter(source_text=u"Event 0").exists())
+
+
+########################################################################
+## Import of PO files
+class ImportPoTest(TestCase):
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=3)
+		self.translations = FieldTranslation.objects.filter(lang="en")
+
+	def test_parse_po(self):
+		entries = list(parse_po(u"".join(generate_po("en")).splitlines(True)))
+		# Header and one entry for each translation
+		self.assertEqual((entries[0]["msgctxt"], entries[0]["msgid"]), (None, u""))
+		self.assertEqual(len(entries), 1 + self.translations.count())
+		trans = self.translations.get(object_id=self.events[0].id, model="Event", field="name")
+		entry = [entry for entry in entries if entry["msgctxt"] and entry["msgctxt"].startswith(u"{0}--".format(trans.id))][0]
+		self.assertEqual((entry["msgid"], entry["msgstr"], entry["is_fuzzy"]), (u"Event 0", u"Event 0 en", False))
+
+	def test_parse_multiline_entries(self):
+		lines = [
+			b"msgid \"\"\n", b"msgstr \"\"\n", b"\"Language: en\\n\"\n", b"\n",
+			b"#, fuzzy\n", b"msgctxt \"1--m--A--1--name\"\n", b"msgid \"\"\n", b"\"One\\n\"\n", b"\"Two\"\n", b"msgstr \"Uno\"\n",
+			b"msgctxt \"2--m--A--2--name\"\n", b"msgid \"Three\"\n", b"msgstr \"Tres\"\n",
+		]
+		entries = list(parse_po(lines))
+		self.assertEqual(entries[1:], [
+			{"msgctxt": u"1--m--A--1--name", "msgid": u"One\nTwo", "msgstr": u"Uno", "is_fuzzy": True},
+			{"msgctxt": u"2--m--A--2--name", "msgid": u"Three", "msgstr": u"Tres", "is_fuzzy": False},
+		])
+
+	def test_round_trip(self):
+		translations = dict((trans.id, (trans.translation, trans.is_fuzzy)) for trans in self.translations)
+		po_lines = u"".join(generate_po("en")).splitlines(True)
+		self.assertEqual(import_po(po_lines, "en"), {"created": 0, "updated": 0, "unchanged": len(translations), "skipped": 0})
+		self.assertEqual(dict((trans.id, (trans.translation, trans.is_fuzzy)) for trans in self.translations), translations)
+
+	def test_changed_translations(self):
+		po_lines = u"".join(generate_po("en")).replace(u"msgstr \"Event 0 en\"", u"msgstr \"Changed\"").splitlines(True)
+		num_entries = import_po(po_lines, "en", chunk_size=2)
+		self.assertEqual(num_entries["updated"], 1)
+		trans = self.translations.get(object_id=self.events[0].id, model="Event", field="name")
+		self.assertEqual(trans.translation, u"Changed")
+		self.assertEqual(self.translations.filter(translation=u"Changed").count(), 1)
+
+	def test_created_translations(self):
+		trans = self.translations.get(object_id=self.events[0].id, model="Event", field="name")
+		po_lines = u"".join(generate_po("en")).splitlines(True)
+		trans.delete()
+		num_entries = import_po(po_lines, "en")
+		self.assertEqual(num_entries["created"], 1)
+		new_trans = self.translations.get(object_id=self.events[0].id, model="Event", field="name")
+		self.assertEqual((new_trans.translation, new_trans.is_fuzzy, new_trans.content_type_id), (trans.translation, False, trans.content_type_id))
+
+	def test_duplicate_entries_are_skipped(self):
+		trans = self.translations.get(object_id=self.events[0].id, model="Event", field="name")
+		entry = u"\nmsgctxt \"{0}--{1}--Event--{2}--name\"\nmsgid \"Event 0\"\nmsgstr \"{{0}}\"\n".format(trans.id, trans.module, trans.object_id)
+		po_content = po_header("en") + entry.format(u"First") + entry.format(u"Second")
+		num_entries = import_po(po_content.splitlines(True), "en")
+		self.assertEqual((num_entries["updated"], num_entries["skipped"]), (1, 1))
+		self.assertEqual(self.translations.get(id=trans.id).translation, u"First")
+
+	def test_legacy_context(self):
+		# Files exported by old versions have no module in msgctxt
+		trans = self.translations.get(object_id=self.events[0].id, model="Event", field="name")
+		entry = u"\nmsgctxt \"{0}--Event--{1}--name\"\nmsgid \"Event 0\"\nmsgstr \"Legacy\"\n"
+		po_content = po_header("en") + entry.format(trans.id, trans.object_id) + entry.format(trans.id + 1000, trans.object_id)
+		num_entries = import_po(po_content.splitlines(True), "en")
+		# Missing translations can't be created without their module
+		self.assertEqual((num_entries["updated"], num_entries["created"], num_entries["skipped"]), (1, 0, 1))
+		self.assertEqual(self.translations.get(id=trans.id).translation, u"Legacy")
+
+	def test_translations_of_other_languages_are_skipped(self):
+		po_lines = u"".join(generate_po("fr")).splitlines(True)
+		num_entries = import_po(po_lines, "en")
+		self.assertEqual(num_entries["skipped"], FieldTranslation.objects.filter(lang="fr").count())
+
+
+########################################################################
+## import_translations command
+class ImportCommandTest(TestCase):
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=3)
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "en.po")
+		write_po("en", self.path)
+		self.events[0].delete()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def import_translations(self, *args):
+		stdout = StringIO()
+		call_command("import_translations", "en", self.path, *args, stdout=stdout)
+		return stdout.getvalue()
+
+	def test_orphans_are_kept(self):
+		num_translations = FieldTranslation.objects.count()
+		self.assertIn(u"Created: 0, updated: 0", self.import_translations())
+		self.assertEqual(FieldTranslation.objects.count(), num_translations)
+
+	def test_delete_orphans(self):
+		with mock.patch("modeltranslation.management.commands.import_translations.import_po", return_value={"created": 0, "updated": 0, "unchanged": 0, "skipped": 0}):
+			self.import_translations("--delete-orphans")
+		self.assertFalse(FieldTranslation.objects.filter(source_text=u"Event 0").exists())
+		self.assertTrue(FieldTranslation.objects.filter(source_text=u"Event 1").exists())
+		self.assertNotEqual(TranslationJob.objects.get(name=jobs.DELETE_ORPHAN_TRANSLATIONS).last_end_datetime, None)
+
+	def test_delete_orphans_honors_the_lock(self):
+		TranslationJob.objects.create(name=jobs.DELETE_ORPHAN_TRANSLATIONS, status=TranslationJob.RUNNING, lock_owner=u"other:1", lock_datetime=timezone.now())
+		with self.assertRaises(CommandError):
+			self.import_translations("--delete-orphans")
+		self.assertTrue(FieldTranslation.objects.filter(source_text=u"Event 0").exists())
+
+	def test_failed_import_keeps_deleted_orphans(self):
+		# The deletion of orphans is not rolled back with the import
+		with mock.patch("modeltranslation.management.commands.import_translations.import_po", side_effect=ValueError):
+			with self.assertRaises(ValueError):
+				self.import_translations("--delete-orphans")
+		self.assertFalse(FieldTranslation.objects.filter(source_text=u"Event 0").exists())
+
+
+########################################################################
+## Import of PO files with the default local translation cache
+class ImportPoLocalCacheTest(LocalCacheMixin, ImportPoTest):
+	pass
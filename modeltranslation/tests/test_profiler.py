@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+from django.test import TestCase
+
+try:
+	from unittest import mock
+except ImportError:
+	import mock
+
+from modeltranslation import profiler
+from modeltranslation.models import FieldTranslation
+from modeltranslation.tests.helpers import bulk_create_events
+from modeltranslation.tests.testapp.models import Event
+from modeltranslation.translation import _get_translated_field, prefetch_translations
+
+
+########################################################################
+## Profiler of translation lookups
+class ProfilerTest(TestCase):
+
+	NUM_EVENTS = 5
+
+	def setUp(self):
+		self.enabled = profiler.ENABLED
+		profiler.ENABLED = True
+		# Lookup function profiled as when MODELTRANSLATION_PROFILER is True at startup
+		self.lookup = profiler.profiled(_get_translated_field)
+		bulk_create_events(num_events=self.NUM_EVENTS, num_descriptions=1)
+		FieldTranslation.update_translations()
+
+	def tearDown(self):
+		profiler.end()
+		profiler.ENABLED = self.enabled
+
+	def test_disabled_profiler_does_not_wrap(self):
+		profiler.ENABLED = False
+		self.assertIs(profiler.profiled(_get_translated_field), _get_translated_field)
+
+	def test_lookups_are_recorded(self):
+		events = list(Event.objects.order_by("pk"))
+		profile = profiler.start(name=u"test")
+		self.lookup(events[0], "name", "en")
+		self.lookup(events[0], "description", "en")
+		profiler.end()
+
+		self.assertEqual(len(profile.lookups), 2)
+		first_lookup, second_lookup = profile.lookups
+		self.assertEqual(first_lookup["model"], u"{0}.Event".format(Event.__module__))
+		self.assertEqual((first_lookup["object_id"], first_lookup["field"], first_lookup["lang"]), (events[0].id, "name", "en"))
+		self.assertIn(u"test_profiler.py", first_lookup["caller"])
+		# Translations of the object are loaded by the first lookup
+		self.assertTrue(first_lookup["hit_database"])
+		self.assertFalse(second_lookup["hit_database"])
+
+	def test_n_plus_one_warning(self):
+		events = list(Event.objects.order_by("pk"))
+		profile = profiler.start(name=u"test")
+		profile.threshold = self.NUM_EVENTS - 1
+		for event in events:
+			self.lookup(event, "name", "en")
+		profiler.end()
+
+		suspects = profile.n_plus_one()
+		self.assertEqual([(suspect["model"], suspect["lookups"]) for suspect in suspects], [(u"{0}.Event".format(Event.__module__), self.NUM_EVENTS)])
+		with mock.patch.object(profiler.logger, "warning") as warning:
+			profile.log_warnings()
+		self.assertEqual(warning.call_count, 1)
+		self.assertEqual(warning.call_args[0][2:4], (u"{0}.Event".format(Event.__module__), self.NUM_EVENTS))
+
+	def test_prefetched_lookups_are_not_n_plus_one(self):
+		events = prefetch_translations(Event.objects.order_by("pk"), lang="en")
+		profile = profiler.start(name=u"test")
+		profile.threshold = 0
+		for event in events:
+			self.lookup(event, "name", "en")
+		profiler.end()
+		self.assertEqual(profile.num_queries, 0)
+		self.assertEqual(profile.n_plus_one(), [])
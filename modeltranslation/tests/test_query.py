@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from django.test import TestCase
+from django.utils import translation
+
+from modeltranslation.query import filter_translated, order_by_translated, translated_alias
+from modeltranslation.tests.helpers import create_translated_events, translate
+from modeltranslation.tests.testapp.models import Area, Event
+
+
+########################################################################
+## Translated values computed in database
+class TranslatedQuerySetTest(TestCase):
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=3)
+		translate(self.events[0], "name", "en", u"Zebra")
+		translate(self.events[2], "name", "en", u"Apple")
+
+	def test_translated_alias(self):
+		self.assertEqual(translated_alias("name", "es"), u"name_es_translated")
+
+	def test_with_translation(self):
+		events = Event.objects.with_translation("name", "en").order_by("pk")
+		self.assertEqual([event.name_en_translated for event in events], [u"Zebra", u"Event 1 en", u"Apple"])
+		# Fuzzy translations fall back to the source field
+		events = Event.objects.with_translation("description", "fr").order_by("pk")
+		self.assertEqual([event.description_fr_translated for event in events], [u"Description 0", u"Description 1", u"Description 2"])
+
+	def test_default_language(self):
+		# Default language has no translations, the source field is used
+		events = Event.objects.with_translation("name", "es").order_by("pk")
+		self.assertEqual([event.name_es_translated for event in events], [u"Event 0", u"Event 1", u"Event 2"])
+
+	def test_current_language(self):
+		with translation.override("en"):
+			events = Event.objects.with_translation("name", alias="translated_name").order_by("pk")
+			self.assertEqual(events[0].translated_name, u"Zebra")
+
+	def test_filter_translated(self):
+		events = Event.objects.filter_translated(name__icontains=u"app", lang="en")
+		self.assertEqual(list(events), [self.events[2]])
+		self.assertEqual(list(Event.objects.filter_translated(name=u"Event 1 en", lang="en")), [self.events[1]])
+		self.assertFalse(Event.objects.filter_translated(name=u"Event 1", lang="en").exists())
+
+	def test_lookups_of_other_fields(self):
+		# Fields that are not translatable (and relations) are filtered as usual, without annotations
+		queryset = Event.objects.filter_translated(name__icontains=u"e", pk__in=[self.events[0].pk, self.events[1].pk], area__name=u"Area", lang="en")
+		self.assertEqual(list(queryset.query.annotations.keys()), [u"name_en_translated"])
+		self.assertEqual(list(queryset.order_by("pk")), [self.events[0], self.events[1]])
+
+	def test_subqueries(self):
+		# The table of the model has another alias in subqueries
+		apple_events = Event.objects.filter_translated(name=u"Apple", lang="en")
+		self.assertEqual(list(Event.objects.filter(pk__in=apple_events.values("pk"))), [self.events[2]])
+		self.assertEqual(list(Area.objects.filter(pk__in=apple_events.values("area"))), [self.events[2].area])
+		self.assertFalse(Area.objects.filter(pk__in=Event.objects.filter_translated(name=u"Pear", lang="en").values("area")).exists())
+
+	def test_order_by_translated(self):
+		self.assertEqual(list(Event.objects.order_by_translated("name", lang="en")), [self.events[2], self.events[1], self.events[0]])
+		self.assertEqual(list(Event.objects.order_by_translated("-name", lang="en")), [self.events[0], self.events[1], self.events[2]])
+
+	def test_filter_and_order_reuse_annotation(self):
+		queryset = filter_translated(Event.objects.all(), name__startswith=u"E", lang="en")
+		queryset = order_by_translated(queryset, "-name", lang="en")
+		self.assertEqual(list(queryset.query.annotations.keys()), [u"name_en_translated"])
+		self.assertEqual(list(queryset), [self.events[1]])
+
+	def test_one_query(self):
+		with self.assertNumQueries(1):
+			names = list(Event.objects.order_by_translated("name", lang="en").values_list("name_en_translated", flat=True))
+		self.assertEqual(names, [u"Apple", u"Event 1 en", u"Zebra"])
+
+	def test_translations_of_other_models_are_not_used(self):
+		# Area and Event objects have the same ids, translations are selected by content type
+		area = Area.objects.get()
+		self.assertEqual(area.pk, self.events[0].pk)
+		event = Event.objects.with_translation("name", "en").get(pk=area.pk)
+		self.assertEqual(event.name_en_translated, u"Zebra")
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.db.models import F
+from django.template import Context, Template
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import translation
+
+from modeltranslation.forms import TranslatableModelForm
+from modeltranslation.models import FieldTranslation
+from modeltranslation.pofile import generate_po, import_po
+from modeltranslation.tests.helpers import bulk_create_areas, bulk_create_events
+from modeltranslation.tests.testapp.models import Area, Event
+from modeltranslation.transcache import RequestTransCache, TransCache
+
+
+########################################################################
+########################################################################
+#	Query budgets of the public entry points.
+#	Each test runs an operation and fails if it issues more queries than its budget. Budgets are functions of the
+#	number of languages, translatable fields and objects, and the operations are run on more objects than their
+#	budget, so a change that makes a path issue one query per object (or per field or language) fails.
+########################################################################
+########################################################################
+
+
+########################################################################
+## Queries of the synchronization of the translations of a new object: existing translations, translation memory
+## (two queries) and one bulk insert
+NEW_OBJECT_SYNC_QUERIES = 4
+
+########################################################################
+## Queries of the synchronization of the translations of an existing object: existing translations
+OBJECT_SYNC_QUERIES = 1
+
+########################################################################
+## Queries of enqueuing a job: get_or_create of its row (with a savepoint) and update of its status
+ENQUEUE_QUERIES = 5
+
+########################################################################
+## Queries of each request to the administration: session, user and recent actions of the admin index template
+REQUEST_QUERIES = 3
+
+########################################################################
+## Queries of an atomic view inside a test transaction: savepoint and its release
+ATOMIC_QUERIES = 2
+
+########################################################################
+## Number of objects of the tests
+NUM_EVENTS = 30
+NUM_AREAS = 3
+
+
+########################################################################
+## Queries of a bulk update of rows
+def bulk_update_queries(num_rows):
+	"""
+	Rows are updated with one query for each batch (see _bulk_update). The rows of the tests fit in one batch.
+	"""
+	if num_rows == 0:
+		return 0
+	return 1
+
+
+########################################################################
+## Form of the tests
+class EventForm(TranslatableModelForm):
+
+	class Meta:
+		model = Event
+		fields = ("name", "description", "area")
+
+
+########################################################################
+## Base class of the tests
+class QueryBudgetTestCase(TestCase):
+
+	def setUp(self):
+		self.languages = [lang for lang, _ in settings.LANGUAGES if lang != settings.LANGUAGE_CODE]
+		self.num_languages = len(self.languages)
+		self.num_fields = len(Event._meta.translatable_fields)
+		# Content type ids are cached after the first lookup of each model
+		for model in (Area, Event):
+			FieldTranslation.get_content_type_id(model.__module__, model.__name__)
+		TransCache.factory().clear()
+		RequestTransCache.end()
+
+	####################################################################################################################
+	## Fails if the block issues more queries than budget
+	@contextmanager
+	def assertQueryBudget(self, budget):
+		with CaptureQueriesContext(connection) as queries:
+			yield queries
+		self.assertLessEqual(
+			len(queries), budget,
+			u"{0} queries issued, budget is {1}:\n{2}".format(
+				len(queries), budget, u"\n".join(query["sql"] for query in queries.captured_queries)
+			)
+		)
+
+	####################################################################################################################
+	## Creates events and their translations. Translations to the first language are reviewed.
+	def create_events(self, num_events=NUM_EVENTS):
+		events = bulk_create_events(num_events=num_events, areas=bulk_create_areas(num_areas=NUM_AREAS))
+		FieldTranslation.update_translations()
+		FieldTranslation.objects.filter(lang=self.languages[0]).update(translation=F("source_text"), is_fuzzy=False)
+		TransCache.factory().clear()
+		return events
+
+
+########################################################################
+## Saving translatable objects
+class SaveQueryBudgetTest(QueryBudgetTestCase):
+
+	def test_save_new_object(self):
+		with self.assertQueryBudget(1 + NEW_OBJECT_SYNC_QUERIES):
+			Event.objects.create(name=u"Concert", description=u"A concert")
+		self.assertEqual(FieldTranslation.objects.count(), self.num_fields * self.num_languages)
+
+	def test_save_unchanged_object(self):
+		event = self.create_events()[0]
+		with self.assertQueryBudget(1 + OBJECT_SYNC_QUERIES):
+			event.save()
+
+	def test_save_changed_object(self):
+		event = self.create_events()[0]
+		event.name = u"Another name"
+		with self.assertQueryBudget(1 + OBJECT_SYNC_QUERIES + bulk_update_queries(self.num_languages)):
+			event.save()
+		self.assertEqual(FieldTranslation.objects.filter(content_type_id=FieldTranslation.get_object_content_type_id(event), object_id=event.id, field="name", source_text=u"Another name").count(), self.num_languages)
+
+
+########################################################################
+## TranslatableModelForm
+class FormQueryBudgetTest(QueryBudgetTestCase):
+
+	def form_data(self, area):
+		data = {"name": u"Concert", "description": u"A concert", "area": area.id}
+		for field in Event._meta.translatable_fields:
+			for lang in self.languages:
+				data[u"{0}_{1}".format(field, lang)] = u"{0} ({1})".format(data[field], lang)
+				data[u"{0}_{1}_is_fuzzy".format(field, lang)] = u"0"
+		return data
+
+	def test_init_creation_form(self):
+		with self.assertQueryBudget(0):
+			EventForm()
+
+	def test_init_edition_form(self):
+		event = self.create_events()[0]
+		with self.assertQueryBudget(1):
+			form = EventForm(instance=event)
+		self.assertEqual(form.fields["name_{0}".format(self.languages[0])].initial, event.name)
+
+	def test_save_creation_form(self):
+		area = Area.objects.create(name=u"Area")
+		form = EventForm(data=self.form_data(area))
+		self.assertTrue(form.is_valid())
+		# The object is saved twice: before and after setting its translations
+		budget = 1 + NEW_OBJECT_SYNC_QUERIES + 1 + OBJECT_SYNC_QUERIES + bulk_update_queries(self.num_fields * self.num_languages)
+		with self.assertQueryBudget(budget):
+			event = form.save()
+		self.assertEqual(FieldTranslation.objects.filter(content_type_id=FieldTranslation.get_object_content_type_id(event), object_id=event.id, is_fuzzy=False).count(), self.num_fields * self.num_languages)
+
+	def test_save_edition_form(self):
+		event = self.create_events()[0]
+		form = EventForm(data=self.form_data(event.area), instance=event)
+		self.assertTrue(form.is_valid())
+		budget = 2 * (1 + OBJECT_SYNC_QUERIES) + 2 * bulk_update_queries(self.num_fields * self.num_languages)
+		with self.assertQueryBudget(budget):
+			form.save()
+
+
+########################################################################
+## _ template filter and prefetch_translations tag
+class TemplateQueryBudgetTest(QueryBudgetTestCase):
+
+	LIST_TEMPLATE = u'{% load modeltranslation_tags %}{% for event in events %}{{ event|_:"name" }} {{ event|_:"description" }} {{ event.area|_:"name" }}\n{% endfor %}'
+	PREFETCH_LIST_TEMPLATE = u'{% load modeltranslation_tags %}{% prefetch_translations events "name,description,area.name" %}' + \
+		u'{% for event in events %}{{ event|_:"name" }} {{ event|_:"description" }} {{ event.area|_:"name" }}\n{% endfor %}'
+
+	def render(self, template, events):
+		with translation.override(self.languages[0]):
+			return Template(template).render(Context({"events": events}))
+
+	def test_filter_in_loop(self):
+		# Without the request memo, one query for each instance (each event has its own instance of its area), whatever
+		# the number of fields and languages
+		events = self.create_events()
+		with self.assertQueryBudget(2 * len(events)):
+			output = self.render(self.LIST_TEMPLATE, events)
+		self.assertIn(events[0].name, output)
+
+	def test_memoized_filter_in_loop(self):
+		# One query for each object
+		events = self.create_events()
+		RequestTransCache.start()
+		try:
+			with self.assertQueryBudget(len(events) + NUM_AREAS):
+				self.render(self.LIST_TEMPLATE, events)
+			# Other instances of the same objects in the same request are not queried again
+			events = list(Event.objects.select_related("area").order_by("pk"))
+			with self.assertQueryBudget(0):
+				self.render(self.LIST_TEMPLATE, events)
+		finally:
+			RequestTransCache.end()
+
+	def test_prefetched_filter_in_loop(self):
+		# One query for each relation path
+		events = self.create_events()
+		with self.assertQueryBudget(2):
+			output = self.render(self.PREFETCH_LIST_TEMPLATE, events)
+		self.assertIn(events[0].name, output)
+
+
+########################################################################
+## Views of the administration
+class AdminViewsQueryBudgetTest(QueryBudgetTestCase):
+
+	def setUp(self):
+		super(AdminViewsQueryBudgetTest, self).setUp()
+		self.events = self.create_events()
+		user = User.objects.create_superuser("admin", "admin@example.com", "admin")
+		self.client.force_login(user)
+		self.lang = self.languages[0]
+
+	def test_admin(self):
+		with self.assertQueryBudget(REQUEST_QUERIES):
+			response = self.client.get(reverse("modeltranslation:admin_url"))
+		self.assertEqual(response.status_code, 200)
+
+	def test_view_all(self):
+		# One query for the page, whatever the number of translations in it
+		with self.assertQueryBudget(REQUEST_QUERIES + 1):
+			response = self.client.get(reverse("modeltranslation:view_all_url", args=(self.lang, "all")))
+		self.assertEqual(response.status_code, 200)
+
+	def test_view_all_search(self):
+		with self.assertQueryBudget(REQUEST_QUERIES + 1):
+			response = self.client.get(reverse("modeltranslation:view_all_url", args=(self.lang, "fuzzy")), {"search": u"Event"})
+		self.assertEqual(response.status_code, 200)
+
+	def test_edit(self):
+		trans = FieldTranslation.objects.filter(lang=self.lang).first()
+		with self.assertQueryBudget(REQUEST_QUERIES + 1):
+			response = self.client.get(reverse("modeltranslation:edit_url", args=(trans.id,)))
+		self.assertEqual(response.status_code, 200)
+
+	def test_edit_save(self):
+		trans = FieldTranslation.objects.filter(lang=self.lang).first()
+		with self.assertQueryBudget(REQUEST_QUERIES + 2):
+			response = self.client.post(
+				reverse("modeltranslation:edit_url", args=(trans.id,)), {"save": u"1", "translation": u"Translation", "is_fuzzy": u""}
+			)
+		self.assertEqual(response.status_code, 302)
+
+	def test_export(self):
+		# Translations are read with one query, whatever their number
+		with self.assertQueryBudget(REQUEST_QUERIES + 1):
+			response = self.client.get(reverse("modeltranslation:export_translations_url", args=(self.lang,)))
+			po_content = b"".join(response.streaming_content)
+		self.assertEqual(po_content.count(b"msgctxt"), FieldTranslation.objects.filter(lang=self.lang).count())
+
+	def test_import(self):
+		po_content = u"".join(generate_po(self.lang)).replace(u'msgstr "', u'msgstr "~').encode("utf-8")
+		num_translations = FieldTranslation.objects.filter(lang=self.lang).count()
+		# One query to read the translations of the file and the bulk update of the changed ones
+		budget = REQUEST_QUERIES + ATOMIC_QUERIES + ENQUEUE_QUERIES + 1 + bulk_update_queries(num_translations)
+		with self.assertQueryBudget(budget):
+			response = self.client.post(
+				reverse("modeltranslation:import_translations_url", args=(self.lang,)),
+				{"file": SimpleUploadedFile("{0}.po".format(self.lang), po_content)}
+			)
+		self.assertEqual(response.status_code, 302)
+		self.assertEqual(FieldTranslation.objects.filter(lang=self.lang, translation__startswith=u"~").count(), num_translations)
+
+	def test_update_translations(self):
+		# Jobs are only enqueued
+		with self.assertQueryBudget(REQUEST_QUERIES + 2 * ENQUEUE_QUERIES):
+			response = self.client.get(reverse("modeltranslation:update_translations_url"))
+		self.assertEqual(response.status_code, 200)
+
+
+########################################################################
+## Import and export of PO files
+class PofileQueryBudgetTest(QueryBudgetTestCase):
+
+	def test_export(self):
+		self.create_events()
+		with self.assertQueryBudget(1):
+			po_content = u"".join(generate_po(self.languages[0]))
+		self.assertEqual(po_content.count(u"msgctxt"), FieldTranslation.objects.filter(lang=self.languages[0]).count())
+
+	def test_import_unchanged(self):
+		self.create_events()
+		po_lines = u"".join(generate_po(self.languages[0])).splitlines(True)
+		with self.assertQueryBudget(1):
+			num_entries = import_po(po_lines, self.languages[0])
+		self.assertEqual(num_entries["updated"], 0)
+
+	def test_import_changed(self):
+		self.create_events()
+		po_lines = u"".join(generate_po(self.languages[0])).replace(u'msgstr "', u'msgstr "~').splitlines(True)
+		num_translations = FieldTranslation.objects.filter(lang=self.languages[0]).count()
+		with self.assertQueryBudget(1 + bulk_update_queries(num_translations)):
+			num_entries = import_po(po_lines, self.languages[0])
+		self.assertEqual(num_entries["updated"], num_translations)
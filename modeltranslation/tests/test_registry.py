@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth.models import User
+from django.db.models import signals
+from django.test import SimpleTestCase
+
+try:
+	from unittest import mock
+except ImportError:
+	import mock
+
+from modeltranslation import registry
+from modeltranslation.tests.testapp.models import Area, Event
+from modeltranslation.translation import _save_translations
+
+
+########################################################################
+## Registry of translatable models
+class RegistryTest(SimpleTestCase):
+
+	def test_get_model(self):
+		self.assertIs(registry.get_model(Event.__module__, "Event"), Event)
+		self.assertIs(registry.get_model(User.__module__, "User"), User)
+		with self.assertRaises(ValueError):
+			registry.get_model(Event.__module__, "Removed")
+
+	def test_models_are_not_imported(self):
+		# Resolutions are lookups in a dict
+		with mock.patch("importlib.import_module") as import_module, mock.patch("inspect.getmembers") as getmembers:
+			registry.get_model(Event.__module__, "Event")
+		self.assertFalse(import_module.called)
+		self.assertFalse(getmembers.called)
+
+	def test_translatable_fields(self):
+		translatable_fields_by_model = registry.get_translatable_fields_by_model()
+		self.assertEqual(translatable_fields_by_model[(Event.__module__, "Event")], frozenset(["name", "description"]))
+		self.assertEqual(translatable_fields_by_model[(Area.__module__, "Area")], frozenset(["name"]))
+		self.assertNotIn((User.__module__, "User"), translatable_fields_by_model)
+		self.assertEqual(set(registry.get_translatable_models()), set([Area, Event]))
+
+	def test_translatable_model_modules(self):
+		self.addCleanup(registry.build)
+		with self.settings(TRANSLATABLE_MODEL_MODULES=["other.models"]):
+			registry.build()
+		self.assertEqual(registry.get_translatable_models(), [])
+		# All the models are still resolved
+		self.assertIs(registry.get_model(Event.__module__, "Event"), Event)
+
+	def test_translation_actions_are_added(self):
+		# The AppConfig adds them, models modules don't call addtranslations
+		for model in (Area, Event):
+			self.assertTrue(hasattr(model, "get_trans_attr"))
+			self.assertTrue(hasattr(model, "load_translations"))
+			self.assertTrue(signals.post_save.has_listeners(model))
+		receivers = [receiver() for receiver_key, receiver in signals.post_save.receivers if receiver_key[1] == id(Event)]
+		self.assertIn(_save_translations, receivers)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+from django.template import Context, Template
+from django.test import TestCase
+from django.utils import translation
+
+from modeltranslation.tests.helpers import create_translated_events
+from modeltranslation.tests.testapp.models import Area, Event
+
+
+########################################################################
+## _ template filter
+class TranslatedAttributeFilterTest(TestCase):
+
+	def setUp(self):
+		self.event = create_translated_events(num_events=1)[0]
+
+	def render(self, template, lang="en", **context):
+		with translation.override(lang):
+			return Template(u"{% load modeltranslation_tags %}" + template).render(Context(context))
+
+	def test_translated_field(self):
+		self.assertEqual(self.render(u"{{ event|_:\"name\" }}", event=self.event), u"Event 0 en")
+		# Fuzzy translations fall back to the source text
+		self.assertEqual(self.render(u"{{ event|_:\"description\" }}", event=self.event), u"Description 0")
+
+	def test_untranslated_attributes(self):
+		with self.assertNumQueries(0):
+			# Default language
+			self.assertEqual(self.render(u"{{ event|_:\"name\" }}", lang="es", event=self.event), u"Event 0")
+			# Attributes that are not translatable
+			self.assertEqual(self.render(u"{{ event|_:\"pk\" }}", event=self.event), u"{0}".format(self.event.pk))
+			# Objects that are not models
+			self.assertEqual(self.render(u"{{ text|_:\"name\" }}", text=u"Text"), u"Text")
+
+
+########################################################################
+## prefetch_translations template tag
+class PrefetchTranslationsTagTest(TestCase):
+
+	LOOP_TEMPLATE = u"{% for event in events %}{{ event|_:\"name\" }},{% endfor %}"
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=3)
+
+	def render(self, template, lang="en", **context):
+		with translation.override(lang):
+			return Template(u"{% load modeltranslation_tags %}" + template).render(Context(context))
+
+	def test_loop(self):
+		# The queryset and the translations
+		with self.assertNumQueries(2):
+			output = self.render(u"{% prefetch_translations events \"name\" %}" + self.LOOP_TEMPLATE, events=Event.objects.order_by("pk"))
+		self.assertEqual(output, u"Event 0 en,Event 1 en,Event 2 en,")
+
+	def test_all_fields(self):
+		template = u"{% prefetch_translations events %}{% for event in events %}{{ event|_:\"name\" }}/{{ event|_:\"description\" }},{% endfor %}"
+		with self.assertNumQueries(1):
+			output = self.render(template, events=self.events)
+		self.assertEqual(output, u"Event 0 en/Description 0,Event 1 en/Description 1,Event 2 en/Description 2,")
+
+	def test_relation_path(self):
+		template = u"{% prefetch_translations events \"name,area.name\" %}{% for event in events %}{{ event.area|_:\"name\" }},{% endfor %}"
+		events = list(Event.objects.order_by("pk"))
+		# Areas and the translations of the events and of the areas
+		with self.assertNumQueries(3):
+			output = self.render(template, events=events)
+		self.assertEqual(output, u"Area en,Area en,Area en,")
+
+	def test_reverse_relation_path(self):
+		template = u"{% prefetch_translations areas \"events.name\" %}{% for area in areas %}{% for event in area.events.all %}{{ event|_:\"name\" }},{% endfor %}{% endfor %}"
+		# Areas, their events and the translations of the events
+		with self.assertNumQueries(3):
+			output = self.render(template, areas=Area.objects.all())
+		self.assertEqual(output, u"Event 0 en,Event 1 en,Event 2 en,")
+
+	def test_nothing_to_prefetch(self):
+		with self.assertNumQueries(0):
+			self.assertEqual(self.render(u"{% prefetch_translations events %}", lang="es", events=self.events), u"")
+			self.assertEqual(self.render(u"{% prefetch_translations events %}", events=[]), u"")
+			self.assertEqual(self.render(u"{% prefetch_translations events %}", events=None), u"")
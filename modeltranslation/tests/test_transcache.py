@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+
+try:
+	from unittest import mock
+except ImportError:
+	import mock
+
+from modeltranslation.models import FieldTranslation
+from modeltranslation.tests.helpers import create_translated_events
+from modeltranslation.tests.testapp.models import Event
+from modeltranslation.transcache import TransCache, SharedTransCache
+from modeltranslation.translation import _get_translated_field, prefetch_translations
+
+
+########################################################################
+## Process-local LRU cache
+class TransCacheTest(SimpleTestCase):
+
+	def test_lru_eviction(self):
+		cache = TransCache(size=2, ttl=60)
+		cache.set(("m", "A", 1), {"a": 1})
+		cache.set(("m", "A", 2), {"a": 2})
+		# The first entry is the most recently used one
+		cache.get(("m", "A", 1))
+		cache.set(("m", "A", 3), {"a": 3})
+		self.assertEqual(cache.get(("m", "A", 1)), {"a": 1})
+		self.assertIsNone(cache.get(("m", "A", 2)))
+		self.assertEqual(cache.get(("m", "A", 3)), {"a": 3})
+		self.assertEqual(cache.stats()["evictions"], 1)
+
+	def test_ttl_expiration(self):
+		cache = TransCache(size=10, ttl=60)
+		with mock.patch("modeltranslation.transcache.time.time", return_value=1000.0):
+			cache.set(("m", "A", 1), {"a": 1})
+		with mock.patch("modeltranslation.transcache.time.time", return_value=1059.0):
+			self.assertEqual(cache.get(("m", "A", 1)), {"a": 1})
+		with mock.patch("modeltranslation.transcache.time.time", return_value=1060.0):
+			self.assertIsNone(cache.get(("m", "A", 1)))
+		self.assertEqual(cache.stats()["expirations"], 1)
+
+	def test_disabled_cache(self):
+		cache = TransCache(size=0)
+		self.assertFalse(cache.set(("m", "A", 1), {"a": 1}))
+		self.assertIsNone(cache.get(("m", "A", 1)))
+
+	def test_default_size(self):
+		with self.settings():
+			del settings.MODELTRANSLATION_CACHE_SIZE
+			self.assertEqual(TransCache().size, TransCache.DEFAULT_SIZE)
+			# The shared cache is used instead of the local one
+			with self.settings(MODELTRANSLATION_SHARED_CACHE="default"):
+				self.assertEqual(TransCache().size, 0)
+
+
+########################################################################
+## Invalidation of the cache when translations change
+class TransCacheInvalidationTest(TestCase):
+
+	def setUp(self):
+		self.singleton = TransCache.SINGLETON
+		TransCache.SINGLETON = TransCache(size=100, ttl=60)
+		self.event = create_translated_events(num_events=1)[0]
+
+	def tearDown(self):
+		TransCache.SINGLETON = self.singleton
+
+	def test_cached_translations(self):
+		self.assertEqual(_get_translated_field(self.event, "name", "en"), u"Event 0 en")
+		# Other instances of the object read the cache
+		event = Event.objects.get(pk=self.event.pk)
+		with self.assertNumQueries(0):
+			self.assertEqual(_get_translated_field(event, "name", "en"), u"Event 0 en")
+
+	def test_save_invalidates(self):
+		_get_translated_field(self.event, "name", "en")
+		self.assertTrue(TransCache.factory().has(TransCache.instance_key(self.event)))
+		trans = FieldTranslation.objects.get(content_type_id=FieldTranslation.get_object_content_type_id(self.event), object_id=self.event.id, field="name", lang="en")
+		trans.translation = u"New translation"
+		trans.save()
+		self.assertFalse(TransCache.factory().has(TransCache.instance_key(self.event)))
+		event = Event.objects.get(pk=self.event.pk)
+		self.assertEqual(_get_translated_field(event, "name", "en"), u"New translation")
+
+	def test_delete_invalidates(self):
+		_get_translated_field(self.event, "name", "en")
+		FieldTranslation.objects.get(content_type_id=FieldTranslation.get_object_content_type_id(self.event), object_id=self.event.id, field="name", lang="en").delete()
+		event = Event.objects.get(pk=self.event.pk)
+		self.assertEqual(_get_translated_field(event, "name", "en"), u"Event 0")
+
+
+########################################################################
+## Shared cache in a locmem cache backend
+class SharedTransCacheTest(TestCase):
+
+	def setUp(self):
+		self.singleton = SharedTransCache.SINGLETON
+		SharedTransCache.SINGLETON = SharedTransCache(alias="translations")
+		SharedTransCache.factory().backend.clear()
+		self.event = create_translated_events(num_events=2)[0]
+		self.key = TransCache.instance_key(self.event)
+
+	def tearDown(self):
+		SharedTransCache.SINGLETON = self.singleton
+
+	def translation(self, field="name", lang="en"):
+		return FieldTranslation.objects.get(content_type_id=FieldTranslation.get_object_content_type_id(self.event), object_id=self.event.id, field=field, lang=lang)
+
+	def test_get_many_set_many(self):
+		cache = SharedTransCache(alias="translations", version=2)
+		cache.set_many({("m", "A", 1): {("name", "en"): (u"A", False)}, ("m", "A", 2): {}})
+		self.assertEqual(cache.get_many([("m", "A", 1), ("m", "A", 2), ("m", "A", 3)]), {("m", "A", 1): {("name", "en"): (u"A", False)}, ("m", "A", 2): {}})
+		# Other versions of the keys are other entries
+		self.assertEqual(SharedTransCache(alias="translations", version=3).get_many([("m", "A", 1)]), {})
+		cache.delete_many([("m", "A", 1)])
+		self.assertEqual(list(cache.get_many([("m", "A", 1), ("m", "A", 2)]).keys()), [("m", "A", 2)])
+
+	def test_disabled_cache(self):
+		cache = SharedTransCache(alias=None)
+		self.assertFalse(cache.set(("m", "A", 1), {}))
+		self.assertEqual(cache.get_many([("m", "A", 1)]), {})
+
+	def test_lookups_are_shared(self):
+		_get_translated_field(self.event, "name", "en")
+		self.assertIn(("name", "en"), SharedTransCache.factory().get(self.key))
+		# Other processes (other instances without local cache) don't query the database
+		events = list(Event.objects.order_by("pk"))
+		with self.assertNumQueries(0):
+			self.assertEqual(_get_translated_field(events[0], "name", "en"), u"Event 0 en")
+		# Objects that are not cached are queried
+		with self.assertNumQueries(1):
+			prefetch_translations(events)
+		self.assertIsNotNone(SharedTransCache.factory().get(TransCache.instance_key(events[1])))
+
+	def test_save_writes_through(self):
+		_get_translated_field(self.event, "name", "en")
+		trans = self.translation()
+		trans.translation = u"New translation"
+		trans.save()
+		self.assertEqual(SharedTransCache.factory().get(self.key)[("name", "en")], (u"New translation", False))
+		event = Event.objects.get(pk=self.event.pk)
+		self.assertEqual(_get_translated_field(event, "name", "en"), u"New translation")
+
+	def test_delete_invalidates(self):
+		_get_translated_field(self.event, "name", "en")
+		self.translation().delete()
+		self.assertIsNone(SharedTransCache.factory().get(self.key))
+
+	def test_bulk_update_invalidates(self):
+		_get_translated_field(self.event, "name", "en")
+		# Translations of the object are written with a bulk update on post_save
+		self.event.name_en = u"Another translation"
+		self.event.save()
+		event = Event.objects.get(pk=self.event.pk)
+		self.assertEqual(_get_translated_field(event, "name", "en"), u"Another translation")
+
+	def test_delete_orphan_translations_invalidates(self):
+		_get_translated_field(self.event, "name", "en")
+		FieldTranslation.delete_orphan_translations(condition={"name": u"Event 1"})
+		self.assertIsNone(SharedTransCache.factory().get(self.key))
+		self.assertEqual(_get_translated_field(Event.objects.get(pk=self.event.pk), "name", "en"), u"Event 0")
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+from django.conf import settings
+from django.test import TestCase
+
+from modeltranslation.models import FieldTranslation
+from modeltranslation.tests.helpers import create_translated_events, LocalCacheMixin
+from modeltranslation.tests.testapp.models import Event
+from modeltranslation.translation import _get_translated_field, prefetch_translations
+
+
+########################################################################
+## prefetch_translations
+class PrefetchTranslationsTest(TestCase):
+
+	def setUp(self):
+		self.events = create_translated_events()
+
+	def test_one_query(self):
+		with self.assertNumQueries(1):
+			events = prefetch_translations(self.events, lang="en")
+		with self.assertNumQueries(0):
+			names = [_get_translated_field(event, "name", "en") for event in events]
+		self.assertEqual(names, [u"Event 0 en", u"Event 1 en", u"Event 2 en"])
+
+	def test_queryset(self):
+		# The queryset and the translations
+		with self.assertNumQueries(2):
+			events = prefetch_translations(Event.objects.order_by("pk"), lang="en")
+		self.assertEqual(len(events), len(self.events))
+		with self.assertNumQueries(0):
+			self.assertEqual(_get_translated_field(events[0], "name", "en"), u"Event 0 en")
+
+	def test_several_models(self):
+		objects = self.events + [self.events[0].area]
+		with self.assertNumQueries(1):
+			prefetch_translations(objects, lang="en")
+		with self.assertNumQueries(0):
+			self.assertEqual(_get_translated_field(self.events[0].area, "name", "en"), u"Area en")
+
+	def test_fuzzy_translations_fall_back_to_source_text(self):
+		prefetch_translations(self.events, lang="en")
+		with self.assertNumQueries(0):
+			self.assertEqual(_get_translated_field(self.events[0], "description", "en"), u"Description 0")
+
+	def test_fields(self):
+		prefetch_translations(self.events, lang="en", fields=["name"])
+		with self.assertNumQueries(0):
+			_get_translated_field(self.events[0], "name", "en")
+		# Other fields are not loaded
+		with self.assertNumQueries(1):
+			_get_translated_field(self.events[0], "description", "en")
+
+	def test_unsaved_and_none_objects_are_ignored(self):
+		with self.assertNumQueries(0):
+			objects = prefetch_translations([None, Event(name=u"New")], lang="en")
+		self.assertEqual(len(objects), 2)
+
+
+########################################################################
+## Synchronization of the translations on post_save
+class SaveTranslationsTest(TestCase):
+
+	def translations(self, event):
+		return FieldTranslation.objects.filter(content_type_id=FieldTranslation.get_object_content_type_id(event), object_id=event.id)
+
+	def test_new_object(self):
+		event = Event.objects.create(name=u"Concert", description=u"A concert")
+		translations = self.translations(event)
+		self.assertEqual(translations.count(), len(Event._meta.translatable_fields) * (len(settings.LANGUAGES) - 1))
+		self.assertEqual(set(translations.values_list("source_text", flat=True)), set([u"Concert", u"A concert"]))
+
+	def test_unchanged_object_is_not_written(self):
+		event = Event.objects.create(name=u"Concert", description=u"A concert")
+		last_update_datetimes = list(self.translations(event).order_by("id").values_list("last_update_datetime", flat=True))
+		# The UPDATE of the object and the query of its translations
+		with self.assertNumQueries(2):
+			event.save()
+		self.assertEqual(list(self.translations(event).order_by("id").values_list("last_update_datetime", flat=True)), last_update_datetimes)
+
+	def test_translations_of_the_object(self):
+		event = Event.objects.create(name=u"Concert", description=u"A concert")
+		event.name_en = u"Concert en"
+		event.name_en_is_fuzzy = False
+		event.description = u"A big concert"
+		event.save()
+		name_en = self.translations(event).get(field="name", lang="en")
+		self.assertEqual((name_en.translation, name_en.is_fuzzy), (u"Concert en", False))
+		self.assertEqual(set(self.translations(event).filter(field="description").values_list("source_text", flat=True)), set([u"A big concert"]))
+		self.assertEqual(_get_translated_field(Event.objects.get(pk=event.pk), "name", "en"), u"Concert en")
+
+
+########################################################################
+## Translations loaded in an instance
+class LoadedTranslationsTest(TestCase):
+
+	def setUp(self):
+		self.event = Event.objects.get(pk=create_translated_events(num_events=1)[0].pk)
+		self.trans = FieldTranslation.objects.get(content_type_id=FieldTranslation.get_object_content_type_id(self.event), object_id=self.event.id, field="name", lang="en")
+
+	def change_translation(self, translation_text):
+		self.trans.translation = translation_text
+		self.trans.save()
+
+	def test_loaded_translations_are_a_snapshot(self):
+		self.assertEqual(_get_translated_field(self.event, "name", "en"), u"Event 0 en")
+		# Translations changed elsewhere (other instances, PO imports, the admin) are not read again
+		self.change_translation(u"Changed")
+		with self.assertNumQueries(0):
+			self.assertEqual(_get_translated_field(self.event, "name", "en"), u"Event 0 en")
+		self.assertEqual(_get_translated_field(Event.objects.get(pk=self.event.pk), "name", "en"), u"Changed")
+		# Unless they are loaded explicitly
+		self.event.load_translations(lang="en")
+		self.assertEqual(_get_translated_field(self.event, "name", "en"), u"Changed")
+
+	def test_update_reloads_translations(self):
+		_get_translated_field(self.event, "name", "en")
+		self.change_translation(u"Changed")
+		FieldTranslation.update(self.event, "description", "en")
+		self.assertEqual(_get_translated_field(self.event, "name", "en"), u"Changed")
+
+
+########################################################################
+## The same tests with the default local translation cache
+class PrefetchTranslationsLocalCacheTest(LocalCacheMixin, PrefetchTranslationsTest):
+	pass
+
+
+class SaveTranslationsLocalCacheTest(LocalCacheMixin, SaveTranslationsTest):
+	pass
+
+
+class LoadedTranslationsLocalCacheTest(LocalCacheMixin, LoadedTranslationsTest):
+	pass
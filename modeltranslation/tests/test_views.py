@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+
+try:
+	from unittest import mock
+except ImportError:
+	import mock
+
+from modeltranslation import jobs
+from modeltranslation.models import FieldTranslation, TranslationJob
+from modeltranslation.pofile import generate_po
+from modeltranslation.tests.helpers import create_translated_events
+
+
+########################################################################
+## Paginated list of translations
+class ViewAllTest(TestCase):
+
+	PAGE_SIZE = 3
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=3)
+		self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "admin"))
+		self.translations = FieldTranslation.objects.filter(lang="en").order_by("id")
+		page_size_patch = mock.patch("modeltranslation.admin.views.TRANSLATIONS_PAGE_SIZE", self.PAGE_SIZE)
+		page_size_patch.start()
+		self.addCleanup(page_size_patch.stop)
+
+	def get(self, filter="all", **params):
+		return self.client.get(reverse("modeltranslation:view_all_url", args=("en", filter)), params)
+
+	def page_ids(self, response):
+		return [trans.id for trans in response.context["translations"]]
+
+	def test_pages(self):
+		ids = list(self.translations.values_list("id", flat=True))
+		response = self.get()
+		self.assertEqual(self.page_ids(response), ids[:self.PAGE_SIZE])
+		self.assertEqual((response.context["has_previous"], response.context["has_next"]), (False, True))
+		# Next pages start after the last id of the previous one
+		pages = [self.page_ids(response)]
+		while response.context["has_next"]:
+			response = self.get(after=response.context["next_after"])
+			pages.append(self.page_ids(response))
+		self.assertEqual(sum(pages, []), ids)
+		self.assertTrue(response.context["has_previous"])
+		# Previous pages end before the first id of the next one
+		response = self.get(before=response.context["previous_before"])
+		self.assertEqual(self.page_ids(response), pages[-2])
+		self.assertTrue(response.context["has_next"])
+
+	def test_filters(self):
+		response = self.get("completed")
+		self.assertEqual(self.page_ids(response), list(self.translations.filter(is_fuzzy=False).values_list("id", flat=True)[:self.PAGE_SIZE]))
+		response = self.get("fuzzy", search=u"description 1")
+		self.assertEqual(self.page_ids(response), list(self.translations.filter(source_text=u"Description 1").values_list("id", flat=True)))
+
+	def test_stale_translations_are_excluded_and_kept(self):
+		stale_trans = self.translations.first()
+		FieldTranslation.objects.filter(id=stale_trans.id).update(field="removed_field")
+		response = self.get()
+		self.assertNotIn(stale_trans.id, self.page_ids(response))
+		self.assertEqual(len(self.page_ids(response)), self.PAGE_SIZE)
+		# Nothing is deleted when reading the list
+		self.assertTrue(FieldTranslation.objects.filter(id=stale_trans.id).exists())
+
+	def test_invalid_languages(self):
+		for lang in ("xx", "es"):
+			response = self.client.get(reverse("modeltranslation:view_all_url", args=(lang, "all")))
+			self.assertEqual(response.status_code, 404)
+
+
+########################################################################
+## Import and export views
+class ImportExportViewsTest(TestCase):
+
+	def setUp(self):
+		self.events = create_translated_events(num_events=2)
+		self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "admin"))
+		self.po_content = u"".join(generate_po("en")).encode("utf-8")
+
+	def orphans_job_is_pending(self):
+		return TranslationJob.objects.filter(name=jobs.DELETE_ORPHAN_TRANSLATIONS, status=TranslationJob.PENDING).exists()
+
+	def test_get_import_does_not_enqueue_jobs(self):
+		response = self.client.get(reverse("modeltranslation:import_translations_url", args=("en",)))
+		self.assertEqual(response.status_code, 302)
+		self.assertFalse(self.orphans_job_is_pending())
+
+	def test_post_import_enqueues_orphans_job(self):
+		response = self.client.post(reverse("modeltranslation:import_translations_url", args=("en",)), {"file": SimpleUploadedFile("en.po", self.po_content)})
+		self.assertEqual(response.status_code, 302)
+		self.assertTrue(self.orphans_job_is_pending())
+
+	def test_export_does_not_enqueue_jobs(self):
+		response = self.client.get(reverse("modeltranslation:export_translations_url", args=("en",)))
+		self.assertEqual(b"".join(response.streaming_content), self.po_content)
+		self.assertFalse(self.orphans_job_is_pending())
+
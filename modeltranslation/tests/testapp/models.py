@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models
+
+# Adds translatable_fields to the Meta options
+import modeltranslation.translation
+from modeltranslation.query import TranslatableManager
+
+
+########################################################################
+########################################################################
+#	Synthetic translatable models used by the tests and the benchmarks.
+########################################################################
+########################################################################
+
+
+########################################################################
+## Area of an event
+class Area(models.Model):
+
+	name = models.CharField(max_length=150, verbose_name=u"Name")
+
+	class Meta:
+		verbose_name = u"area"
+		verbose_name_plural = u"areas"
+		translatable_fields = ("name",)
+
+
+########################################################################
+## Event
+class Event(models.Model):
+
+	name = models.CharField(max_length=150, verbose_name=u"Name")
+	description = models.TextField(verbose_name=u"Description")
+	area = models.ForeignKey(Area, null=True, default=None, on_delete=models.CASCADE, related_name="events", verbose_name=u"Area")
+
+	objects = TranslatableManager()
+
+	class Meta:
+		verbose_name = u"event"
+		verbose_name_plural = u"events"
+		translatable_fields = ("name", "description")
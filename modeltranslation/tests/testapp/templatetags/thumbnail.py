@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+from django import template
+
+
+########################################################################
+## The administration templates of modeltranslation load a thumbnail library that they don't use. This empty library
+## lets the tests render them without installing a thumbnail application.
+register = template.Library()
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+
+from django.conf.urls import include, url
+from django.contrib import admin
+
+from modeltranslation.urls import ModelTranslationUrls
+
+
+urlpatterns = [
+	url(r'^admin/', include(admin.site.urls)),
+	url(r'^modeltranslation/', include(ModelTranslationUrls().urls)),
+]
@@ -1,96 +1,403 @@
 # -*- coding: utf-8 -*-
 
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from modeltranslation import metrics
+
+
 ########################################################################################################################
-########################################################################################################################
-#### THIS IS NOT USED. FUTURE VERSIONS WILL IMPROVE PERFORMANCE BY USE OF THIS CACHE OF TRANSLATIONS
-########################################################################################################################
-########################################################################################################################
+## Process-local cache of the translations of each object
+class TransCache(object):
+    """
+    LRU cache of translations with a time to live for each entry.
+    Each entry contains all the translations of an object as a dict {(field, lang): (translation, is_fuzzy)}.
+    Its key is formed by the module, the model and the id of the object, so two models with the same name in different
+    modules do not collide.
+    Entries are invalidated when a FieldTranslation is saved or deleted (see models.py), but only in the process that
+    saved it, so the time to live bounds how long other processes can return a stale translation.
+    Settings:
+    - MODELTRANSLATION_CACHE_SIZE: maximum number of objects in the cache. 0 disables the cache (default: 1000, or 0
+      when a shared cache is configured, because the shared cache is invalidated for all the processes).
+    - MODELTRANSLATION_CACHE_TTL: maximum number of seconds an entry lives in the cache (default: 60).
+    """
+
+    ## Default size of the cache
+    DEFAULT_SIZE = 1000
 
+    ## Default time to live of each entry in seconds
+    DEFAULT_TTL = 60
 
-###########################################
-# Lo básico sobre los modelos
-from django.db import models
-from django.utils import timezone
-
-## Clase singleton que tiene 
-class TransCache:
-    
-    ## Diccionario que contiene la caché
-    cache = {}
-    
-    ## Fecha de creación de la caché
-    SINGLETON_CREATION_DATETIME = None
-    
-    ## Tiempo de vida de la caché
-    SINGLETON_EXPIRATION_MAX_SECONDS = 7200
-    
-    ## Tamaño de la caché
-    SINGLETON_SIZE = 1000
-    
-    ## Tamaño de la caché
+    ## Singleton instance
     SINGLETON = None
-    
+
+    ## Lock used to create the singleton
+    SINGLETON_LOCK = threading.Lock()
+
     @staticmethod
-    def _create_key(lang, instance):
-        """Crea la clave única de la caché"""
-        model_name = instance.__class__.__name__
-        return "{0}__{1}_{2}".format(lang,model_name,instance.id)
+    def make_key(module, model, object_id):
+        """Unique key of the object in the cache"""
+        return (module, model, int(object_id))
 
     @staticmethod
-    def _cache_is_expired():
-        """Indica si la caché está caducada"""
-        now = timezone.now()
-        timediff = TransCache.SINGLETON_CREATION_DATETIME - now
-        return (timediff.total_seconds() > TransCache.SINGLETON_EXPIRATION_MAX_SECONDS)
-    
-    def _cache_is_too_big(self):
-        """Indica si la caché es demasiado grande"""
-        return len(self.cache) > TransCache.SINGLETON_SIZE
-    
-    def __init__(self, *args, **kwargs):
-        """Inicializa la caché de traducciones"""
-        self.cache = {}
-    
+    def instance_key(instance):
+        """Unique key of a model instance in the cache"""
+        return TransCache.make_key(instance.__module__, instance.__class__.__name__, instance.id)
+
     @staticmethod
     def factory():
-        """Factoría del singleton, o crea una nueva o devuelve la existente"""
-        if not TransCache.SINGLETON or TransCache._cache_is_expired():
-            TransCache.SINGLETON = TransCache()
-            TransCache.SINGLETON_CREATION_DATETIME = timezone.now()
-
+        """Returns the singleton, creating it if it doesn't exist"""
+        if TransCache.SINGLETON is None:
+            with TransCache.SINGLETON_LOCK:
+                if TransCache.SINGLETON is None:
+                    TransCache.SINGLETON = TransCache()
         return TransCache.SINGLETON
 
-    def clear(self):
-        """Limpia la caché"""
-        self.cache = {}
-        self.creation_datetime = timezone.now()
+    def __init__(self, size=None, ttl=None):
+        """Initializes the cache of translations"""
+        if size is None:
+            default_size = 0 if getattr(settings, "MODELTRANSLATION_SHARED_CACHE", None) else TransCache.DEFAULT_SIZE
+            size = getattr(settings, "MODELTRANSLATION_CACHE_SIZE", default_size)
+        if ttl is None:
+            ttl = getattr(settings, "MODELTRANSLATION_CACHE_TTL", TransCache.DEFAULT_TTL)
+        self.size = size
+        self.ttl = ttl
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
-    def set(self, lang, instance):
-        """
-        Establece en la instancia actual los atributos de traducción
-        y la almacena en un diccionario de claves _create_key y valores
-        el objeto con los atributos dinámicos.
-        """
-        if self._cache_is_too_big():
-            self.cache = {}
-        instance_key = TransCache._create_key(lang, instance)
-        instance._translations_are_cached = True
-        instance.load_translations(lang=lang)
-        self.cache[instance_key] = instance
-        
-    def has(self, lang, instance):
+    @property
+    def is_enabled(self):
+        """Is this cache storing something?"""
+        return self.size > 0
+
+    def _is_expired(self, expiration_time, now):
+        """Is an entry with this expiration time expired?"""
+        return self.ttl and expiration_time <= now
+
+    def get(self, key):
         """
-        Indica si la caché tiene un objeto igual a éste con los
-        atributos dinámicos de traducción
+        Returns the translations dict stored with this key or None if there is no such key or it has expired.
         """
-        instance_key = TransCache._create_key(lang, instance)
-        return instance_key in self.cache
+        if not self.is_enabled:
+            return None
+        now = time.time()
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expiration_time, translations = entry
+            if self._is_expired(expiration_time, now):
+                del self.cache[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            # Most recently used entries are at the end of the dict
+            del self.cache[key]
+            self.cache[key] = entry
+            self.hits += 1
+            return translations
 
-    def get(self, lang, instance):
+    def set(self, key, translations):
         """
-        Obtiene una instancia igual a ésta, pero con los atributos
-        dinámicos de traduccción
+        Stores the translations dict of an object, evicting the least recently used entries if the cache is full.
         """
-        instance_key = TransCache._create_key(lang, instance)
-        return self.cache[instance_key]
+        if not self.is_enabled:
+            return False
+        expiration_time = time.time() + self.ttl if self.ttl else None
+        with self.lock:
+            if key in self.cache:
+                del self.cache[key]
+            self.cache[key] = (expiration_time, translations)
+            while len(self.cache) > self.size:
+                self.cache.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def has(self, key):
+        """Has the cache a non-expired entry for this key? (doesn't update counters)"""
+        with self.lock:
+            entry = self.cache.get(key)
+        return entry is not None and not self._is_expired(entry[0], time.time())
+
+    def delete(self, key):
+        """Invalidates the entry with this key"""
+        with self.lock:
+            return self.cache.pop(key, None) is not None
+
+    def clear(self):
+        """Removes all the entries of the cache"""
+        with self.lock:
+            self.cache.clear()
+
+    def reset_stats(self):
+        """Sets all the counters to zero"""
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+
+    def stats(self):
+        """Returns the counters of this cache as a dict"""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self.cache),
+                "size": self.size,
+                "ttl": self.ttl,
+            }
+
+
+########################################################################################################################
+## Cache of the translations of each object shared by all the processes
+class SharedTransCache(object):
+    """
+    Second level cache of translations stored in one of the caches defined in CACHES setting.
+    Each entry contains all the translations of an object as a dict {(field, lang): (translation, is_fuzzy)}, like
+    in TransCache, but it is shared by all the processes that use the same cache backend.
+    Settings:
+    - MODELTRANSLATION_SHARED_CACHE: alias of the cache in CACHES setting. None disables this cache (default: None).
+    - MODELTRANSLATION_SHARED_CACHE_TTL: timeout of each entry in seconds (default: timeout of the cache backend).
+    - MODELTRANSLATION_SHARED_CACHE_VERSION: version of the keys. Changing it invalidates all the entries (default: 1).
+    """
+
+    ## Prefix of all the keys
+    KEY_PREFIX = "modeltranslation"
+
+    ## Singleton instance
+    SINGLETON = None
+
+    @staticmethod
+    def factory():
+        """Returns the singleton, creating it if it doesn't exist"""
+        if SharedTransCache.SINGLETON is None:
+            SharedTransCache.SINGLETON = SharedTransCache()
+        return SharedTransCache.SINGLETON
+
+    def __init__(self, alias=None, ttl=None, version=None):
+        """Initializes the shared cache of translations"""
+        if alias is None:
+            alias = getattr(settings, "MODELTRANSLATION_SHARED_CACHE", None)
+        if ttl is None:
+            ttl = getattr(settings, "MODELTRANSLATION_SHARED_CACHE_TTL", None)
+        if version is None:
+            version = getattr(settings, "MODELTRANSLATION_SHARED_CACHE_VERSION", 1)
+        self.alias = alias
+        self.ttl = ttl
+        self.version = version
+        self._backend = None
+
+    @property
+    def is_enabled(self):
+        """Is this cache storing something?"""
+        return bool(self.alias)
+
+    @property
+    def backend(self):
+        """Django cache backend used to store the translations"""
+        if self._backend is None:
+            from django.core.cache import caches
+            self._backend = caches[self.alias]
+        return self._backend
+
+    def make_key(self, key):
+        """Converts a TransCache key (module, model, object_id) to a cache backend key"""
+        module, model, object_id = key
+        return "{0}:{1}:{2}:{3}:{4}".format(SharedTransCache.KEY_PREFIX, self.version, module, model, object_id)
+
+    def _timeout_kwargs(self):
+        if self.ttl is None:
+            return {}
+        return {"timeout": self.ttl}
+
+    def get(self, key):
+        """Returns the translations dict stored with this key or None"""
+        if not self.is_enabled:
+            return None
+        return self.backend.get(self.make_key(key))
+
+    def get_many(self, keys):
+        """Returns a dict {key: translations dict} with the keys that are in the cache"""
+        if not self.is_enabled or len(keys) == 0:
+            return {}
+        backend_keys = dict((self.make_key(key), key) for key in keys)
+        values = self.backend.get_many(list(backend_keys.keys()))
+        return dict((backend_keys[backend_key], value) for backend_key, value in values.items())
+
+    def set(self, key, translations):
+        """Stores the translations dict of an object"""
+        if not self.is_enabled:
+            return False
+        self.backend.set(self.make_key(key), translations, **self._timeout_kwargs())
+        return True
+
+    def set_many(self, translations_by_key):
+        """Stores several translations dicts given as a dict {key: translations dict}"""
+        if not self.is_enabled or len(translations_by_key) == 0:
+            return False
+        values = dict((self.make_key(key), translations) for key, translations in translations_by_key.items())
+        self.backend.set_many(values, **self._timeout_kwargs())
+        return True
+
+    def update(self, key, field, lang, translation, is_fuzzy):
+        """Writes one translation in the translations dict of an object, if that object is in the cache"""
+        translations = self.get(key)
+        if translations is None:
+            return False
+        translations[(field, lang)] = (translation, is_fuzzy)
+        return self.set(key, translations)
+
+    def delete(self, key):
+        """Invalidates the entry with this key"""
+        if not self.is_enabled:
+            return False
+        self.backend.delete(self.make_key(key))
+        return True
+
+    def delete_many(self, keys):
+        """Invalidates the entries with these keys"""
+        if not self.is_enabled or len(keys) == 0:
+            return False
+        self.backend.delete_many([self.make_key(key) for key in keys])
+        return True
+
+
+########################################################################################################################
+## Translations read during the current request
+class RequestTransCache(object):
+    """
+    Memoizes the translations read by the templates during a request (see middleware.py). Entries live in a
+    thread-local store that is created when the request starts and dropped when it ends, so they are never stale for
+    longer than a request. Outside a request nothing is stored.
+    Each entry contains the translations of an object to a language as a dict {field: translation or None}. None is a
+    negative entry: the translation is missing or fuzzy, so the source text is used.
+    """
+
+    ## Thread-local store
+    _local = threading.local()
+
+    @staticmethod
+    def start():
+        """Creates the store of the current request"""
+        RequestTransCache._local.translations = {}
+
+    @staticmethod
+    def end():
+        """Drops the store of the current request"""
+        RequestTransCache._local.translations = None
+
+    @staticmethod
+    def is_active():
+        """Is there a request store in this thread?"""
+        return getattr(RequestTransCache._local, "translations", None) is not None
+
+    @staticmethod
+    def get(key, lang):
+        """Returns the dict {field: translation or None} of an object to a language or None if it is not stored"""
+        translations = getattr(RequestTransCache._local, "translations", None)
+        if translations is None:
+            return None
+        field_translations = translations.get(key, {}).get(lang)
+        if field_translations is None:
+            metrics.increment("modeltranslation_cache_misses_total", cache="request")
+        else:
+            metrics.increment("modeltranslation_cache_hits_total", cache="request")
+        return field_translations
+
+    @staticmethod
+    def set(key, lang, field_translations):
+        """Stores the dict {field: translation or None} of an object to a language"""
+        translations = getattr(RequestTransCache._local, "translations", None)
+        if translations is None:
+            return False
+        translations.setdefault(key, {})[lang] = field_translations
+        return True
+
+    @staticmethod
+    def delete_many(keys):
+        """Invalidates all the languages of several objects"""
+        translations = getattr(RequestTransCache._local, "translations", None)
+        if translations is None:
+            return False
+        for key in keys:
+            translations.pop(key, None)
+        return True
+
+
+########################################################################################################################
+## Two level translation cache: process-local cache first, shared cache after that
+
+def get_cached_translations(key):
+    """Returns the translations dict of an object from the local or shared cache or None if it is not cached"""
+    translations = TransCache.factory().get(key)
+    if translations is not None:
+        metrics.increment("modeltranslation_cache_hits_total", cache="local")
+        return translations
+    translations = SharedTransCache.factory().get(key)
+    if translations is not None:
+        metrics.increment("modeltranslation_cache_hits_total", cache="shared")
+        TransCache.factory().set(key, translations)
+    else:
+        metrics.increment("modeltranslation_cache_misses_total", cache="translation")
+    return translations
+
+
+def get_many_cached_translations(keys):
+    """Returns a dict {key: translations dict} with the objects that are in the local or shared cache"""
+    local_cache = TransCache.factory()
+    cached_translations = {}
+    missing_keys = []
+    for key in keys:
+        translations = local_cache.get(key)
+        if translations is None:
+            missing_keys.append(key)
+        else:
+            cached_translations[key] = translations
+    shared_translations = SharedTransCache.factory().get_many(missing_keys)
+    for key, translations in shared_translations.items():
+        local_cache.set(key, translations)
+    if metrics.ENABLED and translation_cache_is_enabled():
+        metrics.increment("modeltranslation_cache_hits_total", len(cached_translations), cache="local")
+        metrics.increment("modeltranslation_cache_hits_total", len(shared_translations), cache="shared")
+        metrics.increment("modeltranslation_cache_misses_total", len(missing_keys) - len(shared_translations), cache="translation")
+    cached_translations.update(shared_translations)
+    return cached_translations
+
+
+def set_cached_translations(key, translations):
+    """Stores the translations dict of an object in both caches"""
+    TransCache.factory().set(key, translations)
+    SharedTransCache.factory().set(key, translations)
+
+
+def set_many_cached_translations(translations_by_key):
+    """Stores several translations dicts given as a dict {key: translations dict} in both caches"""
+    local_cache = TransCache.factory()
+    for key, translations in translations_by_key.items():
+        local_cache.set(key, translations)
+    SharedTransCache.factory().set_many(translations_by_key)
+
+
+def translation_cache_is_enabled():
+    """Is any of the caches enabled?"""
+    return TransCache.factory().is_enabled or SharedTransCache.factory().is_enabled
+
 
+def invalidate_cached_translations(keys):
+    """Removes several objects from both caches (used after bulk operations, which don't send signals)"""
+    local_cache = TransCache.factory()
+    for key in keys:
+        local_cache.delete(key)
+    SharedTransCache.factory().delete_many(keys)
+    RequestTransCache.delete_many(keys)
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 
+from modeltranslation import metrics, profiler
 from modeltranslation.models import checksum, FieldTranslation, trans_attr, trans_is_fuzzy_attr
+from modeltranslation.backends import get_backend
+from modeltranslation.transcache import TransCache, SharedTransCache, RequestTransCache, get_cached_translations,\
+	get_many_cached_translations, set_cached_translations, set_many_cached_translations, translation_cache_is_enabled
 from django.db import models
 from django.db.models import signals
 from django.conf import settings
@@ -48,8 +52,61 @@ def site_is_monolingual():
 	return (hasattr(settings, "IS_MONOLINGUAL") and settings.IS_MONOLINGUAL) or len(settings.LANGUAGES)==0
 
 
+########################################################################
+## Fallback languages of each language. For example: {"es-ar": ["es"], "pt-br": ["pt"]}
+FALLBACK_LANGUAGES = getattr(settings, "MODELTRANSLATION_FALLBACK_LANGUAGES", {})
+
+# Chain of languages of each language (see get_fallback_languages)
+_fallback_chains = {}
+
+
+########################################################################
+## Chain of languages whose translations are used for a language
+def get_fallback_languages(lang):
+	"""
+	Returns the list of languages whose translations are looked up, in order, when translating to lang. It starts
+	with lang and goes on with its fallback languages in MODELTRANSLATION_FALLBACK_LANGUAGES setting. Languages
+	not in that setting fall back to their generic language (es for es-ar) if it is one of LANGUAGES.
+	The chain ends before the default language, because its values are the source fields.
+	For example: "es-ar" -> ["es-ar", "es"].
+	"""
+	if lang in _fallback_chains:
+		return _fallback_chains[lang]
+
+	if lang in FALLBACK_LANGUAGES:
+		fallback_languages = list(FALLBACK_LANGUAGES[lang])
+	else:
+		generic_lang = lang.split("-")[0]
+		fallback_languages = [generic_lang] if generic_lang != lang and generic_lang in dict(settings.LANGUAGES) else []
+
+	chain = []
+	for chain_lang in [lang] + fallback_languages:
+		if chain_lang == settings.LANGUAGE_CODE:
+			break
+		if not chain_lang in chain:
+			chain.append(chain_lang)
+	_fallback_chains[lang] = chain
+	return chain
+
+
+########################################################################
+## First non-fuzzy translation of a field in a chain of languages
+def _get_fallback_translation(instance, attr, languages):
+	"""
+	Returns the first non-fuzzy translation of attr in languages, that must be loaded as dynamic attributes of
+	instance, or None if there is no such translation.
+	"""
+	for lang in languages:
+		trans_field = trans_attr(attr, lang)
+		is_fuzzy_attr = trans_is_fuzzy_attr(attr, lang)
+		if hasattr(instance, trans_field) and hasattr(instance, is_fuzzy_attr) and not getattr(instance, is_fuzzy_attr):
+			return getattr(instance, trans_field)
+	return None
+
+
 ########################################################################
 ## Adds a signal that will be triggered when saving a model object
+@metrics.timed("modeltranslation_save_translations_seconds")
 def _save_translations(sender, instance, *args, **kwargs):
 	"""
 	This signal saves model translations.
@@ -65,21 +122,23 @@ def _save_translations(sender, instance, *args, **kwargs):
 	if not hasattr(cls._meta, "translatable_fields"):
 		return False
 
-	# For each translatable field, get its value, computes its md5 and for each language creates its
-	# empty translation.
-	for field in cls._meta.translatable_fields:
-		value = getattr(instance,field)
-		if not value is None:
-			md5_value = checksum(value)
-			setattr( instance, u"md5"+field, md5_value )
-			for lang in settings.LANGUAGES:
-				lang = lang[0]
-				# print "({0}!={1}) = {2}".format(lang, settings.LANGUAGE_CODE,lang!=settings.LANGUAGE_CODE)
-				if lang != settings.LANGUAGE_CODE:
-					context = u"Updating from object"
-					if hasattr(instance, "trans_context"):
-						context = getattr(instance, "trans_context")
-					trans = FieldTranslation.update(instance, field, lang, context)
+	# Translation context
+	context = u"Updating from object"
+	if hasattr(instance, "trans_context"):
+		context = getattr(instance, "trans_context")
+
+	# Loads all the translations of the object with one query and writes only the new and the changed ones.
+	# The checksum of each translatable field is also set in the object as md5<field> attribute.
+	languages = [lang[0] for lang in settings.LANGUAGES if lang[0] != settings.LANGUAGE_CODE]
+	translations = FieldTranslation.update_object_translations(instance, languages, context)
+
+	# Bulk operations don't send signals, so translations are written through to the translation cache
+	# and to the storage backend here
+	key = TransCache.instance_key(instance)
+	if translation_cache_is_enabled():
+		set_cached_translations(key, translations)
+	RequestTransCache.delete_many([key])
+	get_backend().object_translations_saved(key, translations)
 
 
 ########################################################################
@@ -95,8 +154,8 @@ def _get_fieldtranslations(instance, field=None, lang=None):
 	Get all the translations for this object.
 	"""
 
-	# Basic filtering: filter translations by module, model an object_id
-	_filter = {"module": instance.__module__, "model": instance.__class__.__name__, "object_id": instance.id}
+	# Basic filtering: filter translations by content type (of its module and model) and object_id
+	_filter = {"content_type_id": FieldTranslation.get_object_content_type_id(instance), "object_id": instance.id}
 
 	if lang:
 		_filter["lang"] = lang
@@ -115,25 +174,215 @@ def _get_fieldtranslations(instance, field=None, lang=None):
 
 ########################################################################################################################
 ## Load translations of an instance
+@metrics.timed("modeltranslation_load_translations_seconds")
 def _load_translations(instance, lang=None):
 	"""
 	Loads all translations as dynamic attributes:
 		<attr>_<lang_code>
 		<attr>_<lang_code>_is_fuzzy
+	@param lang: language code or list of language codes (loaded with only one query). If None, all languages are loaded.
+	"""
+	languages = _get_languages_list(lang)
+	# Unsaved objects (for example, the instance of a creation form) have no translations
+	if languages == [] or instance.id is None:
+		return True
+
+	# Gets field translations (from the translation cache if possible)
+	translations = _get_translations_dict(instance=instance, lang=languages)
+	_set_loaded_translations(instance, translations, languages)
+	return True
+
+
+########################################################################################################################
+## Language parameter of _load_translations as a list (None means all languages)
+def _get_languages_list(lang):
+	return list(lang) if isinstance(lang, (list, tuple)) else ([lang] if lang else None)
+
+
+########################################################################################################################
+## Sets the loaded translations of an instance as dynamic attributes
+def _set_loaded_translations(instance, translations, languages=None):
+	for (field, field_lang), (translation_text, is_fuzzy) in translations.items():
+		if languages is None or field_lang in languages:
+			_set_translation_attrs(instance, field, field_lang, translation_text, is_fuzzy)
+	for loaded_lang in (languages or [None]):
+		_mark_translations_loaded(instance, loaded_lang)
+
+
+########################################################################################################################
+## Get the translations of an instance as a dict
+def _get_translations_dict(instance, lang=None):
+	"""
+	Returns the translations of an object as a dict {(field, lang): (translation, is_fuzzy)}.
+	If the translation cache (local or shared) is enabled, all the translations of the object are cached and
+	returned, so lang parameter (a language or a list of languages) is only used to filter the query when there is
+	no cache.
+	"""
+	if not translation_cache_is_enabled():
+		return _fetch_translations_dict(instance, lang=lang)
+
+	key = TransCache.instance_key(instance)
+	translations = get_cached_translations(key)
+	if translations is None:
+		translations = _fetch_translations_dict(instance)
+		set_cached_translations(key, translations)
+	return translations
+
+
+########################################################################################################################
+## Reads the translations of an instance from the storage backend and returns them as a dict
+def _fetch_translations_dict(instance, lang=None):
+	return get_backend().get_translations(TransCache.instance_key(instance), lang=lang)
+
+
+########################################################################################################################
+## Sets the dynamic attributes of one translation in an instance
+def _set_translation_attrs(instance, field, lang, translation_text, is_fuzzy):
+	"""
+	Sets <attr>_<lang_code> and <attr>_<lang_code>_is_fuzzy attributes of instance.
+	"""
+	# Sets translated field lang for this language
+	setattr(instance, trans_attr(field, lang), translation_text)
+	# Sets is_fuzzy value for this language
+	setattr(instance, trans_is_fuzzy_attr(field, lang), is_fuzzy)
+
+
+########################################################################################################################
+## Remembers that translations of an instance have been loaded for a language
+def _mark_translations_loaded(instance, lang=None, field=None):
+	"""
+	Stores in the instance the languages (and fields) whose translations are already loaded as dynamic attributes.
+	lang=None means all languages have been loaded and field=None means all fields have been loaded.
+	"""
+	if not hasattr(instance, "_loaded_translations"):
+		instance._loaded_translations = set()
+	instance._loaded_translations.add((lang, field))
+
+
+########################################################################################################################
+## Are the translations of an instance for a language (and a field) already loaded?
+def _translations_are_loaded(instance, lang=None, field=None):
+	"""
+	Loaded translations are a snapshot: they are only read again after FieldTranslation.update is called with the
+	instance, or when load_translations is called. Saving the instance writes its loaded translations.
 	"""
-	# Gets field translations
-	translations = _get_fieldtranslations(instance=instance, lang=lang)
-	for translation_i in translations:
-		# Sets translated field lang for this language
-		field_lang = trans_attr(translation_i.field, translation_i.lang)
-		setattr(instance, field_lang, translation_i.translation)
-		# Sets is_fuzzy value for this language
-		field_isfuzzy_lang = trans_is_fuzzy_attr(translation_i.field, translation_i.lang)
-		#print "{0} ({1}), attr_name={2} value={3}".format(translation.field, translation.lang, isfuzzy_lang,translation.is_fuzzy)
-		setattr(instance, field_isfuzzy_lang, translation_i.is_fuzzy)
+	loaded_translations = getattr(instance, "_loaded_translations", None)
+	if not loaded_translations:
+		return False
+	candidates = [(None, None), (lang, None)]
+	if field:
+		candidates += [(None, field), (lang, field)]
+	for candidate in candidates:
+		if candidate in loaded_translations:
+			return True
+	return False
+
+
+########################################################################################################################
+## Are the translations of an instance for a chain of languages (and a field) already loaded?
+def _fallback_translations_are_loaded(instance, languages, field=None):
+	for lang in languages:
+		if not _translations_are_loaded(instance, lang, field):
+			return False
 	return True
 
 
+########################################################################################################################
+## Load translations of a collection of instances with only one query
+def prefetch_translations(instances, lang=None, fields=None):
+	"""
+	Loads the translations of all the objects of a queryset or a list in only one query.
+	The list can contain objects of several translatable models.
+	Each object gets its translations as dynamic attributes (see _load_translations), so subsequent calls to
+	_t, _ or get_trans_attr will not query the database.
+	Objects present in the translation cache are not queried. When neither lang nor fields are given, the queried
+	translations are stored in the translation cache.
+	@param instances: queryset or iterable of model objects.
+	@param lang: language code of the translations to load. Its fallback languages (see get_fallback_languages) are
+	loaded in the same query. If None, all languages are loaded.
+	@param fields: list of field names to load. If None, all translatable fields are loaded.
+	@return: list with the objects whose translations have been loaded.
+	"""
+	instances = list(instances)
+	languages = _get_prefetch_languages(lang)
+	objects_by_key = _group_prefetch_instances(instances)
+	if len(objects_by_key) == 0:
+		return instances
+
+	# Translations of the objects that are in the local or in the shared cache
+	translations_by_key = _get_prefetch_cached_translations(objects_by_key)
+
+	# Objects that are not in the cache are read from the storage backend with one query
+	missing_keys = [key for key, translations in translations_by_key.items() if translations is None]
+	if len(missing_keys) > 0:
+		translations_by_key.update(get_backend().get_many_translations(missing_keys, lang=languages, fields=fields))
+		_set_prefetch_cached_translations(translations_by_key, missing_keys, lang, fields)
+
+	_set_prefetched_translations(objects_by_key, translations_by_key, languages, fields)
+	return instances
+
+
+########################################################################################################################
+## Languages loaded by prefetch_translations: lang and its fallback languages (None means all languages)
+def _get_prefetch_languages(lang):
+	return (get_fallback_languages(lang) or [lang]) if lang else None
+
+
+########################################################################################################################
+## Objects of prefetch_translations grouped by module, model and id
+def _group_prefetch_instances(instances):
+	"""
+	Returns a dict {(module, model, object_id): [instances]} with the saved instances of translatable models.
+	"""
+	objects_by_key = {}
+	for instance in instances:
+		if instance is None or instance.id is None:
+			continue
+		if not hasattr(instance._meta, "translatable_fields") or len(instance._meta.translatable_fields) == 0:
+			continue
+		key = TransCache.instance_key(instance)
+		objects_by_key.setdefault(key, []).append(instance)
+	return objects_by_key
+
+
+########################################################################################################################
+## Translations of the objects of prefetch_translations that are in the translation cache
+def _get_prefetch_cached_translations(objects_by_key):
+	"""
+	Returns a dict {(module, model, object_id): {(field, lang): (translation, is_fuzzy)}} with all the keys, where the
+	objects that are not in the cache have None.
+	"""
+	translations_by_key = dict((key, None) for key in objects_by_key.keys())
+	translations_by_key.update(get_many_cached_translations(list(objects_by_key.keys())))
+	return translations_by_key
+
+
+########################################################################################################################
+## Stores the translations read by prefetch_translations in the translation cache
+def _set_prefetch_cached_translations(translations_by_key, missing_keys, lang=None, fields=None):
+	# Only complete dicts of translations can be cached
+	if not lang and not fields:
+		set_many_cached_translations(dict((key, translations_by_key[key]) for key in missing_keys))
+
+
+########################################################################################################################
+## Sets the translations read by prefetch_translations as dynamic attributes of the objects
+def _set_prefetched_translations(objects_by_key, translations_by_key, languages=None, fields=None):
+	# Dynamic attributes of each object.
+	# Later lookups of these languages and fields will trust the dynamic attributes
+	loaded_fields = fields if fields else [None]
+	for key, objects in objects_by_key.items():
+		for (field, field_lang), (translation_text, is_fuzzy) in translations_by_key[key].items():
+			if (languages and field_lang not in languages) or (fields and field not in fields):
+				continue
+			for instance in objects:
+				_set_translation_attrs(instance, field, field_lang, translation_text, is_fuzzy)
+		for instance in objects:
+			for loaded_lang in (languages or [None]):
+				for field in loaded_fields:
+					_mark_translations_loaded(instance, loaded_lang, field)
+
+
 ########################################################################################################################
 ## Sets translations from a dict. Used in ModelForms
 def _set_dict_translations(instance, dict_translations):
@@ -167,19 +416,21 @@ def _set_dict_translations(instance, dict_translations):
 				# Translated field name
 				trans_field = trans_attr(field,lang)
 				# If translated field name is in the dict, we assign it to the object
-				if dict_translations.has_key(trans_field):
+				if trans_field in dict_translations:
 					setattr(instance,trans_field,dict_translations[trans_field])
 					
 				# Is fuzzy attribute
 				trans_isfuzzy = trans_is_fuzzy_attr(field,lang)
 				# If "is fuzzy" name is in the dict, we assign it to the object
-				if dict_translations.has_key(trans_isfuzzy):
+				if trans_isfuzzy in dict_translations:
 					is_fuzzy_value = (dict_translations[trans_isfuzzy]=="1") or (dict_translations[trans_isfuzzy]==1)
 					setattr(instance,trans_isfuzzy, is_fuzzy_value)
 
 
 ########################################################################
 ## Gets the translated field of an instance
+@profiler.profiled
+@metrics.timed("modeltranslation_get_translated_field_seconds")
 def _get_translated_field(instance, attr, lang=None):
 	# If we don't have translations, return the original attribute
 	if site_is_monolingual():
@@ -190,21 +441,51 @@ def _get_translated_field(instance, attr, lang=None):
 		lang = translation.get_language()
 	#print u"\n{0}[id={1}]: {2}='{3}', atrr_in_lang='{2}_{4}'".format(instance.__class__.__name__, instance.id, attr, getattr(instance,attr), lang)
 	
-	# Load translations
-	_load_translations(instance=instance, lang=lang)
-	
-	# Names of translated attributes of translated attribute and related is_fuzzy one.
-	trans_field = trans_attr(attr, lang)
-	is_fuzzy_attr = trans_is_fuzzy_attr(attr, lang)
+	# Load translations of the language and its fallback languages with one query (unless they have been already
+	# loaded, for example by prefetch_translations)
+	languages = get_fallback_languages(lang)
+	if not _fallback_translations_are_loaded(instance, languages, attr):
+		_load_translations(instance=instance, lang=languages)
 	
-	# If the translated attribute exists and is not fuzzy, return it
-	if hasattr(instance,trans_field) and hasattr(instance, is_fuzzy_attr) and not getattr(instance, is_fuzzy_attr):
-		return getattr(instance,trans_field)
+	# If there is a non-fuzzy translation in the language or in one of its fallback languages, return it
+	translation_text = _get_fallback_translation(instance, attr, languages)
+	if translation_text is not None:
+		return translation_text
 	
 	# Otherwise, return its original value
 	return getattr(instance, attr)
 
 
+########################################################################
+## Gets the translated field of an instance memoizing the translations of its object during the request
+@profiler.profiled
+def _get_memoized_translated_field(instance, attr, lang):
+	"""
+	The first time an object is touched in a request, all its translatable fields are loaded for lang and stored in
+	RequestTransCache, with negative entries for missing or fuzzy translations. Other instances of the same object
+	rendered in the same request don't read the translations again.
+	Outside a request (see TranslationMemoMiddleware), it is the same as _get_translated_field.
+	"""
+	# Translations already loaded in the instance (for example, by prefetch_translations) are trusted
+	if not RequestTransCache.is_active() or site_is_monolingual() or _fallback_translations_are_loaded(instance, get_fallback_languages(lang), attr):
+		return _get_translated_field(instance, attr, lang=lang)
+
+	key = TransCache.instance_key(instance)
+	field_translations = RequestTransCache.get(key, lang)
+	if field_translations is None:
+		languages = get_fallback_languages(lang)
+		_load_translations(instance=instance, lang=languages)
+		field_translations = dict(
+			(field, _get_fallback_translation(instance, field, languages)) for field in instance._meta.translatable_fields
+		)
+		RequestTransCache.set(key, lang, field_translations)
+
+	translation_text = field_translations.get(attr)
+	if translation_text is None:
+		return getattr(instance, attr)
+	return translation_text
+
+
 ########################################################################
 ########################################################################
 ########################################################################
@@ -232,11 +513,31 @@ def add_translation(sender):
 	sender.add_to_class("_", _get_translated_field)
 	sender.add_to_class("get_trans_attr", _get_translated_field)
 	sender.add_to_class("_t", _get_translated_field)
+	# 6. Async counterparts of load_translations and get_trans_attr (Python 3 and asgiref only, see aio.py)
+	aio = _get_aio()
+	if aio is not None:
+		sender.add_to_class("aload_translations", aio.aload_translations)
+		sender.add_to_class("aget_trans_attr", aio.aget_trans_attr)
+
+
+########################################################################
+## Async API module or None if this Python or Django can't load it
+def _get_aio():
+	try:
+		from modeltranslation import aio
+	except (ImportError, SyntaxError):
+		return None
+	return aio
 
 
 ########################################################################
 ## Adds translation actions to a module
 def addtranslations(module=__name__):
+	"""
+	Adds the translation actions to the translatable models of a module.
+	Not needed anymore: modeltranslation AppConfig adds them to all translatable models (see apps.py). Kept for
+	compatibility with the models modules that still call it.
+	"""
 	# For each class in that module
 	clsmembers = inspect.getmembers(sys.modules[module], inspect.isclass)
 	for cls in clsmembers:
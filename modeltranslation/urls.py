@@ -18,6 +18,7 @@ class ModelTranslationUrls(object):
 		url(r'^import/(?P<language>[-\w]+)$', views.import_translations, name="import_translations_url"), # Translation import
 		url(r'^export/(?P<language>[-\w]+)$', views.export_translations, name="export_translations_url"), # Translation export
 		url(r'^update_translations$', views.update_translations, name="update_translations_url"), # Update translations
+		url(r'^metrics$', views.metrics_view, name="metrics_url"), # Metrics in Prometheus format
 	]
 
 	@property